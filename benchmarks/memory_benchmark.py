@@ -0,0 +1,52 @@
+"""
+*File Name:* benchmarks/memory_benchmark.py
+
+Builds a large instance model and reports the memory and time needed to build it. Per default,
+1,000,000 objects are created, and each object is linked to two other objects, i.e., 2,000,000 links
+are created. The number of objects can be passed as the first command line argument, e.g.::
+
+    python -m benchmarks.memory_benchmark 100000
+
+Pass ``--compact`` to store the attribute values of the objects in compact form
+(see the ``compact_values`` property of :py:class:`.CClass`).
+
+"""
+import gc
+import sys
+import time
+import tracemalloc
+
+from codeable_models import CMetaclass, CClass, CObject, add_links
+
+
+def build_model(number_of_objects, compact_values=False):
+    metaclass = CMetaclass("Item Type")
+    item = CClass(metaclass, "Item", compact_values=compact_values, attributes={
+        "id": int,
+        "price": 1.0
+    })
+    item.association(item, "successor: [predecessor] * -> [successor] *")
+    objects = [CObject(item, values={"id": i}) for i in range(number_of_objects)]
+    links = []
+    for i, obj in enumerate(objects):
+        links.extend(add_links({obj: [objects[(i + 1) % number_of_objects],
+                                      objects[(i + 2) % number_of_objects]]}, role_name="successor"))
+    return item, objects, links
+
+
+def run(number_of_objects=1000000, compact_values=False):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    _, objects, links = build_model(number_of_objects, compact_values)
+    duration = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"objects: {len(objects)}, links: {len(links)}, compact values: {compact_values}")
+    print(f"time: {duration:.1f} s, memory: {memory / 2 ** 20:.1f} MiB, " +
+          f"per object (incl. its links): {memory / len(objects):.0f} bytes")
+
+
+if __name__ == "__main__":
+    arguments = [a for a in sys.argv[1:] if a != "--compact"]
+    run(int(arguments[0]) if arguments else 1000000, "--compact" in sys.argv[1:])
@@ -29,7 +29,7 @@ or import its classes and functions, e.g.::
 """
 
 from codeable_models.cexception import CException
-from codeable_models.cnamedelement import CNamedElement
+from codeable_models.cnamedelement import CNamedElement, delete_elements
 from codeable_models.cbundlable import CBundlable
 from codeable_models.cattribute import CAttribute
 from codeable_models.cclassifier import CClassifier
@@ -40,4 +40,4 @@ from codeable_models.cobject import CObject
 from codeable_models.cenum import CEnum
 from codeable_models.cbundle import CBundle, CPackage, CLayer
 from codeable_models.cassociation import CAssociation
-from codeable_models.clink import CLink, set_links, add_links, delete_links
+from codeable_models.clink import CLink, set_links, add_links, add_links_bulk, delete_links
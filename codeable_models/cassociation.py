@@ -2,8 +2,9 @@ import re
 
 from codeable_models.cexception import CException
 from codeable_models.cclassifier import CClassifier
-from codeable_models.internal.commons import is_cmetaclass, is_cstereotype, is_cassociation, check_is_cmetaclass, \
-    check_is_cclass
+from codeable_models.internal.commons import is_cmetaclass, is_cstereotype, is_cassociation, is_cclass, \
+    is_cobject, check_is_cmetaclass, check_is_cclass
+from codeable_models.internal.model_epochs import advance_associations_epoch
 from codeable_models.internal.stereotype_holders import CStereotypesHolder, CStereotypeInstancesHolder
 from codeable_models.internal.var_values import get_var_value, VarValueKind, delete_var_value, set_var_value, \
     get_var_values, set_var_values
@@ -25,6 +26,11 @@ def _check_for_classifier_and_role_name_match(classifier, role_name, association
 
 
 class CAssociation(CClassifier):
+    __slots__ = ("source", "target", "role_name_", "source_role_name_", "source_multiplicity_",
+                 "source_lower_multiplicity", "source_upper_multiplicity", "multiplicity_", "lower_multiplicity",
+                 "upper_multiplicity", "aggregation_", "composition_", "stereotypes_holder", "derived_from_",
+                 "derived_associations_", "stereotype_instances_holder", "tagged_values_", "ends")
+
     STAR_MULTIPLICITY = -1
 
     def __init__(self, source, target, descriptor=None, **kwargs):
@@ -49,7 +55,7 @@ class CAssociation(CClassifier):
                     See documentation of the property ``multiplicity`` for the accepted syntax.
                 - ``role_name``:
                     Takes a string specifying the target role name and stores it in the same-named
-                    attribute. Defaults to ``None``.
+                    property. Defaults to ``None``.
                 - ``source_multiplicity``:
                     Used to provide the source multiplicity of the association.
                     Defaults to ``1``. See documentation of the property ``multiplicity``
@@ -129,8 +135,8 @@ class CAssociation(CClassifier):
         """
         self.source = source
         self.target = target
-        self.role_name = None
-        self.source_role_name = None
+        self.role_name_ = None
+        self.source_role_name_ = None
         self.source_multiplicity_ = "1"
         self.source_lower_multiplicity = 1
         self.source_upper_multiplicity = 1
@@ -146,7 +152,7 @@ class CAssociation(CClassifier):
         self.tagged_values_ = {}
         # we set the name here already so that either the name=... name or the descriptor name go into
         # super().__init__(self.name, ...)
-        self.name = kwargs.pop("name", None)
+        self.name_ = kwargs.pop("name", None)
         self.ends = None
         if descriptor is not None:
             # note that descriptor might overwrite self.name, if it has the form "name: ..."
@@ -156,6 +162,7 @@ class CAssociation(CClassifier):
         source.associations_.append(self)
         if source != target:
             target.associations_.append(self)
+        advance_associations_epoch()
 
     def _init_keyword_args(self, legal_keyword_args=None, **kwargs):
         if legal_keyword_args is None:
@@ -198,11 +205,32 @@ class CAssociation(CClassifier):
             return True
         return False
 
+    @property
+    def role_name(self):
+        """str: Getter and setter for the role name of the target of the association."""
+        return self.role_name_
+
+    @role_name.setter
+    def role_name(self, role_name):
+        self.role_name_ = role_name
+        advance_associations_epoch()
+
+    @property
+    def source_role_name(self):
+        """str: Getter and setter for the role name of the source of the association."""
+        return self.source_role_name_
+
+    @source_role_name.setter
+    def source_role_name(self, source_role_name):
+        self.source_role_name_ = source_role_name
+        advance_associations_epoch()
+
     def matches_target_(self, classifier, role_name):
-        return _check_for_classifier_and_role_name_match(classifier, role_name, self.target, self.role_name)
+        return _check_for_classifier_and_role_name_match(classifier, role_name, self.target, self.role_name_)
 
     def matches_source_(self, classifier, role_name):
-        return _check_for_classifier_and_role_name_match(classifier, role_name, self.source, self.source_role_name)
+        return _check_for_classifier_and_role_name_match(classifier, role_name, self.source,
+                                                         self.source_role_name_)
 
     @property
     def aggregation(self):
@@ -343,7 +371,7 @@ class CAssociation(CClassifier):
         """
         if self.is_deleted:
             raise CException(f"can't get tagged value '{name!s}' on deleted link")
-        return get_var_value(self, self.stereotype_instances_holder.get_stereotype_instance_path(), self.tagged_values_,
+        return get_var_value(self, self.stereotype_instances_holder.stereotypes_, self.tagged_values_,
                              name, VarValueKind.TAGGED_VALUE, stereotype)
 
     def delete_tagged_value(self, name, stereotype=None):
@@ -360,7 +388,7 @@ class CAssociation(CClassifier):
         """
         if self.is_deleted:
             raise CException(f"can't delete tagged value '{name!s}' on deleted link")
-        return delete_var_value(self, self.stereotype_instances_holder.get_stereotype_instance_path(),
+        return delete_var_value(self, self.stereotype_instances_holder.stereotypes_,
                                 self.tagged_values_, name, VarValueKind.TAGGED_VALUE, stereotype)
 
     def set_tagged_value(self, name, value, stereotype=None):
@@ -378,7 +406,7 @@ class CAssociation(CClassifier):
         """
         if self.is_deleted:
             raise CException(f"can't set tagged value '{name!s}' on deleted link")
-        return set_var_value(self, self.stereotype_instances_holder.get_stereotype_instance_path(), self.tagged_values_,
+        return set_var_value(self, self.stereotype_instances_holder.stereotypes_, self.tagged_values_,
                              name, value, VarValueKind.TAGGED_VALUE, stereotype)
 
     @property
@@ -389,7 +417,7 @@ class CAssociation(CClassifier):
         """
         if self.is_deleted:
             raise CException("can't get tagged values on deleted link")
-        return get_var_values(self.stereotype_instances_holder.get_stereotype_instance_path(), self.tagged_values_)
+        return get_var_values(self.stereotype_instances_holder.stereotypes_, self.tagged_values_)
 
     @tagged_values.setter
     def tagged_values(self, new_values):
@@ -436,8 +464,8 @@ class CAssociation(CClassifier):
         for derived_association in metaclass_association.derived_associations:
             if derived_association == self:
                 continue
-            if self.source in derived_association.source.class_path and \
-                    self.target in derived_association.target.class_path:
+            if self.source in derived_association.source.get_class_path_() and \
+                    self.target in derived_association.target.get_class_path_():
                 if upper_multiplicity != CAssociation.STAR_MULTIPLICITY:
                     if derived_association.upper_multiplicity == CAssociation.STAR_MULTIPLICITY:
                         upper_multiplicity = CAssociation.STAR_MULTIPLICITY
@@ -584,23 +612,17 @@ class CAssociation(CClassifier):
         """
         if self.is_deleted:
             return
-        if is_cmetaclass(self.source):
-            all_instances = self.source.all_classes
-        elif is_cstereotype(self.source):
-            all_instances = self.source.all_extended_instances
-        else:
-            all_instances = self.source.all_objects
-        for instance in all_instances:
-            for link in instance.links:
-                link.delete()
+        for link in self.get_links_():
+            link.delete()
         self.source.associations_.remove(self)
         if self.source != self.target:
             self.target.associations_.remove(self)
+        advance_associations_epoch()
         for s in self.stereotypes_holder.stereotypes:
             s.extended_.remove(self)
         self.stereotypes_holder.stereotypes_ = []
         for si in self.stereotype_instances:
-            si.extended_instances_.remove(self)
+            del si.extended_instances_[self]
         self.stereotype_instances_holder.stereotypes_ = []
         if self.derived_from_ is not None:
             self.derived_from_.derived_associations_.remove(self)
@@ -611,6 +633,21 @@ class CAssociation(CClassifier):
             self.derived_associations_ = []
         super().delete()
 
+    def get_links_(self):
+        # all links of the association, found via the instances of the association's source
+        if is_cmetaclass(self.source):
+            all_instances = [cl.class_object_ for cl in self.source.all_classes]
+        elif is_cstereotype(self.source):
+            all_instances = [i.class_object_ if is_cclass(i) else i for i in self.source.all_extended_instances]
+        else:
+            all_instances = self.source.all_objects
+        links = {}
+        for instance in all_instances:
+            if is_cobject(instance):
+                for link in instance.get_links_for_association_(self):
+                    links[link] = None
+        return list(links)
+
     def check_multiplicity_(self, obj, actual_length, actual_opposite_length, check_target_multiplicity):
         if check_target_multiplicity:
             upper = self.upper_multiplicity
@@ -636,7 +673,7 @@ class CAssociation(CClassifier):
         if index != -1:
             name = descriptor[0:index]
             descriptor = descriptor[index + 1:]
-            self.name = name.strip()
+            self.name_ = name.strip()
 
         # handle type of relation
         aggregation = False
@@ -1,7 +1,10 @@
 from codeable_models.internal.commons import *
+from codeable_models.internal.model_epochs import advance_values_epoch
 
 
 class CAttribute(object):
+    __slots__ = ("name_", "classifier_", "type_", "default_")
+
     def __init__(self, **kwargs):
         """``CAttribute`` is internally used for storing attributes, and can be used by the user for
         detailed setting or introspection of attribute data.
@@ -80,6 +83,7 @@ class CAttribute(object):
                 if not isinstance(self.default_, new_type):
                     self._wrong_default_exception(self.default_, new_type)
         self.type_ = new_type
+        advance_values_epoch()
 
     @property
     def default(self):
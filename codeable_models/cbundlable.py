@@ -5,6 +5,8 @@ from codeable_models.internal.commons import set_keyword_args, check_named_eleme
 
 
 class CBundlable(CNamedElement):
+    __slots__ = ("bundles_",)
+
     def __init__(self, name, **kwargs):
         """``CBundlable`` is a superclass for all elements in Codeable Models that can be placed in a
         :py:class:`.CBundle`, which is used for grouping elements. Elements that can be bundled are
@@ -44,7 +46,7 @@ class CBundlable(CNamedElement):
     def bundles(self, bundles):
         if bundles is None:
             bundles = []
-        for b in self.bundles_:
+        for b in list(self.bundles_):
             b.remove(self)
         self.bundles_ = []
         if is_cbundle(bundles):
@@ -58,7 +60,11 @@ class CBundlable(CNamedElement):
             if b in self.bundles_:
                 raise CException(f"'{b.name!s}' is already a bundle of '{self.name!s}'")
             self.bundles_.append(b)
-            b.elements_.append(self)
+            b.add_element_(self)
+
+    def rename_(self, old_name):
+        for b in self.bundles_:
+            b.rename_element_(self, old_name)
 
     def delete(self):
         """
@@ -122,6 +128,35 @@ class CBundlable(CNamedElement):
             (i.e., the link objects) are included
             in the returned list. The option is only applicable on :py:class:`.CObject` and  :py:class:`CLink`.
         """
+        return list(self.iter_connected_elements(**kwargs))
+
+    def iter_connected_elements(self, max_depth=None, predicate=None, **kwargs):
+        """Iterate over all elements this element is connected to. Yields the same elements in the same order as
+        :py:meth:`.get_connected_elements`, but lazily, so that the search can be stopped early by the caller,
+        and huge graphs can be processed without holding all connected elements in a list.
+
+        The traversal uses an explicit stack instead of recursion. Hence, arbitrarily deep graphs, such as long
+        chains of connected elements, can be traversed.
+
+        Args:
+            max_depth (int): If set, only elements reachable from this element via at most ``max_depth``
+                connections are yielded. ``0`` yields only this element.
+            predicate: If set, a function that takes an element and returns a bool. Only elements for which
+                the predicate returns ``True`` are yielded. The search still continues via elements
+                for which it returns ``False``.
+            **kwargs: Configuration parameters for the method, see :py:meth:`.get_connected_elements`.
+
+        Returns:
+            Iterator[CBundlable]: Iterator over the connected elements.
+
+        **Example:**
+
+        Get the first five objects of the class ``item`` connected to ``cart`` via at most two links::
+
+            items = itertools.islice(cart.iter_connected_elements(
+                max_depth=2, predicate=lambda e: e.instance_of(item)), 5)
+
+        """
         context = ConnectedElementsContext()
 
         allowed_keyword_args = ["add_bundles", "process_bundles", "stop_elements_inclusive",
@@ -135,39 +170,52 @@ class CBundlable(CNamedElement):
 
         set_keyword_args(context, allowed_keyword_args, **kwargs)
 
-        if self in context.stop_elements_exclusive:
-            return []
-        context.elements.append(self)
-        self.compute_connected_(context)
-        if not context.add_bundles:
-            context.elements = [elt for elt in context.elements if not is_cbundle(elt)]
-        if not context.add_stereotypes:
-            context.elements = [elt for elt in context.elements if not is_cstereotype(elt)]
-        if not context.add_associations:
-            context.elements = [elt for elt in context.elements if not is_cassociation(elt)]
-        if not context.add_links:
-            context.elements = [elt for elt in context.elements if not is_clink(elt)]
-        return context.elements
-
-    @staticmethod
-    def append_connected_(context, connected):
-        for c in connected:
-            if c not in context.elements:
-                context.elements.append(c)
-                if c not in context.all_stop_elements:
-                    c.compute_connected_(context)
-
-    def compute_connected_(self, context):
-        connected = []
-        for bundle in self.bundles_:
-            if bundle not in context.stop_elements_exclusive:
-                connected.append(bundle)
-        self.append_connected_(context, connected)
+        if max_depth is not None and (not isinstance(max_depth, int) or isinstance(max_depth, bool) or
+                                      max_depth < 0):
+            raise CException(f"max depth must be a non-negative integer, but got: '{max_depth!s}'")
+        if predicate is not None and not callable(predicate):
+            raise CException(f"predicate must be callable, but got: '{predicate!s}'")
+        return self._iter_connected(context, max_depth, predicate)
+
+    def _iter_connected(self, context, max_depth, predicate):
+        if self in context.excluded_elements:
+            return
+        excluded_types = context.get_excluded_types()
+        # depth of the shortest path found so far for each visited element
+        depths = {self: 0}
+        if not isinstance(self, excluded_types) and (predicate is None or predicate(self)):
+            yield self
+        if max_depth == 0:
+            return
+        # depth-first search yielding the elements in pre-order, as a recursive search would do
+        stack = [(iter(self.get_directly_connected_(context)), 1)]
+        while stack:
+            connected, depth = stack[-1]
+            for c in connected:
+                if c in context.excluded_elements:
+                    continue
+                if c not in depths:
+                    depths[c] = depth
+                    if not isinstance(c, excluded_types) and (predicate is None or predicate(c)):
+                        yield c
+                elif max_depth is not None and depth < depths[c]:
+                    # found a shorter path, connections of the element within max_depth might have been missed
+                    depths[c] = depth
+                else:
+                    continue
+                if c not in context.all_stop_elements and (max_depth is None or depth < max_depth):
+                    stack.append((iter(c.get_directly_connected_(context)), depth + 1))
+                break
+            else:
+                stack.pop()
+
+    def get_directly_connected_(self, context):
+        # the elements directly connected to this element, in the order in which they are searched
+        return list(self.bundles_)
 
 
 class ConnectedElementsContext(object):
     def __init__(self):
-        self.elements = []
         self.add_bundles = False
         self.add_associations = False
         self.add_links = False
@@ -176,7 +224,8 @@ class ConnectedElementsContext(object):
         self.process_stereotypes = False
         self._stop_elements_inclusive = []
         self._stop_elements_exclusive = []
-        self.all_stop_elements = []
+        self.all_stop_elements = set()
+        self.excluded_elements = set()
 
     @property
     def stop_elements_inclusive(self):
@@ -193,7 +242,7 @@ class ConnectedElementsContext(object):
                 raise CException(f"expected one element or a list of stop elements, but got: " +
                                  f"'{stop_elements_inclusive!s}' with element of wrong type: '{e!s}'")
         self._stop_elements_inclusive = stop_elements_inclusive
-        self.all_stop_elements = self._stop_elements_inclusive + self._stop_elements_exclusive
+        self.all_stop_elements = set(self._stop_elements_inclusive + self._stop_elements_exclusive)
 
     @property
     def stop_elements_exclusive(self):
@@ -210,4 +259,22 @@ class ConnectedElementsContext(object):
                 raise CException(f"expected a list of stop elements, but got: '{stop_elements_exclusive!s}'" +
                                  f" with element of wrong type: '{e!s}'")
         self._stop_elements_exclusive = stop_elements_exclusive
-        self.all_stop_elements = self._stop_elements_inclusive + self._stop_elements_exclusive
+        self.all_stop_elements = set(self._stop_elements_inclusive + self._stop_elements_exclusive)
+        self.excluded_elements = set(self._stop_elements_exclusive)
+
+    def get_excluded_types(self):
+        # types of elements that are traversed, but not included in the result
+        from codeable_models.cbundle import CBundle
+        from codeable_models.cstereotype import CStereotype
+        from codeable_models.cassociation import CAssociation
+        from codeable_models.clink import CLink
+        excluded_types = []
+        if not self.add_bundles:
+            excluded_types.append(CBundle)
+        if not self.add_stereotypes:
+            excluded_types.append(CStereotype)
+        if not self.add_associations:
+            excluded_types.append(CAssociation)
+        if not self.add_links:
+            excluded_types.append(CLink)
+        return tuple(excluded_types)
@@ -1,9 +1,17 @@
+import weakref
+
 from codeable_models import CBundlable
 from codeable_models.cexception import CException
 from codeable_models.internal.commons import is_cnamedelement, check_named_element_is_not_deleted
+from codeable_models.internal.lazy_slots import get_element_class
+from codeable_models.internal.name_index import next_sequence_number, build_index, add_to_index, remove_from_index, \
+    get_from_index, get_first_from_index
 
 
 class CBundle(CBundlable):
+    __slots__ = ("elements_", "names_index_", "types_index_", "all_elements_closure_", "all_elements_cache_",
+                 "cached_containing_bundles_")
+
     def __init__(self, name=None, **kwargs):
         """
         ``CBundle`` is used to manage bundles, i.e., groups of modelling elements in Codeable Models.
@@ -30,7 +38,18 @@ class CBundle(CBundlable):
                                     cobject, cclassifier, cclass, cmetaclass, cstereotype, cassociation, clink])
 
         """
-        self.elements_ = []
+        # maps the elements to a sequence number that reflects the order in which they were added
+        self.elements_ = {}
+        # name -> elements and type -> elements indices, built on first use by get_elements/get_element
+        self.names_index_ = None
+        self.types_index_ = None
+        # set of all elements contained directly or in nested bundles, and the list of those elements
+        # as returned by all_elements, both computed on first use
+        self.all_elements_closure_ = None
+        self.all_elements_cache_ = None
+        # weak set of the bundles containing this bundle (directly or via nested bundles) that have computed
+        # those caches, so that changes of this bundle update their caches; created on first use
+        self.cached_containing_bundles_ = None
         super().__init__(name, **kwargs)
 
     def _init_keyword_args(self, legal_keyword_args=None, **kwargs):
@@ -54,7 +73,7 @@ class CBundle(CBundlable):
             if elt in self.elements_:
                 raise CException(f"element '{elt!s}' cannot be added to bundle: element is already in bundle")
             if isinstance(elt, CBundlable):
-                self.elements_.append(elt)
+                self.add_element_(elt)
                 elt.bundles_.append(self)
                 return
         raise CException(f"can't add '{elt!s}': not an element")
@@ -74,7 +93,7 @@ class CBundle(CBundlable):
                 (not isinstance(element, CBundlable)) or
                 (self not in element.bundles)):
             raise CException(f"'{element!s}' is not an element of the bundle")
-        self.elements_.remove(element)
+        self.remove_element_(element)
         element.bundles_.remove(self)
 
     def delete(self):
@@ -90,7 +109,7 @@ class CBundle(CBundlable):
         elements_to_delete = list(self.elements_)
         for e in elements_to_delete:
             e.bundles_.remove(self)
-        self.elements_ = []
+        self.clear_elements_()
         super().delete()
 
     @property
@@ -104,8 +123,8 @@ class CBundle(CBundlable):
         if elements is None:
             elements = []
         for e in self.elements_:
-            e._bundle = None
-        self.elements_ = []
+            e.bundles_.remove(self)
+        self.clear_elements_()
         if is_cnamedelement(elements):
             elements = [elements]
         elif not isinstance(elements, list):
@@ -118,10 +137,118 @@ class CBundle(CBundlable):
             is_cnamedelement(e)
             if e not in self.elements_:
                 # if it is already in the bundle, do not add it twice
-                self.elements_.append(e)
+                self.add_element_(e)
                 # noinspection PyUnresolvedReferences
                 e.bundles_.append(self)
 
+    @property
+    def all_elements(self):
+        """List[CBundlable]: Getter for all elements contained in the bundle, either directly or in a bundle
+        nested in the bundle (recursively). The elements are ordered depth-first, i.e. the elements of a
+        nested bundle follow the nested bundle.
+        """
+        if self.all_elements_cache_ is None:
+            self.all_elements_cache_ = self._compute_all_elements()
+        return list(self.all_elements_cache_)
+
+    def contains(self, element, transitive=False):
+        """
+        Checks whether an element is contained in the bundle.
+
+        Args:
+            element (CBundlable): The element to look for.
+            transitive (bool): If ``True``, elements contained in bundles nested in this bundle (recursively)
+                are considered as well. The set of those elements is computed on first use and then kept up to date
+                when elements are added to the bundles, so that repeated checks take constant time.
+
+        Returns:
+            bool: ``True`` if the element is contained in the bundle, else ``False``.
+
+        """
+        if not transitive:
+            return element in self.elements_
+        return element in self._get_all_elements_closure()
+
+    def _compute_all_elements(self):
+        # depth-first search through the nested bundles, which register this bundle for updates of its caches
+        all_elements = {}
+        stack = [iter(self.elements_)]
+        while stack:
+            for e in stack[-1]:
+                if e not in all_elements:
+                    all_elements[e] = None
+                    if isinstance(e, CBundle):
+                        e._register_cached_containing_bundle(self)
+                        stack.append(iter(e.elements_))
+                    break
+            else:
+                stack.pop()
+        return list(all_elements)
+
+    def _get_all_elements_closure(self):
+        if self.all_elements_closure_ is None:
+            all_elements = self.all_elements_cache_
+            if all_elements is None:
+                all_elements = self._compute_all_elements()
+                self.all_elements_cache_ = all_elements
+            self.all_elements_closure_ = set(all_elements)
+        return self.all_elements_closure_
+
+    def _register_cached_containing_bundle(self, bundle):
+        if bundle is self:
+            return
+        if self.cached_containing_bundles_ is None:
+            self.cached_containing_bundles_ = weakref.WeakSet()
+        self.cached_containing_bundles_.add(bundle)
+
+    def _get_cached_containing_bundles(self):
+        # this bundle and the registered bundles containing it, if they have cached elements; registrations of
+        # bundles that dropped their caches or no longer contain this bundle are removed
+        cached_bundles = []
+        if self.all_elements_cache_ is not None or self.all_elements_closure_ is not None:
+            cached_bundles.append(self)
+        if self.cached_containing_bundles_:
+            for b in list(self.cached_containing_bundles_):
+                if b.all_elements_closure_ is not None:
+                    is_cached = self in b.all_elements_closure_
+                else:
+                    # without closure, it cannot be checked cheaply whether b still contains this bundle;
+                    # at worst b's list of elements is recomputed unnecessarily
+                    is_cached = b.all_elements_cache_ is not None
+                if is_cached:
+                    cached_bundles.append(b)
+                else:
+                    self.cached_containing_bundles_.discard(b)
+        return cached_bundles
+
+    def _update_all_elements_caches(self, added_element=None):
+        cached_bundles = self._get_cached_containing_bundles()
+        if not cached_bundles:
+            return
+        closure_bundles = [b for b in cached_bundles if b.all_elements_closure_ is not None]
+        for b in cached_bundles:
+            # the ordered lists are recomputed on next use
+            b.all_elements_cache_ = None
+        if added_element is None or not closure_bundles:
+            # elements were removed, or no closure is cached: recompute the closures on next use
+            for b in closure_bundles:
+                b.all_elements_closure_ = None
+            return
+        added_elements = [added_element]
+        if isinstance(added_element, CBundle):
+            added_closure = added_element._get_all_elements_closure()
+            if added_element is self or self in added_closure:
+                # a cycle of bundles was created: recompute the closures on next use
+                for b in closure_bundles:
+                    b.all_elements_closure_ = None
+                return
+            added_elements.extend(added_closure)
+        added_bundles = [e for e in added_elements if isinstance(e, CBundle)]
+        for b in closure_bundles:
+            b.all_elements_closure_.update(added_elements)
+            for added_bundle in added_bundles:
+                added_bundle._register_cached_containing_bundle(b)
+
     def get_elements(self, **kwargs):
         """
         Get specific elements from the bundle. Per default returns all elements.
@@ -137,29 +264,16 @@ class CBundle(CBundlable):
             List[CBundlable]: List of elements.
 
         """
-        type_ = None
-        name = None
-        # use this as name can also be provided as None
-        name_specified = False
-        for key in kwargs:
-            if key == "type":
-                type_ = kwargs["type"]
-            elif key == "name":
-                name = kwargs["name"]
-                name_specified = True
-            else:
-                raise CException(f"unknown argument to getElements: '{key!s}'")
-        elements = []
-        for elt in self.elements_:
-            append = True
-            if name_specified and elt.name != name:
-                append = False
-            # noinspection PyTypeHints
-            if type_ is not None and not isinstance(elt, type_):
-                append = False
-            if append:
-                elements.append(elt)
-        return elements
+        name_specified, name, type_ = self._get_elements_filter(kwargs)
+        if name_specified:
+            elements = self._get_elements_with_name(name)
+            if type_ is not None:
+                # noinspection PyTypeHints
+                elements = [elt for elt in elements if isinstance(elt, type_)]
+            return elements
+        if type_ is not None:
+            return self._get_elements_of_type(type_)
+        return list(self.elements_)
 
     def get_element(self, **kwargs):
         """
@@ -174,21 +288,90 @@ class CBundle(CBundlable):
               CBundlable: The element of the bundle.
 
           """
-        elements = self.get_elements(**kwargs)
-        return None if len(elements) == 0 else elements[0]
-
-    def compute_connected_(self, context):
-        super().compute_connected_(context)
-        if not context.process_bundles:
-            return
-        connected = []
-        for element in self.elements_:
-            if element not in context.stop_elements_exclusive:
-                connected.append(element)
-        self.append_connected_(context, connected)
+        name_specified, name, type_ = self._get_elements_filter(kwargs)
+        if name_specified:
+            self._check_indices()
+            if type_ is None:
+                return get_first_from_index(self.names_index_, name, self.elements_)
+            # noinspection PyTypeHints
+            elements = [elt for elt in self.names_index_.get(name, ()) if isinstance(elt, type_)]
+            return min(elements, key=self.elements_.get, default=None)
+        if type_ is not None:
+            # the first element of each type in the index is the first element added of that type
+            first_elements = [next(iter(elements)) for elements in self._get_matching_type_buckets(type_)]
+            return min(first_elements, key=self.elements_.get, default=None)
+        return next(iter(self.elements_), None)
+
+    @staticmethod
+    def _get_elements_filter(kwargs):
+        type_ = None
+        name = None
+        # use this as name can also be provided as None
+        name_specified = False
+        for key in kwargs:
+            if key == "type":
+                type_ = kwargs["type"]
+            elif key == "name":
+                name = kwargs["name"]
+                name_specified = True
+            else:
+                raise CException(f"unknown argument to getElements: '{key!s}'")
+        return name_specified, name, type_
+
+    def _check_indices(self):
+        if self.names_index_ is None:
+            self.names_index_ = build_index(self.elements_, lambda elt: elt.name)
+            self.types_index_ = build_index(self.elements_, get_element_class)
+
+    def _get_elements_with_name(self, name):
+        self._check_indices()
+        return get_from_index(self.names_index_, name, self.elements_)
+
+    def _get_matching_type_buckets(self, type_):
+        self._check_indices()
+        return [elements for element_type, elements in self.types_index_.items() if issubclass(element_type, type_)]
+
+    def _get_elements_of_type(self, type_):
+        buckets = self._get_matching_type_buckets(type_)
+        if len(buckets) == 1:
+            return list(buckets[0])
+        return sorted([elt for elements in buckets for elt in elements], key=self.elements_.get)
+
+    def add_element_(self, element):
+        self.elements_[element] = next_sequence_number()
+        if self.names_index_ is not None:
+            add_to_index(self.names_index_, element.name, element)
+            add_to_index(self.types_index_, get_element_class(element), element)
+        self._update_all_elements_caches(element)
+
+    def remove_element_(self, element):
+        del self.elements_[element]
+        if self.names_index_ is not None:
+            remove_from_index(self.names_index_, element.name, element)
+            remove_from_index(self.types_index_, get_element_class(element), element)
+        self._update_all_elements_caches()
+
+    def clear_elements_(self):
+        self.elements_ = {}
+        self.names_index_ = None
+        self.types_index_ = None
+        self._update_all_elements_caches()
+
+    def rename_element_(self, element, old_name):
+        if self.names_index_ is not None:
+            remove_from_index(self.names_index_, old_name, element)
+            add_to_index(self.names_index_, element.name, element)
+
+    def get_directly_connected_(self, context):
+        connected = super().get_directly_connected_(context)
+        if context.process_bundles:
+            connected.extend(self.elements_)
+        return connected
 
 
 class CPackage(CBundle):
+    __slots__ = ()
+
     def __init__(self, name=None, **kwargs):
         """
         Simple class to designate bundles as packages.
@@ -199,6 +382,8 @@ class CPackage(CBundle):
 
 
 class CLayer(CBundle):
+    __slots__ = ("_sub_layer", "_super_layer")
+
     def __init__(self, name=None, **kwargs):
         """
         Simple class to designate bundles as layers, and manage sub-/super-layer relations.
@@ -3,12 +3,17 @@ from codeable_models.cexception import CException
 from codeable_models.cobject import CObject
 from codeable_models.internal.commons import check_is_cmetaclass, check_is_cobject, \
     check_named_element_is_not_deleted
+from codeable_models.internal.name_index import next_sequence_number, build_index, add_to_index, remove_from_index, \
+    get_from_index, get_first_from_index
 from codeable_models.internal.stereotype_holders import CStereotypeInstancesHolder
 from codeable_models.internal.var_values import delete_var_value, set_var_value, get_var_value, get_var_values, \
     set_var_values, VarValueKind
 
 
 class CClass(CClassifier):
+    __slots__ = ("metaclass_", "objects_", "objects_names_index_", "compact_values_", "class_object_",
+                 "stereotype_instances_holder", "tagged_values_")
+
     def __init__(self, metaclass, name=None, **kwargs):
         """``CClass`` is used to define classes. Classes in Codeable Models are instances of metaclasses (defined
         using :py:class:`.CMetaclass`).
@@ -20,7 +25,7 @@ class CClass(CClassifier):
                 defined using :py:class:`.CMetaclass`.
            name (str): An optional name.
            **kwargs: Pass in any kwargs acceptable to superclasses. In addition, ``CClass`` accepts:
-                ``stereotype_instances``, ``values``, ``tagged_values``.
+                ``stereotype_instances``, ``values``, ``tagged_values``, ``compact_values``.
 
                 - ``stereotype_instances``:
                     Any :py:class:`.CStereotype` extending the meta-class of this class can be defined on the class
@@ -39,6 +44,9 @@ class CClass(CClassifier):
                     The keyword arg ``tagged_values`` can be used to set them just like ordinary attribute values.
                     ``tagged_values`` accepts a dict of key/value pairs.
                     The value types must conform to the types defined for the attributes.
+                - ``compact_values``:
+                    Set to ``True`` to store the attribute values of the instances of this class
+                    in compact form. See the ``compact_values`` property.
 
         **Examples:**
 
@@ -69,9 +77,15 @@ class CClass(CClassifier):
         Each class can have stereotype instances of the stereotypes
         defined on its meta-class.
         """
+        # the name is needed by the classes index of the meta-class, set it before adding the class
+        self.name_ = name
         self.metaclass_ = None
         self.metaclass = metaclass
-        self.objects_ = []
+        # maps the instances to a sequence number that reflects the order in which they were added
+        self.objects_ = {}
+        # name -> instances index, built on first use by get_objects/get_object
+        self.objects_names_index_ = None
+        self.compact_values_ = False
         self.class_object_ = CObject(self.metaclass, name, class_object_class_=self)
         self.stereotype_instances_holder = CStereotypeInstancesHolder(self)
         self.tagged_values_ = {}
@@ -84,6 +98,7 @@ class CClass(CClassifier):
         legal_keyword_args.append("stereotype_instances")
         legal_keyword_args.append("values")
         legal_keyword_args.append("tagged_values")
+        legal_keyword_args.append("compact_values")
         super()._init_keyword_args(legal_keyword_args, **kwargs)
 
     @property
@@ -121,16 +136,55 @@ class CClass(CClassifier):
                 all_objects.append(cl)
         return all_objects
 
+    @property
+    def compact_values(self):
+        """bool: Getter and setter for the storage mode of the attribute values of the instances of this class.
+
+        Per default, each object stores its attribute values in a dict of dicts, keyed by the classifier
+        defining the attribute and the attribute name. If ``compact_values`` is ``True``, the objects store their
+        values instead in a flat list, using a fixed attribute layout computed for the class path of this
+        class. This considerably reduces the memory needed for large numbers of objects. The values of the
+        objects are accessed in exactly the same way in both storage modes.
+
+        Changing the setting converts the attribute values of the existing instances of this class.
+        """
+        return self.compact_values_
+
+    @compact_values.setter
+    def compact_values(self, compact_values):
+        self.compact_values_ = bool(compact_values)
+        for obj in self.objects_:
+            obj.update_attribute_values_storage_()
+
     def add_object_(self, obj):
         if obj in self.objects_:
             raise CException(f"object '{obj!s}' is already an instance of the class '{self!s}'")
         check_is_cobject(obj)
-        self.objects_.append(obj)
+        self.objects_[obj] = next_sequence_number()
+        if self.objects_names_index_ is not None:
+            add_to_index(self.objects_names_index_, obj.name, obj)
 
     def remove_object_(self, obj):
         if obj not in self.objects_:
             raise CException(f"can't remove object '{obj!s}'' from class '{self!s}': not an instance")
-        self.objects_.remove(obj)
+        del self.objects_[obj]
+        if self.objects_names_index_ is not None:
+            remove_from_index(self.objects_names_index_, obj.name, obj)
+
+    def rename_instance_(self, instance, old_name):
+        if self.objects_names_index_ is not None:
+            remove_from_index(self.objects_names_index_, old_name, instance)
+            add_to_index(self.objects_names_index_, instance.name, instance)
+
+    def rename_(self, old_name):
+        super().rename_(old_name)
+        if self.metaclass_ is not None:
+            self.metaclass_.rename_instance_(self, old_name)
+
+    def _get_objects_names_index(self):
+        if self.objects_names_index_ is None:
+            self.objects_names_index_ = build_index(self.objects_, lambda obj: obj.name)
+        return self.objects_names_index_
 
     def delete(self):
         """
@@ -148,10 +202,11 @@ class CClass(CClassifier):
         objects_to_delete = list(self.objects_)
         for obj in objects_to_delete:
             obj.delete()
-        self.objects_ = []
+        self.objects_ = {}
+        self.objects_names_index_ = None
 
         for si in self.stereotype_instances:
-            si.extended_instances_.remove(self)
+            del si.extended_instances_[self]
         self.stereotype_instances_holder.stereotypes_ = []
 
         self.metaclass.remove_class(self)
@@ -246,7 +301,7 @@ class CClass(CClassifier):
 
     def get_objects(self, name):
         """
-        Returns all objects with a given name with are instances of this classifier.
+        Returns all objects with a given name that are instances of this class.
 
         Args:
             name: The object name to search for
@@ -255,7 +310,24 @@ class CClass(CClassifier):
             list[CObject]: The objects with the given name.
 
         """
-        return list(o for o in self.objects if o.name == name)
+        return get_from_index(self._get_objects_names_index(), name, self.objects_)
+
+    def get_all_objects(self, name):
+        """
+        Returns all objects with a given name that are instances of this class or any of its sub-classes.
+        The objects are returned in the same order as in ``all_objects``.
+
+        Args:
+            name: The object name to search for
+
+        Returns:
+            list[CObject]: The objects with the given name.
+
+        """
+        all_objects = self.get_objects(name)
+        for scl in self.all_subclasses:
+            all_objects.extend(scl.get_objects(name))
+        return all_objects
 
     def get_object(self, name):
         """
@@ -269,8 +341,7 @@ class CClass(CClassifier):
             CObject: An object with the given name or None.
 
         """
-        objects = self.get_objects(name)
-        return None if len(objects) == 0 else objects[0]
+        return get_first_from_index(self._get_objects_names_index(), name, self.objects_)
 
     @property
     def stereotype_instances(self):
@@ -296,12 +367,12 @@ class CClass(CClassifier):
         # been set. Then the stereotype defaults will not overwrite existing values (you need to
         # delete them explicitly in order for them to be replaced by stereotype defaults)
         existing_attribute_names = []
-        for mcl in self.metaclass.class_path:
+        for mcl in self.metaclass.get_class_path_():
             for attrName in mcl.attribute_names:
                 if attrName not in existing_attribute_names:
                     existing_attribute_names.append(attrName)
         for stereotypeInstance in self.stereotype_instances:
-            for st in stereotypeInstance.class_path:
+            for st in stereotypeInstance.get_class_path_():
                 for name in st.default_values:
                     if name in existing_attribute_names:
                         if self.get_value(name) is None:
@@ -321,7 +392,7 @@ class CClass(CClassifier):
         """
         if self.is_deleted:
             raise CException(f"can't get tagged value '{name!s}' on deleted class")
-        return get_var_value(self, self.stereotype_instances_holder.get_stereotype_instance_path(), self.tagged_values_,
+        return get_var_value(self, self.stereotype_instances_holder.stereotypes_, self.tagged_values_,
                              name, VarValueKind.TAGGED_VALUE, stereotype)
 
     def delete_tagged_value(self, name, stereotype=None):
@@ -338,7 +409,7 @@ class CClass(CClassifier):
         """
         if self.is_deleted:
             raise CException(f"can't delete tagged value '{name!s}' on deleted class")
-        return delete_var_value(self, self.stereotype_instances_holder.get_stereotype_instance_path(),
+        return delete_var_value(self, self.stereotype_instances_holder.stereotypes_,
                                 self.tagged_values_,
                                 name, VarValueKind.TAGGED_VALUE, stereotype)
 
@@ -357,7 +428,7 @@ class CClass(CClassifier):
         """
         if self.is_deleted:
             raise CException(f"can't set tagged value '{name!s}' on deleted class")
-        return set_var_value(self, self.stereotype_instances_holder.get_stereotype_instance_path(), self.tagged_values_,
+        return set_var_value(self, self.stereotype_instances_holder.stereotypes_, self.tagged_values_,
                              name, value, VarValueKind.TAGGED_VALUE, stereotype)
 
     @property
@@ -368,7 +439,7 @@ class CClass(CClassifier):
         """
         if self.is_deleted:
             raise CException(f"can't get tagged values on deleted class")
-        return get_var_values(self.stereotype_instances_holder.get_stereotype_instance_path(), self.tagged_values_)
+        return get_var_values(self.stereotype_instances_holder.stereotypes_, self.tagged_values_)
 
     @tagged_values.setter
     def tagged_values(self, new_values):
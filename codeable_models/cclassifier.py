@@ -2,9 +2,17 @@ from codeable_models.cattribute import CAttribute
 from codeable_models.cbundlable import CBundlable
 from codeable_models.cenum import CEnum
 from codeable_models.internal.commons import *
+from codeable_models.internal.lazy_slots import get_element_class
+from codeable_models.internal.model_epochs import get_hierarchy_epoch, advance_hierarchy_epoch, \
+    get_attributes_epoch, advance_attributes_epoch
 
 
 class CClassifier(CBundlable):
+    __slots__ = ("superclasses_", "subclasses_", "attributes_", "associations_", "hierarchy_cache_epoch_",
+                 "class_path_cache_", "all_superclasses_cache_", "all_subclasses_cache_",
+                 "attribute_cache_hierarchy_epoch_", "attribute_cache_attributes_epoch_", "attribute_index_",
+                 "attribute_layout_", "attribute_layout_is_valid_")
+
     def __init__(self, name=None, **kwargs):
         """``CClassifier`` is superclass of classifiers such as :py:class:`.CClass` and :py:class:`.CMetaclass`
         defining common features for
@@ -54,6 +62,18 @@ class CClassifier(CBundlable):
         self.subclasses_ = []
         self.attributes_ = {}
         self.associations_ = []
+        # caches of the inheritance hierarchy, valid as long as the hierarchy epoch has not advanced
+        self.hierarchy_cache_epoch_ = None
+        self.class_path_cache_ = None
+        self.all_superclasses_cache_ = None
+        self.all_subclasses_cache_ = None
+        # caches of the attributes on the class path, valid as long as neither the hierarchy epoch
+        # nor the attributes epoch have advanced
+        self.attribute_cache_hierarchy_epoch_ = None
+        self.attribute_cache_attributes_epoch_ = None
+        self.attribute_index_ = None
+        self.attribute_layout_ = {}
+        self.attribute_layout_is_valid_ = False
         super().__init__(name, **kwargs)
 
     def _init_keyword_args(self, legal_keyword_args=None, **kwargs):
@@ -132,11 +152,14 @@ class CClassifier(CBundlable):
         if attribute_descriptions is None:
             attribute_descriptions = {}
         self._remove_attribute_values_of_classifier(attribute_descriptions.keys())
-        self.attributes_ = {}
-        if not isinstance(attribute_descriptions, dict):
-            raise CException(f"malformed attribute description: '{attribute_descriptions!s}'")
-        for attributeName in attribute_descriptions:
-            self._set_attribute(attributeName, attribute_descriptions[attributeName])
+        try:
+            self.attributes_ = {}
+            if not isinstance(attribute_descriptions, dict):
+                raise CException(f"malformed attribute description: '{attribute_descriptions!s}'")
+            for attributeName in attribute_descriptions:
+                self._set_attribute(attributeName, attribute_descriptions[attributeName])
+        finally:
+            advance_attributes_epoch()
         self.update_default_values_of_classifier_()
 
     @property
@@ -163,6 +186,44 @@ class CClassifier(CBundlable):
         except KeyError:
             return None
 
+    def check_attribute_caches_(self):
+        hierarchy_epoch = get_hierarchy_epoch()
+        attributes_epoch = get_attributes_epoch()
+        if (self.attribute_cache_hierarchy_epoch_ != hierarchy_epoch or
+                self.attribute_cache_attributes_epoch_ != attributes_epoch):
+            self.attribute_cache_hierarchy_epoch_ = hierarchy_epoch
+            self.attribute_cache_attributes_epoch_ = attributes_epoch
+            self.attribute_index_ = None
+            self.attribute_layout_is_valid_ = False
+
+    def get_attribute_on_class_path_(self, attribute_name):
+        # returns the attribute with the given name that is found first on the class path, or None
+        self.check_attribute_caches_()
+        if self.attribute_index_ is None:
+            index = {}
+            for cl in self.get_class_path_():
+                for name, attribute in cl.attributes_.items():
+                    if name not in index:
+                        index[name] = attribute
+            self.attribute_index_ = index
+        if not isinstance(attribute_name, str):
+            return None
+        return self.attribute_index_.get(attribute_name)
+
+    def get_attribute_layout_(self):
+        # maps each (classifier, attribute name) pair on the class path to a slot index, used for
+        # compact attribute values; an unchanged layout is kept, so that objects don't need to migrate their slots
+        self.check_attribute_caches_()
+        if not self.attribute_layout_is_valid_:
+            layout = {}
+            for cl in self.get_class_path_():
+                for name in cl.attributes_:
+                    layout[(cl, name)] = len(layout)
+            if layout != self.attribute_layout_:
+                self.attribute_layout_ = layout
+            self.attribute_layout_is_valid_ = True
+        return self.attribute_layout_
+
     def _remove_attribute_values_of_classifier(self, attributes_to_keep):
         raise CException("should be overridden by subclasses to update defaults on instances")
 
@@ -170,7 +231,7 @@ class CClassifier(CBundlable):
         raise CException("should be overridden by subclasses to update defaults on instances")
 
     def _check_same_type_as_self(self, cl):
-        return isinstance(cl, self.__class__)
+        return isinstance(cl, get_element_class(self))
 
     @property
     def subclasses(self):
@@ -187,15 +248,24 @@ class CClassifier(CBundlable):
     def superclasses(self, elements):
         if elements is None:
             elements = []
+        if is_cclassifier(elements):
+            elements = [elements]
+        if elements == [] and len(self.superclasses_) == 0:
+            # nothing changes in the hierarchy, keep the hierarchy caches valid
+            return
+        try:
+            self._set_superclasses(elements)
+        finally:
+            advance_hierarchy_epoch()
+
+    def _set_superclasses(self, elements):
         for sc in self.superclasses_:
             sc.subclasses_.remove(self)
         self.superclasses_ = []
-        if is_cclassifier(elements):
-            elements = [elements]
         for scl in elements:
             if scl is not None:
                 check_named_element_is_not_deleted(scl)
-            if not isinstance(scl, self.__class__):
+            if not isinstance(scl, get_element_class(self)):
                 if is_cassociation(self):
                     if self.is_metaclass_association_():
                         if not is_cmetaclass(scl) or (is_cassociation(scl) and scl.is_metaclass_association_()):
@@ -206,21 +276,30 @@ class CClassifier(CBundlable):
                             raise CException(f"cannot add superclass '{scl!s}':" +
                                              " not a class or class association")
                 else:
-                    raise CException(f"cannot add superclass '{scl!s}' to '{self!s}': not of type {self.__class__!s}")
+                    raise CException(f"cannot add superclass '{scl!s}' to '{self!s}': " +
+                                     f"not of type {get_element_class(self)!s}")
             if scl in self.superclasses_:
                 raise CException(f"'{scl.name!s}' is already a superclass of '{self.name!s}'")
             self.superclasses_.append(scl)
             scl.subclasses_.append(self)
 
+    def check_hierarchy_caches_(self):
+        epoch = get_hierarchy_epoch()
+        if self.hierarchy_cache_epoch_ != epoch:
+            self.hierarchy_cache_epoch_ = epoch
+            self.class_path_cache_ = None
+            self.all_superclasses_cache_ = None
+            self.all_subclasses_cache_ = None
+
     @property
     def all_superclasses(self):
-        """list[CClassifier]: Getter that returns all superclasses of this classifier
+        """frozenset[CClassifier]: Getter that returns all superclasses of this classifier
         on the inheritance hierarchy."""
         return self.get_all_superclasses_()
 
     @property
     def all_subclasses(self):
-        """list[CClassifier]: Getter that returns all subclasses of this classifier
+        """frozenset[CClassifier]: Getter that returns all subclasses of this classifier
         on the inheritance hierarchy."""
         return self.get_all_subclasses_()
 
@@ -234,33 +313,32 @@ class CClassifier(CBundlable):
             bool: Boolean result of the check.
 
         """
-        type_classifiers = classifier.all_subclasses
-        type_classifiers.add(classifier)
-        if self in type_classifiers:
+        if self == classifier:
             return True
-        return False
+        return self in classifier.get_all_subclasses_()
 
-    def get_all_superclasses_(self, iterated_classes=None):
-        if iterated_classes is None:
-            iterated_classes = set()
-        result = set()
-        for sc in self.superclasses:
-            if sc not in iterated_classes:
-                iterated_classes.add(sc)
-                result.add(sc)
-                result.update(sc.get_all_superclasses_(iterated_classes))
-        return result
-
-    def get_all_subclasses_(self, iterated_classes=None):
-        if iterated_classes is None:
-            iterated_classes = set()
+    @staticmethod
+    def _collect_hierarchy(classifier, get_next_classifiers):
         result = set()
-        for sc in self.subclasses:
-            if sc not in iterated_classes:
-                iterated_classes.add(sc)
-                result.add(sc)
-                result.update(sc.get_all_subclasses_(iterated_classes))
-        return result
+        unprocessed = list(get_next_classifiers(classifier))
+        while unprocessed:
+            cl = unprocessed.pop()
+            if cl not in result:
+                result.add(cl)
+                unprocessed.extend(get_next_classifiers(cl))
+        return frozenset(result)
+
+    def get_all_superclasses_(self):
+        self.check_hierarchy_caches_()
+        if self.all_superclasses_cache_ is None:
+            self.all_superclasses_cache_ = self._collect_hierarchy(self, lambda cl: cl.superclasses_)
+        return self.all_superclasses_cache_
+
+    def get_all_subclasses_(self):
+        self.check_hierarchy_caches_()
+        if self.all_subclasses_cache_ is None:
+            self.all_subclasses_cache_ = self._collect_hierarchy(self, lambda cl: cl.subclasses_)
+        return self.all_subclasses_cache_
 
     def has_subclass(self, classifier):
         """Returns ``True`` if ``classifier`` is subclass of this classifier, else ``False``.
@@ -287,14 +365,20 @@ class CClassifier(CBundlable):
         return classifier in self.get_all_superclasses_()
 
     def delete(self):
-        """Deletes the classifier, removes superclasses, removes it from subclasses,
-        removes all associations and attributes, and removes the classifier from bundles.
+        """Deletes the classifier, removes all associations, removes superclasses, removes it from subclasses,
+        removes all attributes, and removes the classifier from bundles.
         Calls ``delete()`` on superclass.
         """
         if self.is_deleted:
             return
         super().delete()
 
+        # remove all associations, before the subclasses are detached, so that the links of
+        # instances of subclasses are deleted, too
+        associations = self.associations.copy()
+        for association in associations:
+            association.delete()
+
         # self.superclasses removes the self subclass from the superclasses
         self.superclasses = []
 
@@ -304,16 +388,13 @@ class CClassifier(CBundlable):
                 raise CException(f"can't remove superclass '{self!s}' from classifier '{subclass!s}': not a superclass")
             subclass.superclasses_.remove(self)
         self.subclasses_ = []
-
-        # remove all associations
-        associations = self.associations.copy()
-        for association in associations:
-            association.delete()
+        advance_hierarchy_epoch()
 
         for a in self.attributes:
             a.name_ = None
             a.classifier_ = None
         self.attributes_ = {}
+        advance_attributes_epoch()
 
     @property
     def associations(self):
@@ -350,26 +431,32 @@ class CClassifier(CBundlable):
         from codeable_models.cassociation import CAssociation
         return CAssociation(self, target, descriptor, **kwargs)
 
-    def compute_connected_(self, context):
-        super().compute_connected_(context)
-        connected_candidates = []
-        connected = []
-        for association in self.associations:
-            connected_candidates.append(association.get_opposite_classifier(self))
-        connected_candidates = self.superclasses + self.subclasses + connected_candidates
-        for c in connected_candidates:
-            if c not in context.stop_elements_exclusive:
-                connected.append(c)
-        self.append_connected_(context, connected)
+    def rename_instance_(self, instance, old_name):
+        # called after an instance of this classifier has been renamed, overridden by classifiers indexing
+        # their instances by name
+        pass
+
+    def get_directly_connected_(self, context):
+        connected = super().get_directly_connected_(context)
+        connected.extend(self.superclasses_)
+        connected.extend(self.subclasses_)
+        for association in self.associations_:
+            connected.append(association.get_opposite_classifier(self))
+        return connected
 
     # get class path starting from this classifier, including this classifier
     def get_class_path_(self):
-        class_path = [self]
-        for sc in self.superclasses:
-            for cl in sc.get_class_path_():
-                if cl not in class_path:
-                    class_path.append(cl)
-        return class_path
+        self.check_hierarchy_caches_()
+        if self.class_path_cache_ is None:
+            class_path = [self]
+            classes_on_path = {self}
+            for sc in self.superclasses_:
+                for cl in sc.get_class_path_():
+                    if cl not in classes_on_path:
+                        classes_on_path.add(cl)
+                        class_path.append(cl)
+            self.class_path_cache_ = tuple(class_path)
+        return self.class_path_cache_
 
     @property
     def class_path(self):
@@ -381,4 +468,4 @@ class CClassifier(CBundlable):
 
         This getter returns all superclasses in the order of the class path.
         """
-        return self.get_class_path_()
+        return list(self.get_class_path_())
@@ -3,6 +3,8 @@ from codeable_models.cexception import CException
 
 
 class CEnum(CBundlable):
+    __slots__ = ("values_",)
+
     def __init__(self, name=None, **kwargs):
         """``CEnum`` is used for defining enumerations.
 
@@ -1,11 +1,14 @@
 from codeable_models.cobject import CObject
 from codeable_models.internal.commons import *
+from codeable_models.internal.model_epochs import get_hierarchy_epoch, get_associations_epoch
 from codeable_models.internal.stereotype_holders import CStereotypeInstancesHolder
 from codeable_models.internal.var_values import delete_var_value, set_var_value, get_var_value, get_var_values, \
     set_var_values, VarValueKind
 
 
 class CLink(CObject):
+    __slots__ = ("source_", "target_", "label", "association", "stereotype_instances_holder", "tagged_values_")
+
     def __init__(self, association, source_object, target_object, **kwargs):
         """``CLink`` is used to define object links.
         Objects can be linked if their respective classes have an association.
@@ -160,12 +163,16 @@ class CLink(CObject):
         """
         if self.is_deleted:
             return
+        if self.source_ != self.target_:
+            self.target_.remove_link_(self)
+        self.source_.remove_link_(self)
+        self.delete_detached_()
+
+    def delete_detached_(self):
+        # deletes a link that has already been removed from the links of its source and target
         for si in self.stereotype_instances:
-            si.extended_instances_.remove(self)
+            del si.extended_instances_[self]
         self.stereotype_instances_holder.stereotypes_ = []
-        if self.source_ != self.target_:
-            self.target_.links_.remove(self)
-        self.source_.links_.remove(self)
         super().delete()
         self.is_deleted = True
 
@@ -198,7 +205,7 @@ class CLink(CObject):
         """
         if self.is_deleted:
             raise CException(f"can't get tagged value '{name!s}' on deleted link")
-        return get_var_value(self, self.stereotype_instances_holder.get_stereotype_instance_path(), self.tagged_values_,
+        return get_var_value(self, self.stereotype_instances_holder.stereotypes_, self.tagged_values_,
                              name, VarValueKind.TAGGED_VALUE, stereotype)
 
     def delete_tagged_value(self, name, stereotype=None):
@@ -215,7 +222,7 @@ class CLink(CObject):
         """
         if self.is_deleted:
             raise CException(f"can't delete tagged value '{name!s}' on deleted link")
-        return delete_var_value(self, self.stereotype_instances_holder.get_stereotype_instance_path(),
+        return delete_var_value(self, self.stereotype_instances_holder.stereotypes_,
                                 self.tagged_values_, name, VarValueKind.TAGGED_VALUE, stereotype)
 
     def set_tagged_value(self, name, value, stereotype=None):
@@ -233,7 +240,7 @@ class CLink(CObject):
         """
         if self.is_deleted:
             raise CException(f"can't set tagged value '{name!s}' on deleted link")
-        return set_var_value(self, self.stereotype_instances_holder.get_stereotype_instance_path(), self.tagged_values_,
+        return set_var_value(self, self.stereotype_instances_holder.stereotypes_, self.tagged_values_,
                              name, value, VarValueKind.TAGGED_VALUE, stereotype)
 
     @property
@@ -244,7 +251,7 @@ class CLink(CObject):
         """
         if self.is_deleted:
             raise CException(f"can't get tagged values on deleted link")
-        return get_var_values(self.stereotype_instances_holder.get_stereotype_instance_path(), self.tagged_values_)
+        return get_var_values(self.stereotype_instances_holder.stereotypes_, self.tagged_values_)
 
     @tagged_values.setter
     def tagged_values(self, new_values):
@@ -317,24 +324,31 @@ def _check_link_definition_and_replace_classes(link_definitions):
     return new_definitions
 
 
-def _determine_matching_association_and_set_context_info(context, source, targets):
+# cache of the results of the association matching, valid as long as neither the hierarchy epoch
+# nor the associations epoch have advanced
+_association_matching_cache = {}
+_association_matching_cache_epochs = None
+_ASSOCIATION_MATCHING_CACHE_SIZE = 4096
+
+
+def _match_association(context, source, targets):
     if source.class_object_class is not None:
         target_classifier_candidates = get_common_metaclasses(
             [co.class_object_class if not is_clink(co) else co for co in targets])
-        context.sourceClassifier = source.class_object_class.metaclass
+        source_classifier = source.class_object_class.metaclass
     else:
         target_classifier_candidates = [get_common_classifier(targets)]
-        context.sourceClassifier = source.classifier
+        source_classifier = source.classifier
 
     if context.association is not None and context.target_classifier is None:
-        if context.sourceClassifier.is_classifier_of_type(context.association.source):
+        if source_classifier.is_classifier_of_type(context.association.source):
             target_classifier_candidates = [context.association.target]
-            context.sourceClassifier = context.association.source
-        elif context.sourceClassifier.is_classifier_of_type(context.association.target):
+            source_classifier = context.association.source
+        elif source_classifier.is_classifier_of_type(context.association.target):
             target_classifier_candidates = [context.association.source]
-            context.sourceClassifier = context.association.target
+            source_classifier = context.association.target
 
-    associations = context.sourceClassifier.all_associations
+    associations = source_classifier.all_associations
     if context.association is not None:
         associations = [context.association]
     matches_association_order = []
@@ -344,22 +358,18 @@ def _determine_matching_association_and_set_context_info(context, source, target
     for association in associations:
         for target_classifierCandidate in target_classifier_candidates:
             if (association.matches_target_(target_classifierCandidate, context.role_name) and
-                    association.matches_source_(context.sourceClassifier, None)):
+                    association.matches_source_(source_classifier, None)):
                 matches_association_order.append(association)
                 matching_classifier = target_classifierCandidate
             elif (association.matches_source_(target_classifierCandidate, context.role_name) and
-                  association.matches_target_(context.sourceClassifier, None)):
+                  association.matches_target_(source_classifier, None)):
                 matches_reverse_association_order.append(association)
                 matching_classifier = target_classifierCandidate
     matches = len(matches_association_order) + len(matches_reverse_association_order)
     if matches == 1:
         if len(matches_association_order) == 1:
-            context.association = matches_association_order[0]
-            context.matchesInOrder[source] = True
-        else:
-            context.association = matches_reverse_association_order[0]
-            context.matchesInOrder[source] = False
-        context.target_classifier = matching_classifier
+            return source_classifier, matches_association_order[0], True, matching_classifier
+        return source_classifier, matches_reverse_association_order[0], False, matching_classifier
     elif matches == 0:
         raise CException(f"matching association not found for source '{source!s}' " +
                          f"and targets '{[str(item) for item in targets]!s}'")
@@ -369,6 +379,24 @@ def _determine_matching_association_and_set_context_info(context, source, target
             f"and targets '{[str(item) for item in targets]!s}'")
 
 
+def _determine_matching_association_and_set_context_info(context, source, targets):
+    global _association_matching_cache_epochs
+    epochs = (get_hierarchy_epoch(), get_associations_epoch())
+    if (_association_matching_cache_epochs != epochs or
+            len(_association_matching_cache) >= _ASSOCIATION_MATCHING_CACHE_SIZE):
+        _association_matching_cache.clear()
+        _association_matching_cache_epochs = epochs
+
+    # the match only depends on the classifiers of source and targets, not on the objects themselves
+    key = (source.classifier_, tuple(dict.fromkeys(t.classifier_ for t in targets)), context.role_name,
+           context.association, context.target_classifier)
+    result = _association_matching_cache.get(key)
+    if result is None:
+        result = _match_association(context, source, targets)
+        _association_matching_cache[key] = result
+    context.sourceClassifier, context.association, context.matchesInOrder[source], context.target_classifier = result
+
+
 def link_objects_(context, source, targets):
     new_links = []
     source_obj = source
@@ -384,22 +412,20 @@ def link_objects_(context, source, targets):
         if not context.matchesInOrder[source_obj]:
             source_for_link = target
             target_for_link = source_obj
-        for existingLink in source_obj.links_:
-            if (existingLink.source_ == source_for_link and existingLink.target_ == target_for_link
-                    and existingLink.association == context.association):
-                for link in new_links:
-                    link.delete()
-                raise CException(
-                    f"trying to link the same link twice '{source!s} -> {target!s}'' twice for the same association")
+        if source_obj.has_link_(source_for_link, target_for_link, context.association):
+            for link in new_links:
+                link.delete()
+            raise CException(
+                f"trying to link the same link twice '{source!s} -> {target!s}'' twice for the same association")
         link = CLink(context.association, source_for_link, target_for_link)
         if context.label is not None:
             link.label = context.label
 
         new_links.append(link)
-        source_obj.links_.append(link)
+        source_obj.add_link_(link)
         # for links from this object to itself, store only one link object
         if source_obj != target:
-            target.links_.append(link)
+            target.add_link_(link)
         if context.stereotype_instances is not None:
             link.stereotype_instances = context.stereotype_instances
         if context.tagged_values is not None:
@@ -460,12 +486,12 @@ def set_links(link_definitions, do_add_links=False, **kwargs):
     try:
         for source in link_definitions:
             targets = link_definitions[source]
-            source_len = len(source.get_links_for_association(context.association))
+            source_len = len(source.get_links_for_association_(context.association))
             if len(targets) == 0:
                 context.association.check_multiplicity_(source, source_len, 0, context.matchesInOrder[source])
             else:
                 for target in targets:
-                    target_len = len(target.get_links_for_association(context.association))
+                    target_len = len(target.get_links_for_association_(context.association))
                     context.association.check_multiplicity_(source, source_len, target_len,
                                                             context.matchesInOrder[source])
                     context.association.check_multiplicity_(target, target_len, source_len,
@@ -526,6 +552,116 @@ def add_links(link_definitions, **kwargs):
     return set_links(link_definitions, True, **kwargs)
 
 
+def _get_bulk_link_object(element, kind):
+    if is_cclass(element):
+        element = element.class_object_
+    elif not is_cobject(element):
+        raise CException(f"link {kind!s} '{element!s}' is not an object, class, or link")
+    if element.is_deleted:
+        raise CException(f"cannot link to deleted {kind!s}")
+    return element
+
+
+def add_links_bulk(association, pairs=None, sources=None, targets=None, **kwargs):
+    """
+    Function used to add a large number of links of one association at once. The links are specified either
+    as an iterable of ``(source, target)`` pairs, or in columnar form as two sequences ``sources`` and ``targets``
+    of the same length, where the i-th source is linked to the i-th target.
+
+    For example, the following calls add the same links from carts to their items::
+
+            new_links = add_links_bulk(cart_items, [(cart1, item1), (cart1, item2), (cart2, item3)])
+            new_links = add_links_bulk(cart_items, sources=[cart1, cart1, cart2], targets=[item1, item2, item3])
+
+    In contrast to :py:func:`.add_links`, the association is not searched for, and the multiplicities are
+    validated only once for each object touched by the new links, after all links have been created. The
+    links are created in association direction, if source and target match the association's source and
+    target, else in reverse direction. As with :py:func:`.add_links`, either all links are created, or,
+    if an error occurs, none of them.
+
+    Args:
+        association (CAssociation): The association of the new links.
+        pairs: An iterable of ``(source, target)`` pairs of objects, classes, or links.
+        sources: A sequence of link sources, used together with ``targets`` instead of ``pairs``.
+        targets: A sequence of link targets, used together with ``sources`` instead of ``pairs``.
+        **kwargs: The following keyword arguments are supported:
+
+                - ``stereotype_instances``:
+                    Used to set the stereotype instances for the links, using a stereotype or a list of
+                    stereotypes as in the ``stereotype_instances`` setter of  :py:class:`.CLink`.
+                - ``tagged_values``:
+                    Used to set the tagged values for the links, using a values dict
+                    as in the ``tagged_values`` setter of  :py:class:`.CLink`.
+                - ``label``:
+                    Used to set the label of the links.
+
+    Returns:
+        List[CLink]: List of newly created links.
+
+    """
+    if "association" in kwargs or "role_name" in kwargs:
+        raise CException(f"unknown keywords argument")
+    context = LinkKeywordsContext(association=association, **kwargs)
+    if association is None:
+        raise CException("association is required for adding links in bulk")
+    check_named_element_is_not_deleted(association)
+    if pairs is None:
+        if sources is None or targets is None:
+            raise CException("either pairs or sources and targets are required for adding links in bulk")
+        if len(sources) != len(targets):
+            raise CException("sources and targets for adding links in bulk must have the same length")
+        pairs = zip(sources, targets)
+    elif sources is not None or targets is not None:
+        raise CException("pairs cannot be combined with sources and targets for adding links in bulk")
+
+    new_links = []
+    # the objects touched on either side of the association, mapped to one of their new opposite objects
+    touched_objects = {}
+    try:
+        for pair in pairs:
+            try:
+                source, target = pair
+            except (TypeError, ValueError):
+                raise CException("malformed link pair: should be of the form (<link source>, <link target>)")
+            source_obj = _get_bulk_link_object(source, "source")
+            target_obj = _get_bulk_link_object(target, "target")
+            if (association.matches_source_(source_obj.classifier_, None) and
+                    association.matches_target_(target_obj.classifier_, None)):
+                source_for_link, target_for_link = source_obj, target_obj
+            elif (association.matches_source_(target_obj.classifier_, None) and
+                  association.matches_target_(source_obj.classifier_, None)):
+                source_for_link, target_for_link = target_obj, source_obj
+            else:
+                raise CException(f"association does not match link '{source!s} -> {target!s}'")
+            if source_obj.has_link_(source_for_link, target_for_link, association):
+                raise CException(
+                    f"trying to link the same link twice '{source!s} -> {target!s}'' twice for the same association")
+
+            link = CLink(association, source_for_link, target_for_link)
+            if context.label is not None:
+                link.label = context.label
+            new_links.append(link)
+            source_for_link.add_link_(link)
+            # for links from an object to itself, store only one link object
+            if source_for_link != target_for_link:
+                target_for_link.add_link_(link)
+            if context.stereotype_instances is not None:
+                link.stereotype_instances = context.stereotype_instances
+            if context.tagged_values is not None:
+                link.tagged_values = context.tagged_values
+            touched_objects.setdefault((source_for_link, True), target_for_link)
+            touched_objects.setdefault((target_for_link, False), source_for_link)
+
+        for (obj, is_link_source), opposite in touched_objects.items():
+            association.check_multiplicity_(obj, len(obj.get_links_for_association_(association)),
+                                            len(opposite.get_links_for_association_(association)), is_link_source)
+    except CException as e:
+        for link in new_links:
+            link.delete()
+        raise e
+    return new_links
+
+
 def delete_links(link_definitions, **kwargs):
     """
     Function used to delete multiple links, maybe to different source objects.
@@ -561,10 +697,8 @@ def delete_links(link_definitions, **kwargs):
         for target in targets:
             matches_in_order = None
             matching_link = None
-            for link in source.links_:
-                if context.association is not None and link.association != context.association:
-                    continue
-                matches_in_order = True
+            for link in source.get_links_with_object_(target, context.association):
+                link_matches_in_order = True
                 matches = False
                 if source == link.source_ and target == link.target_:
                     matches = True
@@ -572,12 +706,13 @@ def delete_links(link_definitions, **kwargs):
                         matches = False
                 if target == link.source_ and source == link.target_:
                     matches = True
-                    matches_in_order = False
+                    link_matches_in_order = False
                     if context.role_name is not None and not link.association.source_role_name == context.role_name:
                         matches = False
                 if matches:
                     if matching_link is None:
                         matching_link = link
+                        matches_in_order = link_matches_in_order
                     else:
                         raise CException("link definition in delete links ambiguous for link " +
                                          f"'{source!s}->{target!s}': found multiple matches")
@@ -593,10 +728,8 @@ def delete_links(link_definitions, **kwargs):
                 raise CException(f"no link found for '{source!s} -> {target!s}' " +
                                  "in delete links" + role_name_string + association_string)
             else:
-                if matches_in_order is None:
-                    raise CException(f"no link found for '{source!s} -> {target!s}' in delete links")
-                source_len = len(source.get_links_for_association(matching_link.association)) - 1
-                target_len = len(target.get_links_for_association(matching_link.association)) - 1
+                source_len = len(source.get_links_for_association_(matching_link.association)) - 1
+                target_len = len(target.get_links_for_association_(matching_link.association)) - 1
                 matching_link.association.check_multiplicity_(source, source_len, target_len, matches_in_order)
                 matching_link.association.check_multiplicity_(target, target_len, source_len, not matches_in_order)
                 matching_link.delete()
@@ -1,10 +1,14 @@
 from codeable_models.cclassifier import CClassifier
 from codeable_models.cexception import CException
 from codeable_models.internal.commons import check_is_cclass
+from codeable_models.internal.name_index import next_sequence_number, build_index, add_to_index, remove_from_index, \
+    get_from_index, get_first_from_index
 from codeable_models.internal.stereotype_holders import CStereotypesHolder
 
 
 class CMetaclass(CClassifier):
+    __slots__ = ("classes_", "classes_names_index_", "stereotypes_holder")
+
     def __init__(self, name=None, **kwargs):
         """``CMetaclass`` is used to define meta-classes. All classes (defined
         using :py:class:`.CClass`) in Codeable Models are instances of metaclasses.
@@ -41,7 +45,10 @@ class CMetaclass(CClassifier):
         :py:class:`.CClass` instances. Stereotypes can extend the meta-class. If this is the case,
         those stereotypes can be used as stereotype instances on the classes of the meta-class.
         """
-        self.classes_ = []
+        # maps the classes to a sequence number that reflects the order in which they were added
+        self.classes_ = {}
+        # name -> classes index, built on first use by get_classes/get_class
+        self.classes_names_index_ = None
         self.stereotypes_holder = CStereotypesHolder(self)
         super().__init__(name, **kwargs)
 
@@ -77,7 +84,25 @@ class CMetaclass(CClassifier):
             list[CClass]: The classes with the given name.
 
         """
-        return list(cl for cl in self.classes if cl.name == name)
+        return get_from_index(self._get_classes_names_index(), name, self.classes_)
+
+    def get_all_classes(self, name):
+        """Gets all classes derived from this meta-class that have the specified name, either directly
+        or in one of the sub-classes of the meta-class. The classes are returned in the same order as
+        in ``all_classes``.
+
+        Args:
+            name: Class name to search for.
+
+        Returns:
+            list[CClass]: The classes with the given name.
+
+        """
+        all_classes = self.get_classes(name)
+        for scl in self.all_subclasses:
+            if isinstance(scl, CMetaclass):
+                all_classes.extend(scl.get_classes(name))
+        return all_classes
 
     def get_class(self, name):
         """Gets the class directly derived from this meta-class that has the specified name. If more than one
@@ -90,8 +115,7 @@ class CMetaclass(CClassifier):
             CClass: The class with the given name.
 
         """
-        classes = self.get_classes(name)
-        return None if len(classes) == 0 else classes[0]
+        return get_first_from_index(self._get_classes_names_index(), name, self.classes_)
 
     def get_stereotypes(self, name):
         """Gets all stereotypes extending this meta-class that have the specified name.
@@ -103,7 +127,7 @@ class CMetaclass(CClassifier):
             list[CClass]: The stereotypes with the given name.
 
         """
-        return list(cl for cl in self.stereotypes if cl.name == name)
+        return [s for s in self.stereotypes_holder.stereotypes_ if s.name == name]
 
     def get_stereotype(self, name):
         """Gets the stereotype extending this meta-class that has the specified name. If more than one
@@ -116,8 +140,10 @@ class CMetaclass(CClassifier):
             CClass: The stereotype with the given name.
 
         """
-        stereotypes = self.get_stereotypes(name)
-        return None if len(stereotypes) == 0 else stereotypes[0]
+        for s in self.stereotypes_holder.stereotypes_:
+            if s.name == name:
+                return s
+        return None
 
     def add_class(self, cl):
         """Add the class ``cl`` to the classes of this meta-class.
@@ -132,7 +158,9 @@ class CMetaclass(CClassifier):
         check_is_cclass(cl)
         if cl in self.classes_:
             raise CException(f"class '{cl!s}' is already a class of the metaclass '{self!s}'")
-        self.classes_.append(cl)
+        self.classes_[cl] = next_sequence_number()
+        if self.classes_names_index_ is not None:
+            add_to_index(self.classes_names_index_, cl.name, cl)
 
     def remove_class(self, cl):
         """Remove the class ``cl`` from the classes of this meta-class. Raises an exception, if ``cl`` is
@@ -147,7 +175,19 @@ class CMetaclass(CClassifier):
         """
         if cl not in self.classes_:
             raise CException(f"can't remove class instance '{cl!s}' from metaclass '{self!s}': not a class instance")
-        self.classes_.remove(cl)
+        del self.classes_[cl]
+        if self.classes_names_index_ is not None:
+            remove_from_index(self.classes_names_index_, cl.name, cl)
+
+    def rename_instance_(self, instance, old_name):
+        if self.classes_names_index_ is not None:
+            remove_from_index(self.classes_names_index_, old_name, instance)
+            add_to_index(self.classes_names_index_, instance.name, instance)
+
+    def _get_classes_names_index(self):
+        if self.classes_names_index_ is None:
+            self.classes_names_index_ = build_index(self.classes_, lambda cl: cl.name)
+        return self.classes_names_index_
 
     def delete(self):
         """
@@ -163,7 +203,8 @@ class CMetaclass(CClassifier):
         classes_to_delete = list(self.classes_)
         for cl in classes_to_delete:
             cl.delete()
-        self.classes_ = []
+        self.classes_ = {}
+        self.classes_names_index_ = None
         for s in self.stereotypes_holder.stereotypes_:
             s.extended_.remove(self)
         self.stereotypes_holder.stereotypes_ = []
@@ -212,10 +253,7 @@ class CMetaclass(CClassifier):
             raise CException(f"metaclass '{self!s}' is not compatible with association target '{target!s}'")
         return super(CMetaclass, self).association(target, descriptor, **kwargs)
 
-    def compute_connected_(self, context):
-        super().compute_connected_(context)
-        connected = []
-        for s in self.stereotypes:
-            if s not in context.stop_elements_exclusive:
-                connected.append(s)
-        self.append_connected_(context, connected)
+    def get_directly_connected_(self, context):
+        connected = super().get_directly_connected_(context)
+        connected.extend(self.stereotypes_holder.stereotypes_)
+        return connected
@@ -1,8 +1,12 @@
 from codeable_models.cexception import CException
-from codeable_models.internal.commons import set_keyword_args
+from codeable_models.internal.commons import set_keyword_args, is_cnamedelement, is_clink, is_cobject, is_cclass, \
+    is_cmetaclass, is_cclassifier, is_cassociation
+from codeable_models.internal.model_epochs import advance_values_epoch
 
 
 class CNamedElement(object):
+    __slots__ = ("name_", "is_deleted", "__weakref__")
+
     def __init__(self, name, **kwargs):
         """CNamedElement is the superclass for all named elements in Codeable Models, such as CClass, CObject, and
         so on. The class is usually not used directly.
@@ -23,17 +27,31 @@ class CNamedElement(object):
         Args:
            name (str): An optional name.
            **kwargs: Accepts keyword args defined as ``legal_keyword_args`` by subclasses.
-
-        Attributes:
-            name (str): The name of the entity. Can be ``None``.
         """
-        self.name = name
+        self.name_ = name
         super().__init__()
         self.is_deleted = False
         if name is not None and not isinstance(name, str):
             raise CException(f"is not a name string: '{name!r}'")
         self._init_keyword_args(**kwargs)
 
+    @property
+    def name(self):
+        """str: Getter and setter for the name of the element. Can be ``None``."""
+        return self.name_
+
+    @name.setter
+    def name(self, name):
+        old_name = self.name_
+        self.name_ = name
+        if name != old_name:
+            advance_values_epoch()
+            self.rename_(old_name)
+
+    def rename_(self, old_name):
+        # called after the name of the element has changed, to be overridden by subclasses that need to react
+        pass
+
     def __str__(self):
         if self.name is None:
             return ""
@@ -60,3 +78,73 @@ class CNamedElement(object):
             return
         self.name = None
         self.is_deleted = True
+        advance_values_epoch()
+
+
+def delete_elements(elements):
+    """
+    Function used to delete many elements in one batch. The result is the same as calling ``delete()`` on
+    each of the elements, i.e. instances, class objects, links, and associations of deleted elements are deleted,
+    too. But first the whole set of elements to delete is collected, and then the links of the deleted elements are
+    removed from all objects in one pass. This avoids the cost of removing objects and links one by one, which
+    makes deleting large parts of a model, e.g. a class with many instances, much faster.
+
+    Args:
+        elements: An iterable of named elements (e.g. :py:class:`.CObject`, :py:class:`.CClass`,
+            :py:class:`.CAssociation`, :py:class:`.CLink`) to be deleted. Elements that are already deleted
+            are ignored.
+
+    Returns:
+        None
+
+    **Example:**
+
+    Delete all elements in a bundle (the bundle itself is not deleted)::
+
+        delete_elements(bundle.elements)
+
+    """
+    elements_to_delete = list(elements)
+    for element in elements_to_delete:
+        if not is_cnamedelement(element):
+            raise CException(f"'{element!s}' is not a named element and cannot be deleted")
+
+    links = {}
+    objects = {}
+    other_elements = {}
+    i = 0
+    while i < len(elements_to_delete):
+        element = elements_to_delete[i]
+        i += 1
+        if element.is_deleted:
+            continue
+        if is_clink(element):
+            links[element] = None
+        elif is_cobject(element):
+            if element not in objects:
+                objects[element] = None
+                links.update(dict.fromkeys(element.links_))
+        elif element not in other_elements:
+            other_elements[element] = None
+            if is_cmetaclass(element):
+                elements_to_delete.extend(element.classes_)
+            if is_cclass(element):
+                elements_to_delete.extend(element.objects_)
+                links.update(dict.fromkeys(element.class_object_.links_))
+            if is_cclassifier(element):
+                elements_to_delete.extend(element.associations_)
+            if is_cassociation(element):
+                links.update(dict.fromkeys(element.get_links_()))
+
+    linked_objects = {}
+    for link in links:
+        linked_objects[link.source_] = None
+        linked_objects[link.target_] = None
+    for obj in linked_objects:
+        obj.remove_links_(links)
+    for link in links:
+        link.delete_detached_()
+    for obj in objects:
+        obj.delete()
+    for element in other_elements:
+        element.delete()
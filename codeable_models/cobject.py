@@ -2,11 +2,19 @@ from codeable_models.cassociation import CAssociation
 from codeable_models.cbundlable import CBundlable
 from codeable_models.cmetaclass import CMetaclass
 from codeable_models.internal.commons import *
+from codeable_models.internal.compact_values import CompactValues
+from codeable_models.internal.lazy_slots import get_element_class
+from codeable_models.internal.model_epochs import advance_values_epoch
 from codeable_models.internal.var_values import delete_var_value, set_var_value, get_var_value, get_var_values, \
     set_var_values, VarValueKind
 
+# number of links of an object from which on its links are indexed by association
+_LINKS_INDEX_THRESHOLD = 16
+
 
 class CObject(CBundlable):
+    __slots__ = ("class_object_class_", "classifier_", "attribute_values", "links_", "links_index_")
+
     def __init__(self, cl, name=None, **kwargs):
         """``CObject`` is used to define objects. Objects in Codeable Models are instances of classes (defined
         using :py:class:`.CClass`).
@@ -57,7 +65,7 @@ class CObject(CBundlable):
         if 'class_object_class_' in kwargs:
             class_object_class = kwargs.pop('class_object_class_', None)
             self.class_object_class_ = class_object_class
-        elif cl.__class__ is CAssociation:
+        elif get_element_class(cl) is CAssociation:
             pass
         else:
             # don't check if this is a class object, as classifier is then a metaclass 
@@ -68,23 +76,31 @@ class CObject(CBundlable):
         if cl is not None:
             check_named_element_is_not_deleted(cl)
         self.classifier_ = cl
-        self.attribute_values = {}
+        if self.class_object_class_ is None and get_element_class(cl) is not CAssociation and cl.compact_values_:
+            self.attribute_values = CompactValues(self)
+        else:
+            self.attribute_values = {}
         super().__init__(name, **kwargs)
         if self.class_object_class_ is None:
             # don't add instance if this is a class object or association
-            if cl.__class__ is not CAssociation:
+            if get_element_class(cl) is not CAssociation:
                 self.classifier_.add_object_(self)
             # do not init default attributes of a class object, the class constructor 
             # does it after stereotype instances are added, who defining defaults first 
             self.init_attribute_values_()
-        self.links_ = []
+        # maps the links of the object to None, keeping the order in which they were added, so that links are
+        # removed in constant time; it is not a list, use the links property to get a list of the links
+        self.links_ = {}
+        # index of the links by association, mapping (source, target) of each link to the link,
+        # created when the object has more than a few links
+        self.links_index_ = None
 
         if values is not None:
             self.values = values
 
     def init_attribute_values_(self):
         # init default values of attributes
-        for cl in self.classifier.class_path:
+        for cl in self.classifier.get_class_path_():
             for attrName, attr in cl.attributes_.items():
                 if attr.default is not None:
                     if self.get_value(attrName, cl) is None:
@@ -115,6 +131,16 @@ class CObject(CBundlable):
             check_named_element_is_not_deleted(cl)
         self.classifier_ = cl
         self.classifier_.add_object_(self)
+        self.update_attribute_values_storage_()
+        advance_values_epoch()
+
+    def update_attribute_values_storage_(self):
+        # switch between dict based and compact storage of attribute values, according to the classifier
+        if self.classifier_.compact_values_:
+            if not isinstance(self.attribute_values, CompactValues):
+                self.attribute_values = CompactValues.from_dict_(self, self.attribute_values)
+        elif isinstance(self.attribute_values, CompactValues):
+            self.attribute_values = self.attribute_values.to_dict_()
 
     def delete(self):
         """Delete the object and delete it from its classifier. Delete all links of the object.
@@ -131,7 +157,7 @@ class CObject(CBundlable):
             self.classifier_.remove_object_(self)
         self.classifier_ = None
         super().delete()
-        links = self.links_.copy()
+        links = list(self.links_)
         for link in links:
             link.delete()
 
@@ -194,7 +220,7 @@ class CObject(CBundlable):
         """
         if self.is_deleted:
             raise CException(f"can't get value '{attribute_name!s}' on deleted {self._get_kind_str()!s}")
-        return get_var_value(self, self.classifier.class_path, self.attribute_values, attribute_name,
+        return get_var_value(self, [self.classifier], self.attribute_values, attribute_name,
                              VarValueKind.ATTRIBUTE_VALUE, classifier)
 
     def delete_value(self, attribute_name, classifier=None):
@@ -211,7 +237,7 @@ class CObject(CBundlable):
         """
         if self.is_deleted:
             raise CException(f"can't delete value '{attribute_name!s}' on deleted {self._get_kind_str()!s}")
-        return delete_var_value(self, self.classifier.class_path, self.attribute_values, attribute_name,
+        return delete_var_value(self, [self.classifier], self.attribute_values, attribute_name,
                                 VarValueKind.ATTRIBUTE_VALUE, classifier)
 
     def set_value(self, attribute_name, value, classifier=None):
@@ -229,7 +255,7 @@ class CObject(CBundlable):
         """
         if self.is_deleted:
             raise CException(f"can't set value '{attribute_name!s}' on deleted {self._get_kind_str()!s}")
-        set_var_value(self, self.classifier.class_path, self.attribute_values, attribute_name, value,
+        set_var_value(self, [self.classifier], self.attribute_values, attribute_name, value,
                       VarValueKind.ATTRIBUTE_VALUE, classifier)
 
     @property
@@ -240,7 +266,7 @@ class CObject(CBundlable):
         """
         if self.is_deleted:
             raise CException(f"can't get values on deleted {self._get_kind_str()!s}")
-        return get_var_values(self.classifier.class_path, self.attribute_values)
+        return get_var_values([self.classifier], self.attribute_values)
 
     @values.setter
     def values(self, new_values):
@@ -249,6 +275,9 @@ class CObject(CBundlable):
         set_var_values(self, new_values, VarValueKind.ATTRIBUTE_VALUE)
 
     def remove_value_(self, attribute_name, classifier):
+        if isinstance(self.attribute_values, CompactValues):
+            self.attribute_values.delete_value_(classifier, attribute_name)
+            return
         try:
             self.attribute_values[classifier].pop(attribute_name, None)
         except KeyError:
@@ -260,6 +289,86 @@ class CObject(CBundlable):
         associations defined for the object's class."""
         return list(self.links_)
 
+    def add_link_(self, link):
+        self.links_[link] = None
+        if self.links_index_ is not None:
+            self._add_link_to_index(link)
+        elif len(self.links_) > _LINKS_INDEX_THRESHOLD:
+            self.links_index_ = {}
+            for existing_link in self.links_:
+                self._add_link_to_index(existing_link)
+
+    def _add_link_to_index(self, link):
+        try:
+            self.links_index_[link.association][(link.source_, link.target_)] = link
+        except KeyError:
+            self.links_index_[link.association] = {(link.source_, link.target_): link}
+
+    def remove_link_(self, link):
+        del self.links_[link]
+        if self.links_index_ is not None:
+            links_of_association = self.links_index_[link.association]
+            del links_of_association[(link.source_, link.target_)]
+            if len(links_of_association) == 0:
+                del self.links_index_[link.association]
+
+    def rename_(self, old_name):
+        super().rename_(old_name)
+        if self.class_object_class_ is None and self.classifier_ is not None:
+            # class objects are not indexed by their meta-class, and links not by their association
+            self.classifier_.rename_instance_(self, old_name)
+
+    def remove_links_(self, links):
+        # removes all links contained in the set (or dict) ``links`` in one pass over the links of the object
+        self.links_ = {link: None for link in self.links_ if link not in links}
+        if self.links_index_ is not None:
+            self.links_index_ = None
+            if len(self.links_) > _LINKS_INDEX_THRESHOLD:
+                self.links_index_ = {}
+                for link in self.links_:
+                    self._add_link_to_index(link)
+
+    def has_link_(self, source, target, association):
+        if self.links_index_ is None:
+            for link in self.links_:
+                if link.source_ == source and link.target_ == target and link.association == association:
+                    return True
+            return False
+        links_of_association = self.links_index_.get(association)
+        return links_of_association is not None and (source, target) in links_of_association
+
+    def get_links_for_association_(self, association):
+        # returns the links of the association, possibly as a view on the index that must not be modified
+        if self.links_index_ is None:
+            return [link for link in self.links_ if link.association == association]
+        links_of_association = self.links_index_.get(association)
+        if links_of_association is None:
+            return ()
+        return links_of_association.values()
+
+    def get_links_with_object_(self, obj, association=None):
+        # returns the links between this object and obj in both directions, optionally only those of association
+        if self.links_index_ is None:
+            return [link for link in self.links_ if (association is None or link.association == association) and
+                    ((link.source_ == self and link.target_ == obj) or (link.source_ == obj and link.target_ == self))]
+        if association is None:
+            links_of_associations = self.links_index_.values()
+        else:
+            links_of_associations = [self.links_index_.get(association, {})]
+        ends = [(self, obj)] if obj == self else [(self, obj), (obj, self)]
+        links = []
+        for links_of_association in links_of_associations:
+            for end in ends:
+                link = links_of_association.get(end)
+                if link is not None:
+                    links.append(link)
+        return links
+
+    def get_link_associations_(self):
+        if self.links_index_ is None:
+            return list(dict.fromkeys(link.association for link in self.links_))
+        return self.links_index_.keys()
+
     @property
     def linked(self):
         """list[CObject]: Getter for getting the linked objects defined for this object."""
@@ -283,11 +392,7 @@ class CObject(CBundlable):
             list[CLink]: The list of link objects.
 
         """
-        association_links = []
-        for link in list(self.links_):
-            if link.association == association:
-                association_links.extend([link])
-        return association_links
+        return list(self.get_links_for_association_(association))
 
     def get_linked(self, **kwargs):
         """Method to get the linked objects defined for this object filtered using criteria specified in kwargs.
@@ -309,12 +414,22 @@ class CObject(CBundlable):
         from codeable_models.clink import LinkKeywordsContext
         context = LinkKeywordsContext(**kwargs)
 
+        if context.association is not None:
+            links = self.get_links_for_association_(context.association)
+        elif context.role_name is not None:
+            associations = [a for a in self.get_link_associations_() if
+                            a.role_name == context.role_name or a.source_role_name == context.role_name]
+            if len(associations) == 1:
+                links = self.get_links_for_association_(associations[0])
+            else:
+                # keep the order of the links, if links of multiple associations are selected
+                links = [link for link in self.links_ if link.association in associations]
+        else:
+            links = self.links_
+
         result = []
-        for link in self.links_:
+        for link in links:
             append = True
-            if context.association is not None:
-                if link.association != context.association:
-                    append = False
             if context.role_name is not None:
                 append = False
                 if link.association.role_name == context.role_name:
@@ -369,11 +484,8 @@ class CObject(CBundlable):
         from codeable_models.clink import delete_links
         return delete_links({self: links}, **kwargs)
 
-    def compute_connected_(self, context):
-        super().compute_connected_(context)
-        connected = []
+    def get_directly_connected_(self, context):
+        connected = super().get_directly_connected_(context)
         for link in self.links_:
-            opposite = link.get_opposite_object(self)
-            if opposite not in context.stop_elements_exclusive:
-                connected.append(opposite)
-        self.append_connected_(context, connected)
+            connected.append(link.target_ if link.source_ is self else link.source_)
+        return connected
@@ -18,6 +18,8 @@ def _determine_extended_type_of_list(elements):
 
 
 class CStereotype(CClassifier):
+    __slots__ = ("extended_", "extended_instances_", "default_values_")
+
     def __init__(self, name=None, **kwargs):
         """``CStereotype`` is used to define stereotypes and stereotype instances. Meta-classes and meta-class
         associations can be extended with stereotypes.
@@ -84,7 +86,7 @@ class CStereotype(CClassifier):
         the association, respectively.
         """
         self.extended_ = []
-        self.extended_instances_ = []
+        self.extended_instances_ = {}
         self.default_values_ = {}
         super().__init__(name, **kwargs)
 
@@ -236,33 +238,26 @@ class CStereotype(CClassifier):
             raise CException(f"stereotype '{self!s}' is not compatible with association target '{target!s}'")
         return super(CStereotype, self).association(target, descriptor, **kwargs)
 
-    def compute_connected_(self, context):
-        super().compute_connected_(context)
-        if not context.process_stereotypes:
-            return
-        connected = []
-        for e in self.extended:
-            if e not in context.stop_elements_exclusive:
-                connected.append(e)
-        self.append_connected_(context, connected)
+    def get_directly_connected_(self, context):
+        connected = super().get_directly_connected_(context)
+        if context.process_stereotypes:
+            connected.extend(self.extended_)
+        return connected
 
     def _get_all_extended_elements(self):
         result = []
-        for cl in self.class_path:
+        for cl in self.get_class_path_():
             for extendedElement in cl.extended:
                 if extendedElement not in result:
                     result.append(extendedElement)
         return result
 
-    def _get_default_value_class_path(self):
-        result = []
-        for extendedElement in self._get_all_extended_elements():
+    def _get_default_value_metaclasses(self):
+        extended_elements = self._get_all_extended_elements()
+        for extendedElement in extended_elements:
             if not is_cmetaclass(extendedElement):
                 raise CException(f"default values can only be used on a stereotype that extends metaclasses")
-            for mcl in extendedElement.class_path:
-                if mcl not in result:
-                    result.append(mcl)
-        return result
+        return extended_elements
 
     @property
     def default_values(self):
@@ -280,15 +275,15 @@ class CStereotype(CClassifier):
         """
         if self.is_deleted:
             raise CException(f"can't get default values on deleted stereotype")
-        class_path = self._get_default_value_class_path()
-        return get_var_values(class_path, self.default_values_)
+        metaclasses = self._get_default_value_metaclasses()
+        return get_var_values(metaclasses, self.default_values_)
 
     @default_values.setter
     def default_values(self, new_values):
         if self.is_deleted:
             raise CException(f"can't set default values on deleted stereotype")
-        class_path = self._get_default_value_class_path()
-        if len(class_path) == 0:
+        metaclasses = self._get_default_value_metaclasses()
+        if len(metaclasses) == 0:
             raise CException(f"default values can only be used on a stereotype that extends metaclasses")
         set_var_values(self, new_values, VarValueKind.DEFAULT_VALUE)
 
@@ -312,10 +307,10 @@ class CStereotype(CClassifier):
         """
         if self.is_deleted:
             raise CException(f"can't get default value '{attribute_name!s}' on deleted stereotype")
-        class_path = self._get_default_value_class_path()
-        if len(class_path) == 0:
+        metaclasses = self._get_default_value_metaclasses()
+        if len(metaclasses) == 0:
             raise CException(f"default values can only be used on a stereotype that extends metaclasses")
-        return get_var_value(self, class_path, self.default_values_, attribute_name, VarValueKind.DEFAULT_VALUE,
+        return get_var_value(self, metaclasses, self.default_values_, attribute_name, VarValueKind.DEFAULT_VALUE,
                              classifier)
 
     def delete_default_value(self, attribute_name, classifier=None):
@@ -333,10 +328,10 @@ class CStereotype(CClassifier):
         """
         if self.is_deleted:
             raise CException(f"can't delete default value '{attribute_name!s}' on deleted stereotype")
-        class_path = self._get_default_value_class_path()
-        if len(class_path) == 0:
+        metaclasses = self._get_default_value_metaclasses()
+        if len(metaclasses) == 0:
             raise CException(f"default values can only be used on a stereotype that extends metaclasses")
-        return delete_var_value(self, class_path, self.default_values_, attribute_name, VarValueKind.DEFAULT_VALUE,
+        return delete_var_value(self, metaclasses, self.default_values_, attribute_name, VarValueKind.DEFAULT_VALUE,
                                 classifier)
 
     def set_default_value(self, attribute_name, value, classifier=None):
@@ -360,8 +355,8 @@ class CStereotype(CClassifier):
         """
         if self.is_deleted:
             raise CException(f"can't set default value '{attribute_name!s}' on deleted stereotype")
-        class_path = self._get_default_value_class_path()
-        if len(class_path) == 0:
+        metaclasses = self._get_default_value_metaclasses()
+        if len(metaclasses) == 0:
             raise CException(f"default values can only be used on a stereotype that extends metaclasses")
-        set_var_value(self, class_path, self.default_values_, attribute_name, value, VarValueKind.DEFAULT_VALUE,
+        set_var_value(self, metaclasses, self.default_values_, attribute_name, value, VarValueKind.DEFAULT_VALUE,
                       classifier)
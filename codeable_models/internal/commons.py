@@ -217,7 +217,7 @@ def _remove_superclasses_and_duplicates(classes):
 def update_common_metaclasses(common_metaclasses, new_metaclasses):
     updated_common_metaclasses = []
     for metaclass in new_metaclasses:
-        metaclasses = metaclass.class_path
+        metaclasses = metaclass.get_class_path_()
         for cmc in common_metaclasses:
             for mc in metaclasses:
                 if cmc == mc:
@@ -0,0 +1,110 @@
+# Compact storage of the attribute values of an object. Instead of a dict of dicts keyed by classifier and
+# attribute name, the values are stored in a flat list. The attribute layout of the object's classifier maps
+# each (classifier, attribute name) pair on the class path to a slot index in this list. ``None`` in a slot
+# means that no value is set. The indices of the slots that have values are kept in the order the values were
+# set, so that the values are returned in the same order as with the dict based storage.
+#
+# The layout of a classifier changes when attributes or superclasses change. The store then migrates its slots
+# lazily to the new layout on the next access. Values whose (classifier, attribute name) pair is not part of the
+# current layout, e.g. values set for a classifier that is no longer on the class path, are kept in a dict of
+# orphaned values, so that they reappear when the classifier is added to the class path again, just as with the
+# dict based storage.
+
+
+class CompactValues(object):
+    __slots__ = ("object_", "layout_", "slots_", "order_", "orphaned_")
+
+    def __init__(self, obj):
+        self.object_ = obj
+        self.layout_ = {}
+        self.slots_ = []
+        self.order_ = []
+        self.orphaned_ = None
+
+    @staticmethod
+    def from_dict_(obj, values_dict):
+        compact_values = CompactValues(obj)
+        for classifier, values_of_classifier in values_dict.items():
+            for name, value in values_of_classifier.items():
+                compact_values.set_value_(classifier, name, value)
+        return compact_values
+
+    def to_dict_(self):
+        keys = list(self._get_layout())
+        result = {}
+        for index in self.order_:
+            classifier, name = keys[index]
+            result.setdefault(classifier, {})[name] = self.slots_[index]
+        if self.orphaned_:
+            for (classifier, name), value in self.orphaned_.items():
+                result.setdefault(classifier, {})[name] = value
+        return result
+
+    def _get_layout(self):
+        classifier = self.object_.classifier_
+        if classifier is None:
+            return self.layout_
+        layout = classifier.get_attribute_layout_()
+        if layout is not self.layout_:
+            self._migrate(layout)
+        return layout
+
+    def _migrate(self, layout):
+        slots = [None] * len(layout)
+        order = []
+        orphaned = {}
+        old_keys = list(self.layout_)
+        old_values = [(old_keys[index], self.slots_[index]) for index in self.order_]
+        if self.orphaned_:
+            old_values.extend(self.orphaned_.items())
+        for key, value in old_values:
+            index = layout.get(key)
+            if index is None:
+                orphaned[key] = value
+            else:
+                slots[index] = value
+                order.append(index)
+        self.layout_ = layout
+        self.slots_ = slots
+        self.order_ = order
+        self.orphaned_ = orphaned if orphaned else None
+
+    def get_value_(self, classifier, name):
+        index = self._get_layout().get((classifier, name))
+        if index is None:
+            if self.orphaned_ is None:
+                return None
+            return self.orphaned_.get((classifier, name))
+        return self.slots_[index]
+
+    def set_value_(self, classifier, name, value):
+        index = self._get_layout().get((classifier, name))
+        if index is None:
+            if self.orphaned_ is None:
+                self.orphaned_ = {}
+            self.orphaned_[(classifier, name)] = value
+            return
+        if value is None:
+            self._delete_slot_value(index)
+            return
+        if self.slots_[index] is None:
+            self.order_.append(index)
+        self.slots_[index] = value
+
+    def delete_value_(self, classifier, name):
+        index = self._get_layout().get((classifier, name))
+        if index is None:
+            if self.orphaned_ is None:
+                return None
+            value = self.orphaned_.pop((classifier, name), None)
+            if not self.orphaned_:
+                self.orphaned_ = None
+            return value
+        return self._delete_slot_value(index)
+
+    def _delete_slot_value(self, index):
+        value = self.slots_[index]
+        if value is not None:
+            self.slots_[index] = None
+            self.order_.remove(index)
+        return value
@@ -0,0 +1,71 @@
+# Elements of models loaded lazily from a snapshot (see codeable_models.serialization.load_snapshot) are created
+# with some of their slots unset, e.g. the objects of classes or the links and attribute values of objects. As long
+# as an element has unset slots, its class is replaced by a subclass created for the loader, which adds no slots and
+# whose __getattr__ asks the loader to set a slot from the snapshot when it is read. Once all lazy slots of an
+# element are set, the element gets its original class back. This way, elements that are not loaded lazily don't
+# pay for lazy loading, neither in memory nor when looking up attributes they don't have.
+#
+# The loader keeps the pending slots of its elements in its lazy_elements_ dict (element -> (element id, set of
+# slot names)), caches the subclasses in its lazy_classes_ dict, and sets slots with its load_slot_(element,
+# element_id, name) method, which returns the names of the slots set. As the loader is only referenced by the
+# elements of the model it loads (via their classes), both are freed together with the model.
+
+
+def _lazy_getattr(element, name):
+    # only called for attributes not found otherwise, i.e. for unset slots
+    if load_lazy_slot(element, name):
+        return object.__getattribute__(element, name)
+    raise AttributeError(f"'{type(element).__name__!s}' object has no attribute '{name!s}'")
+
+
+def _get_lazy_class(loader, element_class):
+    lazy_class = loader.lazy_classes_.get(element_class)
+    if lazy_class is None:
+        lazy_class = type(element_class.__name__, (element_class,), {
+            "__slots__": (), "__module__": element_class.__module__, "__getattr__": _lazy_getattr,
+            "lazy_loader_": loader, "element_class_": element_class})
+        loader.lazy_classes_[element_class] = lazy_class
+    return lazy_class
+
+
+def get_element_class(element):
+    # the class of the element, i.e. the original class of an element that is loaded lazily
+    return getattr(type(element), "element_class_", type(element))
+
+
+def add_lazy_element(element, loader, element_id, slot_names):
+    # the slots named must be unset
+    pending = loader.lazy_elements_.get(element)
+    if pending is not None:
+        pending[1].update(slot_names)
+        return
+    loader.lazy_elements_[element] = (element_id, set(slot_names))
+    element.__class__ = _get_lazy_class(loader, type(element))
+
+
+def load_lazy_slot(element, name):
+    loader = getattr(type(element), "lazy_loader_", None)
+    if loader is None:
+        return False
+    element_id, pending_slots = loader.lazy_elements_[element]
+    if name not in pending_slots:
+        return False
+    pending_slots.difference_update(loader.load_slot_(element, element_id, name))
+    if not pending_slots:
+        del loader.lazy_elements_[element]
+        element.__class__ = type(element).element_class_
+    return True
+
+
+def load_lazy_slots(element):
+    loader = getattr(type(element), "lazy_loader_", None)
+    if loader is not None:
+        for name in list(loader.lazy_elements_[element][1]):
+            load_lazy_slot(element, name)
+
+
+def get_lazy_slots(element):
+    loader = getattr(type(element), "lazy_loader_", None)
+    if loader is None:
+        return set()
+    return set(loader.lazy_elements_[element][1])
@@ -0,0 +1,46 @@
+# Model-wide generation counters ("epochs"). Caches derived from the model structure, such as the class paths of
+# classifiers, store the epoch they have been computed at. Mutations advance the epoch, and the caches are then
+# recomputed lazily on the next access. This way a mutation invalidates all dependent caches in constant time.
+
+_hierarchy_epoch = 0
+_attributes_epoch = 0
+_associations_epoch = 0
+_values_epoch = 0
+
+
+def get_hierarchy_epoch():
+    return _hierarchy_epoch
+
+
+def advance_hierarchy_epoch():
+    global _hierarchy_epoch
+    _hierarchy_epoch += 1
+
+
+def get_attributes_epoch():
+    return _attributes_epoch
+
+
+def advance_attributes_epoch():
+    global _attributes_epoch
+    _attributes_epoch += 1
+
+
+def get_associations_epoch():
+    return _associations_epoch
+
+
+def advance_associations_epoch():
+    global _associations_epoch
+    _associations_epoch += 1
+
+
+# advanced on changes of attribute and tagged values, stereotype instances, names, and attribute types, i.e.,
+# everything that changes how the values of an element are rendered apart from the hierarchy and the attributes
+def get_values_epoch():
+    return _values_epoch
+
+
+def advance_values_epoch():
+    global _values_epoch
+    _values_epoch += 1
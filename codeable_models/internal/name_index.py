@@ -0,0 +1,56 @@
+# Helpers for indices that map a key, such as the name of an element, to the elements having that key. Each key
+# maps to a dict of elements used as an ordered set. The containers using such an index map their elements to a
+# sequence number. This way, the elements found for a key can be sorted in the order in which they were added to
+# the container, even if they were moved between keys later on, e.g. because they were renamed.
+import itertools
+
+_sequence_numbers = itertools.count()
+
+
+def next_sequence_number():
+    return next(_sequence_numbers)
+
+
+def reserve_sequence_numbers(count):
+    # returns the first of count consecutive sequence numbers, which are not returned by next_sequence_number()
+    global _sequence_numbers
+    first = next(_sequence_numbers)
+    _sequence_numbers = itertools.count(first + count)
+    return first
+
+
+def build_index(elements, get_key):
+    index = {}
+    for element in elements:
+        add_to_index(index, get_key(element), element)
+    return index
+
+
+def add_to_index(index, key, element):
+    try:
+        index[key][element] = None
+    except KeyError:
+        index[key] = {element: None}
+
+
+def remove_from_index(index, key, element):
+    elements_of_key = index[key]
+    del elements_of_key[element]
+    if len(elements_of_key) == 0:
+        del index[key]
+
+
+def get_from_index(index, key, elements):
+    elements_of_key = index.get(key)
+    if elements_of_key is None:
+        return []
+    if len(elements_of_key) == 1:
+        return list(elements_of_key)
+    return sorted(elements_of_key, key=elements.get)
+
+
+def get_first_from_index(index, key, elements):
+    elements_of_key = index.get(key)
+    if elements_of_key is None:
+        return None
+    return min(elements_of_key, key=elements.get)
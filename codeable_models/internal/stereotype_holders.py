@@ -1,9 +1,13 @@
 from codeable_models.cexception import CException
 from codeable_models.internal.commons import is_cclass, is_clink, check_is_cstereotype, is_cstereotype, \
     check_named_element_is_not_deleted, is_cassociation
+from codeable_models.internal.model_epochs import advance_values_epoch
+from codeable_models.internal.var_values import get_class_path_of_classifiers
 
 
 class CStereotypesHolder:
+    __slots__ = ("element", "stereotypes_")
+
     def __init__(self, element):
         self.stereotypes_ = []
         self.element = element
@@ -41,6 +45,7 @@ class CStereotypesHolder:
             elements = [elements]
         elif not isinstance(elements, list):
             raise CException(f"a list or a stereotype is required as input")
+        advance_values_epoch()
         for s in elements:
             check_is_cstereotype(s)
             if s is not None:
@@ -53,6 +58,8 @@ class CStereotypesHolder:
 
 
 class CStereotypeInstancesHolder(CStereotypesHolder):
+    __slots__ = ()
+
     def __init__(self, element):
         super().__init__(element)
 
@@ -61,28 +68,15 @@ class CStereotypeInstancesHolder(CStereotypesHolder):
             if a.default is not None:
                 self.element.set_tagged_value(a.name, a.default, stereotype)
 
-    def _get_stereotype_instance_path_superclasses(self, stereotype):
-        stereotype_path = [stereotype]
-        for superclass in stereotype.superclasses:
-            for superclassStereotype in self._get_stereotype_instance_path_superclasses(superclass):
-                if superclassStereotype not in stereotype_path:
-                    stereotype_path.append(superclassStereotype)
-        return stereotype_path
-
     def get_stereotype_instance_path(self):
-        stereotype_path = []
-        for stereotypeOfThisElement in self.stereotypes:
-            for stereotype in self._get_stereotype_instance_path_superclasses(stereotypeOfThisElement):
-                if stereotype not in stereotype_path:
-                    stereotype_path.append(stereotype)
-        return stereotype_path
+        return get_class_path_of_classifiers(self.stereotypes_)
 
     def _remove_from_stereotype(self):
         for s in self.stereotypes_:
-            s.extended_instances_.remove(self.element)
+            del s.extended_instances_[self.element]
 
     def _append_to_stereotype(self, stereotype):
-        stereotype.extended_instances_.append(self.element)
+        stereotype.extended_instances_[self.element] = None
 
     def _get_element_name_string(self):
         if is_cclass(self.element):
@@ -1,4 +1,6 @@
 from codeable_models.internal.commons import *
+from codeable_models.internal.compact_values import CompactValues
+from codeable_models.internal.model_epochs import advance_values_epoch
 
 
 class VarValueKind:
@@ -23,26 +25,43 @@ def _get_var_unknown_exception(value_kind, entity, var_name):
     return CException(f"{value_kind_str!s} '{var_name!s}' unknown for '{entity!s}'")
 
 
-def _get_and_check_var_classifier(_self, class_path, var_name, value_kind, classifier=None):
+def get_class_path_of_classifiers(classifiers):
+    if len(classifiers) == 1:
+        return classifiers[0].get_class_path_()
+    class_path = []
+    for classifier in classifiers:
+        for cl in classifier.get_class_path_():
+            if cl not in class_path:
+                class_path.append(cl)
+    return class_path
+
+
+def _get_and_check_var_classifier(_self, classifiers, var_name, value_kind, classifier=None):
     if classifier is None:
-        # search on a class path
-        for cl in class_path:
-            if cl.get_attribute(var_name) is not None:
-                return _get_and_check_var_classifier(_self, class_path, var_name, value_kind, cl)
-        raise _get_var_unknown_exception(value_kind, _self, var_name)
+        # search on the class paths of the classifiers, using their attribute indices
+        attribute = None
+        for cl in classifiers:
+            attribute = cl.get_attribute_on_class_path_(var_name)
+            if attribute is not None:
+                break
+        if attribute is None:
+            raise _get_var_unknown_exception(value_kind, _self, var_name)
     else:
         # check only on specified classifier
         attribute = classifier.get_attribute(var_name)
         if attribute is None:
             raise _get_var_unknown_exception(value_kind, classifier, var_name)
-        attribute.check_attribute_type_is_not_deleted()
-        return attribute
+    attribute.check_attribute_type_is_not_deleted()
+    return attribute
 
 
-def delete_var_value(_self, class_path, values_dict, var_name, value_kind, classifier=None):
+def delete_var_value(_self, classifiers, values_dict, var_name, value_kind, classifier=None):
     if _self.is_deleted:
         raise CException(f"can't delete '{var_name!s}' on deleted element")
-    attribute = _get_and_check_var_classifier(_self, class_path, var_name, value_kind, classifier)
+    attribute = _get_and_check_var_classifier(_self, classifiers, var_name, value_kind, classifier)
+    advance_values_epoch()
+    if isinstance(values_dict, CompactValues):
+        return values_dict.delete_value_(attribute.classifier, var_name)
     try:
         values_of_classifier = values_dict[attribute.classifier]
     except KeyError:
@@ -55,21 +74,27 @@ def delete_var_value(_self, class_path, values_dict, var_name, value_kind, class
         return None
 
 
-def set_var_value(_self, class_path, values_dict, var_name, value, value_kind, classifier=None):
+def set_var_value(_self, classifiers, values_dict, var_name, value, value_kind, classifier=None):
     if _self.is_deleted:
         raise CException(f"can't set '{var_name!s}' on deleted element")
-    attribute = _get_and_check_var_classifier(_self, class_path, var_name, value_kind, classifier)
+    attribute = _get_and_check_var_classifier(_self, classifiers, var_name, value_kind, classifier)
     attribute.check_attribute_value_type_(var_name, value)
+    advance_values_epoch()
+    if isinstance(values_dict, CompactValues):
+        values_dict.set_value_(attribute.classifier, var_name, value)
+        return
     try:
         values_dict[attribute.classifier].update({var_name: value})
     except KeyError:
         values_dict[attribute.classifier] = {var_name: value}
 
 
-def get_var_value(_self, class_path, values_dict, var_name, value_kind, classifier=None):
+def get_var_value(_self, classifiers, values_dict, var_name, value_kind, classifier=None):
     if _self.is_deleted:
         raise CException(f"can't get '{var_name!s}' on deleted element")
-    attribute = _get_and_check_var_classifier(_self, class_path, var_name, value_kind, classifier)
+    attribute = _get_and_check_var_classifier(_self, classifiers, var_name, value_kind, classifier)
+    if isinstance(values_dict, CompactValues):
+        return values_dict.get_value_(attribute.classifier, var_name)
     try:
         values_of_classifier = values_dict[attribute.classifier]
     except KeyError:
@@ -80,9 +105,11 @@ def get_var_value(_self, class_path, values_dict, var_name, value_kind, classifi
         return None
 
 
-def get_var_values(class_path, values_dict):
+def get_var_values(classifiers, values_dict):
+    if isinstance(values_dict, CompactValues):
+        values_dict = values_dict.to_dict_()
     result = {}
-    for cl in class_path:
+    for cl in get_class_path_of_classifiers(classifiers):
         if cl in values_dict:
             for attrName in values_dict[cl]:
                 if attrName not in result:
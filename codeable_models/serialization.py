@@ -0,0 +1,1266 @@
+"""
+Serialization of models to a line based JSON format (`JSON Lines <https://jsonlines.org>`_), so that models
+can be stored and loaded again without re-executing the Python scripts defining them.
+
+Import it with::
+
+    from codeable_models.serialization import dump, load
+
+The first line of the format is a header. Each following line contains one JSON record, which either creates an
+element or sets the relations and values of already created elements. Elements are numbered in the order in which
+they are created, and references to elements are stored as ``{"ref": <number>}``. The records are written in an
+order in which each record only refers to elements created before, so that both :py:func:`dump` and
+:py:func:`load` process the model record by record and never build an intermediate document of the whole model.
+
+For large object models, :py:func:`save_snapshot` writes a binary snapshot instead, which
+:py:func:`load_snapshot` memory-maps and reads lazily: objects and links are only created when they are accessed.
+"""
+import io
+import json
+import mmap
+import os
+import struct
+import sys
+import uuid
+from array import array
+
+from codeable_models.cassociation import CAssociation
+from codeable_models.cattribute import CAttribute
+from codeable_models.cbundle import CBundle, CPackage, CLayer
+from codeable_models.cclass import CClass
+from codeable_models.cclassifier import CClassifier
+from codeable_models.cenum import CEnum
+from codeable_models.cexception import CException
+from codeable_models.clink import CLink
+from codeable_models.cmetaclass import CMetaclass
+from codeable_models.cnamedelement import CNamedElement
+from codeable_models.cobject import CObject
+from codeable_models.cstereotype import CStereotype
+from codeable_models.internal.compact_values import CompactValues
+from codeable_models.internal.lazy_slots import add_lazy_element, load_lazy_slots, get_element_class
+from codeable_models.internal.model_epochs import advance_hierarchy_epoch, advance_attributes_epoch, \
+    advance_associations_epoch, advance_values_epoch
+from codeable_models.internal.name_index import next_sequence_number, reserve_sequence_numbers
+from codeable_models.internal.stereotype_holders import CStereotypeInstancesHolder
+
+FORMAT_NAME = "codeable_models"
+FORMAT_VERSION = 1
+
+_ATTRIBUTE_TYPE_NAMES = {bool: "bool", int: "int", float: "float", str: "str", list: "list"}
+_ATTRIBUTE_TYPES = {name: attribute_type for attribute_type, name in _ATTRIBUTE_TYPE_NAMES.items()}
+_BUNDLE_KINDS = {"CBundle": CBundle, "CPackage": CPackage, "CLayer": CLayer}
+_RECORD_ENCODER = json.JSONEncoder(separators=(",", ":"))
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+_SNAPSHOT_MAGIC = b"CMSNAPSH"
+# magic, format version, byte order (0: little, 1: big endian), number of element ids, first object id,
+# first link id, followed by the offset and length of each section
+_SNAPSHOT_HEADER = struct.Struct("<8sIIqqq")
+_SNAPSHOT_SECTION = struct.Struct("<qq")
+# one 32 bit integer per element id, -1 if not applicable: the classifiers and names (indices into the string
+# table) of objects and links, and the sources, targets, and labels of links
+_SNAPSHOT_COLUMNS = ("classifiers", "names", "sources", "targets", "labels")
+# one list of element ids per element id, stored as an array of 32 bit integers and an array of the 64 bit
+# offsets at which the list of each element id starts: the objects of classes, the elements of bundles, the
+# extended instances of stereotypes, the bundles and links of objects and links, and the stereotype instances of
+# links
+_SNAPSHOT_RELATIONS = ("objects", "elements", "extended_instances", "bundles", "links", "stereotype_instances")
+# the binary encoded attribute values of objects and links, and the tagged values of links, with 64 bit offsets
+_SNAPSHOT_VALUES = ("values", "tagged_values")
+_SNAPSHOT_SECTIONS = (("meta", "strings", "string_offsets") + _SNAPSHOT_COLUMNS +
+                      tuple(section for name in _SNAPSHOT_RELATIONS + _SNAPSHOT_VALUES
+                            for section in (name, name + "_offsets")))
+_SNAPSHOT_BYTE_ORDER = 0 if sys.byteorder == "little" else 1
+
+# values are stored as classifier id and name, followed by a tag byte and the value's data
+_VALUE_ENTRY = struct.Struct("=ii")
+_VALUE_TAG = struct.Struct("=B")
+_VALUE_INT = struct.Struct("=Bq")
+_VALUE_FLOAT = struct.Struct("=Bd")
+_VALUE_INDEX = struct.Struct("=Bi")
+_NONE_TAG, _FALSE_TAG, _TRUE_TAG, _INT_TAG, _LONG_INT_TAG, _FLOAT_TAG, _STR_TAG, _LIST_TAG, _REF_TAG = range(9)
+
+
+def dump(elements, file):
+    """
+    Function used to write a model to a text file. The model written is the closure of the ``elements``,
+    i.e. the elements and all elements they depend on: the elements of bundles, the classifiers of objects,
+    the meta-classes of classes, superclasses, associations and their source and target classifiers,
+    the associations that associations are derived from, stereotypes, attribute types, elements referenced
+    in attribute values, tagged values, and default values, and the links of objects (including the objects
+    linked by them). Relations to elements outside the closure, e.g. to subclasses, instances, or bundles
+    that are not part of it, are not written.
+
+    Args:
+        elements: An iterable of model elements, or a single model element.
+        file: A text file (or any object with a ``write`` method accepting strings) to write to.
+
+    Returns:
+        None
+
+    **Example:**
+
+    Write a model defined by its bundles to a file::
+
+        with open("model.jsonl", "w") as file:
+            dump([metamodel_bundle, model_bundle], file)
+
+    """
+    for record in _ModelWriter(elements).records():
+        file.write(_RECORD_ENCODER.encode(record) + "\n")
+
+
+def dumps(elements):
+    """
+    Same as :py:func:`dump`, but returns the serialized model as a string.
+
+    Args:
+        elements: An iterable of model elements, or a single model element.
+
+    Returns:
+        str: The serialized model.
+
+    """
+    output = io.StringIO()
+    dump(elements, output)
+    return output.getvalue()
+
+
+def load(file):
+    """
+    Function used to read a model written with :py:func:`dump`. All elements of the model are newly created.
+    The file is read line by line, and each record is applied to the model as soon as it is read.
+
+    Args:
+        file: A text file (or any iterable of lines) to read from.
+
+    Returns:
+        list: The newly created counterparts of the elements passed to :py:func:`dump`, in the same order.
+
+    **Example:**
+
+    Read the model written in the example of :py:func:`dump`::
+
+        with open("model.jsonl") as file:
+            metamodel_bundle, model_bundle = load(file)
+
+    """
+    return _ModelReader().read(file)
+
+
+def loads(string):
+    """
+    Same as :py:func:`load`, but reads the model from a string.
+
+    Args:
+        string (str): A model serialized with :py:func:`dump` or :py:func:`dumps`.
+
+    Returns:
+        list: The newly created counterparts of the elements passed to :py:func:`dump`, in the same order.
+
+    """
+    return load(io.StringIO(string))
+
+
+def save_snapshot(elements, path):
+    """
+    Function used to write a model to a binary snapshot file, which can be loaded lazily with
+    :py:func:`load_snapshot`. The model written is the same closure of the ``elements`` as written by
+    :py:func:`dump`. Bundles, meta-classes, classes, stereotypes, associations, and their values are stored as
+    in :py:func:`dump`; objects and links are stored in binary tables, which are read without parsing the file:
+    a string table, columns with the classifier, name, source, and target of each object and link, arrays of the
+    links of each object and of the objects of each class, and binary encoded attribute values.
+
+    Args:
+        elements: An iterable of model elements, or a single model element.
+        path (str): The path of the snapshot file to write.
+
+    Returns:
+        None
+
+    """
+    writer = _SnapshotWriter(elements)
+    sections = writer.sections()
+    header_size = _SNAPSHOT_HEADER.size + _SNAPSHOT_SECTION.size * len(sections)
+    # the snapshot is written to a new file that then replaces the file at path, as the old file might still be
+    # memory-mapped by lazily loaded models, which must not see it truncated or changed
+    temporary_path = f"{path!s}.{uuid.uuid4().hex!s}.tmp"
+    try:
+        with open(temporary_path, "xb") as file:
+            file.write(bytes(header_size))
+            section_table = []
+            for section in sections:
+                # sections are aligned to 8 bytes, so that they can be read as arrays in place
+                file.write(bytes(-file.tell() % 8))
+                section_table.append(_SNAPSHOT_SECTION.pack(file.tell(), memoryview(section).nbytes))
+                file.write(section)
+            file.seek(0)
+            file.write(_SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, _SNAPSHOT_BYTE_ORDER,
+                                             writer.element_count_, writer.first_object_id_, writer.first_link_id_))
+            file.write(b"".join(section_table))
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+
+def load_snapshot(path, lazy=True):
+    """
+    Function used to read a model written with :py:func:`save_snapshot`. The snapshot file is memory-mapped.
+    Bundles, meta-classes, classes, stereotypes, and associations are created when the snapshot is loaded.
+    If ``lazy`` is ``True``, objects and links are only created once they are accessed, e.g. via the
+    objects of a class, the links of an object, ``get_linked()``, or a value referring to them, and the
+    attribute values and links of an object are only read when they are accessed for the first time. Thus,
+    loading a snapshot takes about the same time regardless of the number of objects and links it contains.
+
+    The snapshot file must not be changed while a lazily loaded model is in use. :py:func:`save_snapshot` does
+    not change it, but replaces it with a new file, so that a model can be saved to the snapshot it was loaded from.
+    The file of a lazily loaded model is closed once the model is freed. Use :py:func:`open_snapshot` to close it
+    earlier. If ``lazy`` is ``False``, the file is closed before the function returns.
+
+    Args:
+        path (str): The path of the snapshot file to read.
+        lazy (bool): If ``False``, all elements are read when the snapshot is loaded.
+
+    Returns:
+        list: The newly created counterparts of the elements passed to :py:func:`save_snapshot`, in the same
+        order.
+
+    **Example:**
+
+    Write a model to a snapshot, and load it again::
+
+        save_snapshot([metamodel_bundle, model_bundle], "model.snapshot")
+        metamodel_bundle, model_bundle = load_snapshot("model.snapshot")
+
+    """
+    snapshot = open_snapshot(path)
+    if not lazy:
+        snapshot.close()
+    return snapshot.elements
+
+
+def open_snapshot(path):
+    """
+    Function used to read a model written with :py:func:`save_snapshot` lazily, as :py:func:`load_snapshot`
+    does, so that the snapshot file can be closed explicitly later on.
+
+    Args:
+        path (str): The path of the snapshot file to read.
+
+    Returns:
+        Snapshot: The opened snapshot, providing the loaded elements.
+
+    **Example:**
+
+    Load a model from a snapshot, and close the snapshot file after using the model::
+
+        with open_snapshot("model.snapshot") as snapshot:
+            metamodel_bundle, model_bundle = snapshot.elements
+            ...
+
+    """
+    reader = _SnapshotReader(path)
+    try:
+        elements = reader.read()
+    except BaseException:
+        reader.release_()
+        raise
+    return Snapshot(reader, elements)
+
+
+class Snapshot(object):
+    def __init__(self, reader, elements):
+        """
+        ``Snapshot`` is used to manage a model loaded lazily from a snapshot file with :py:func:`open_snapshot`.
+        It can be used as a context manager, which closes the snapshot on exit.
+        """
+        self.reader_ = reader
+        self.elements_ = elements
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def elements(self):
+        """list: Getter for the newly created counterparts of the elements passed to :py:func:`save_snapshot`,
+        in the same order."""
+        return list(self.elements_)
+
+    @property
+    def closed(self):
+        """bool: Getter that returns ``True`` if the snapshot is closed."""
+        return self.reader_ is None
+
+    def close(self):
+        """
+        Reads all parts of the model that have not been read yet, and closes the snapshot file. Afterwards, the
+        model no longer refers to the snapshot, and can be used as any other model. Closing a closed snapshot
+        has no effect.
+
+        Returns:
+            None
+
+        """
+        if self.reader_ is not None:
+            self.reader_.close_()
+            self.reader_ = None
+
+
+def _get_values_dict(values):
+    if isinstance(values, CompactValues):
+        return values.to_dict_()
+    return values
+
+
+def _add_value_dependencies(dependencies, value):
+    if isinstance(value, list):
+        for v in value:
+            _add_value_dependencies(dependencies, v)
+    elif isinstance(value, CNamedElement):
+        dependencies.append(value)
+
+
+def _add_values_dependencies(dependencies, values):
+    # values are stored in dicts of the form {classifier: {name: value}}; values kept for a
+    # classifier that has been deleted in the meantime are not part of the model anymore
+    for classifier, values_of_classifier in _get_values_dict(values).items():
+        if not classifier.is_deleted:
+            dependencies.append(classifier)
+            for value in values_of_classifier.values():
+                _add_value_dependencies(dependencies, value)
+
+
+def _get_dependencies(element):
+    dependencies = []
+    if isinstance(element, CBundle):
+        dependencies.extend(element.elements_)
+    elif isinstance(element, CObject):
+        if isinstance(element, CLink):
+            dependencies.extend([element.association, element.source_, element.target_])
+            dependencies.extend(element.stereotype_instances_holder.stereotypes_)
+            _add_values_dependencies(dependencies, element.tagged_values_)
+        else:
+            dependencies.append(element.classifier_)
+        _add_values_dependencies(dependencies, element.attribute_values)
+        dependencies.extend(element.links_)
+    elif isinstance(element, CClassifier):
+        dependencies.extend(element.superclasses_)
+        dependencies.extend(element.associations_)
+        for attribute in element.attributes_.values():
+            _add_value_dependencies(dependencies, attribute.type_)
+            _add_value_dependencies(dependencies, attribute.default_)
+        if isinstance(element, CStereotype):
+            dependencies.extend(element.extended_)
+            _add_values_dependencies(dependencies, element.default_values_)
+        elif isinstance(element, CClass):
+            dependencies.append(element.metaclass_)
+            dependencies.extend(element.stereotype_instances_holder.stereotypes_)
+            _add_values_dependencies(dependencies, element.tagged_values_)
+            _add_values_dependencies(dependencies, element.class_object_.attribute_values)
+            dependencies.extend(element.class_object_.links_)
+        elif isinstance(element, CAssociation):
+            dependencies.extend([element.source, element.target])
+            if element.derived_from_ is not None:
+                dependencies.append(element.derived_from_)
+            dependencies.extend(element.stereotype_instances_holder.stereotypes_)
+            _add_values_dependencies(dependencies, element.tagged_values_)
+    return dependencies
+
+
+def _order_links(links, link_holders):
+    # Links are created in an order that keeps the order of the links of each object, and creates links that are
+    # source or target of other links first. This is a topological sort of the links, computed by an iterative
+    # depth-first search along the links that have to be created before each link.
+    predecessors = {link: [] for link in links}
+    for holder in link_holders:
+        previous = None
+        for link in holder.links_:
+            if previous is not None:
+                predecessors[link].append(previous)
+            previous = link
+    for link in links:
+        for end in (link.source_, link.target_):
+            if isinstance(end, CLink):
+                predecessors[link].append(end)
+    ordered_links = {}
+    for link in links:
+        if link in ordered_links:
+            continue
+        on_stack = {link}
+        stack = [(link, iter(predecessors[link]))]
+        while stack:
+            current, remaining_predecessors = stack[-1]
+            for predecessor in remaining_predecessors:
+                if predecessor not in ordered_links and predecessor not in on_stack:
+                    on_stack.add(predecessor)
+                    stack.append((predecessor, iter(predecessors[predecessor])))
+                    break
+            else:
+                stack.pop()
+                ordered_links[current] = None
+    return list(ordered_links)
+
+
+class _ModelWriter(object):
+    def __init__(self, elements):
+        if isinstance(elements, CNamedElement):
+            elements = [elements]
+        self.roots_ = list(elements)
+        self.ids_ = {}
+        self.max_reference_ = -1
+        self.bundles_ = []
+        self.enums_ = []
+        self.metaclasses_ = []
+        self.stereotypes_ = []
+        self.classes_ = []
+        self.associations_ = []
+        self.objects_ = []
+        self.links_ = []
+        self._collect_closure()
+
+    @staticmethod
+    def _get_element_of_class_object(element):
+        if isinstance(element, CObject) and element.class_object_class_ is not None:
+            return element.class_object_class_
+        return element
+
+    def _collect_closure(self):
+        closure = {}
+        stack = list(reversed(self.roots_))
+        while stack:
+            element = self._get_element_of_class_object(stack.pop())
+            if not isinstance(element, CNamedElement):
+                raise CException(f"'{element!s}' is not a model element and cannot be serialized")
+            if element in closure:
+                continue
+            if element.is_deleted:
+                raise CException("can't serialize deleted element")
+            closure[element] = None
+            stack.extend(reversed(_get_dependencies(element)))
+
+        for element in closure:
+            if isinstance(element, CLink):
+                self.links_.append(element)
+            elif isinstance(element, CObject):
+                self.objects_.append(element)
+            elif isinstance(element, CBundle):
+                self.bundles_.append(element)
+            elif isinstance(element, CEnum):
+                self.enums_.append(element)
+            elif isinstance(element, CMetaclass):
+                self.metaclasses_.append(element)
+            elif isinstance(element, CStereotype):
+                self.stereotypes_.append(element)
+            elif isinstance(element, CClass):
+                self.classes_.append(element)
+            elif isinstance(element, CAssociation):
+                self.associations_.append(element)
+            else:
+                raise CException(f"can't serialize element '{element!s}' of type '{type(element).__name__!s}'")
+
+        # classes and objects are created in the order in which they were added to their meta-classes and
+        # classes, as the sequence numbers recorded there are increasing model-wide
+        self.classes_.sort(key=lambda cl: cl.metaclass_.classes_[cl])
+        self.objects_.sort(key=lambda obj: obj.classifier_.objects_[obj])
+        self.links_ = _order_links(self.links_, self.objects_ + [cl.class_object_ for cl in self.classes_] +
+                                   self.links_)
+
+        for elements in (self.bundles_, self.enums_, self.metaclasses_, self.stereotypes_, self.classes_,
+                         self.associations_, self.objects_, self.links_):
+            for element in elements:
+                self.ids_[element] = len(self.ids_)
+                if isinstance(element, CClass):
+                    # the class object of a class is numbered right after the class, as it is created with it
+                    self.ids_[element.class_object_] = len(self.ids_)
+
+    def _get_ids(self, elements):
+        return [self.ids_[element] for element in elements if element in self.ids_]
+
+    def _encode_reference(self, element):
+        try:
+            element_id = self.ids_[element]
+        except KeyError:
+            raise CException(f"can't serialize reference to '{element!s}': element is not part of the model")
+        if element_id > self.max_reference_:
+            self.max_reference_ = element_id
+        return {"ref": element_id}
+
+    def _encode_value(self, value):
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if isinstance(value, list):
+            return [self._encode_value(v) for v in value]
+        if isinstance(value, CNamedElement):
+            return self._encode_reference(value)
+        raise CException(f"can't serialize value '{value!r}'")
+
+    def _encode_values(self, values):
+        return [[self.ids_[classifier], name, self._encode_value(value)]
+                for classifier, values_of_classifier in _get_values_dict(values).items()
+                if classifier in self.ids_
+                for name, value in values_of_classifier.items()]
+
+    def _encode_attribute_type(self, attribute_type):
+        if attribute_type is None or isinstance(attribute_type, CNamedElement):
+            return self._encode_value(attribute_type)
+        try:
+            return _ATTRIBUTE_TYPE_NAMES[attribute_type]
+        except KeyError:
+            raise CException(f"can't serialize attribute type '{attribute_type!s}'")
+
+    def _add_bundles(self, record, element):
+        bundles = self._get_ids(element.bundles_)
+        if bundles:
+            record["bundles"] = bundles
+        return record
+
+    def records(self):
+        yield {"format": FORMAT_NAME, "version": FORMAT_VERSION}
+        yield from self._element_records()
+
+        # attribute defaults referring to objects or links are set once these are created
+        first_object_id = len(self.ids_) - len(self.objects_) - len(self.links_)
+        deferred_defaults = []
+        yield from self._classifier_records(first_object_id, deferred_defaults)
+
+        # values referring to objects or links created later on are set once these are created
+        deferred_values = []
+        for obj in self.objects_:
+            record = {"type": "object", "id": self.ids_[obj], "name": obj.name_,
+                      "class": self.ids_[obj.classifier_]}
+            self.max_reference_ = -1
+            values = self._encode_values(obj.attribute_values)
+            if self.max_reference_ <= record["id"]:
+                if values:
+                    record["values"] = values
+            else:
+                deferred_values.append(obj)
+            yield self._add_bundles(record, obj)
+        for link in self.links_:
+            record = {"type": "link", "id": self.ids_[link], "association": self.ids_[link.association],
+                      "source": self.ids_[link.source_], "target": self.ids_[link.target_]}
+            if link.label is not None:
+                record["label"] = link.label
+            stereotype_instances = self._get_ids(link.stereotype_instances_holder.stereotypes_)
+            if stereotype_instances:
+                record["stereotype_instances"] = stereotype_instances
+            self.max_reference_ = -1
+            values = self._encode_values(link.attribute_values)
+            tagged_values = self._encode_values(link.tagged_values_)
+            if self.max_reference_ <= record["id"]:
+                if values:
+                    record["values"] = values
+                if tagged_values:
+                    record["tagged_values"] = tagged_values
+            else:
+                deferred_values.append(link)
+            yield self._add_bundles(record, link)
+
+        for attribute in deferred_defaults:
+            yield {"type": "default", "id": self.ids_[attribute.classifier_], "name": attribute.name_,
+                   "value": self._encode_value(attribute.default_)}
+        yield from self._values_records(self.stereotypes_ + self.classes_ + self.associations_ + deferred_values)
+        for bundle in self.bundles_:
+            yield self._get_elements_record(bundle, True)
+
+        yield self._get_roots_record()
+
+    def _element_records(self):
+        for bundle in self.bundles_:
+            yield {"type": "bundle", "id": self.ids_[bundle], "kind": get_element_class(bundle).__name__,
+                   "name": bundle.name_}
+        for enum in self.enums_:
+            yield self._add_bundles({"type": "enum", "id": self.ids_[enum], "name": enum.name_,
+                                     "values": enum.values_}, enum)
+        for metaclass in self.metaclasses_:
+            yield self._add_bundles({"type": "metaclass", "id": self.ids_[metaclass], "name": metaclass.name_},
+                                    metaclass)
+        for stereotype in self.stereotypes_:
+            yield self._add_bundles({"type": "stereotype", "id": self.ids_[stereotype], "name": stereotype.name_},
+                                    stereotype)
+        for cl in self.classes_:
+            record = {"type": "class", "id": self.ids_[cl], "name": cl.name_, "metaclass": self.ids_[cl.metaclass_]}
+            if cl.compact_values_:
+                record["compact_values"] = True
+            class_object_bundles = self._get_ids(cl.class_object_.bundles_)
+            if class_object_bundles:
+                record["class_object_bundles"] = class_object_bundles
+            yield self._add_bundles(record, cl)
+        for association in self.associations_:
+            yield self._add_bundles({"type": "association", "id": self.ids_[association],
+                                     "name": association.name_,
+                                     "source": self.ids_[association.source],
+                                     "target": self.ids_[association.target],
+                                     "multiplicity": association.multiplicity_,
+                                     "role_name": association.role_name_,
+                                     "source_multiplicity": association.source_multiplicity_,
+                                     "source_role_name": association.source_role_name_,
+                                     "aggregation": association.aggregation_,
+                                     "composition": association.composition_}, association)
+
+    def _classifier_records(self, first_object_id, deferred_defaults):
+        for classifier in self.metaclasses_ + self.stereotypes_ + self.classes_ + self.associations_:
+            record = self._get_classifier_record(classifier, first_object_id, deferred_defaults)
+            if len(record) > 2:
+                yield record
+
+    def _values_records(self, elements):
+        for element in elements:
+            record = self._get_values_record(element)
+            if len(record) > 2:
+                yield record
+
+    def _get_elements_record(self, bundle, with_elements):
+        record = {"type": "elements", "id": self.ids_[bundle]}
+        if with_elements:
+            record["elements"] = self._get_ids(bundle.elements_)
+        self._add_bundles(record, bundle)
+        if isinstance(bundle, CLayer) and bundle.sub_layer in self.ids_:
+            record["sub_layer"] = self.ids_[bundle.sub_layer]
+        return record
+
+    def _get_roots_record(self):
+        return {"type": "roots", "ids": [self.ids_[element] for element in self.roots_]}
+
+    def _get_classifier_record(self, classifier, first_object_id, deferred_defaults):
+        record = {"type": "classifier", "id": self.ids_[classifier]}
+        if classifier.superclasses_:
+            record["superclasses"] = self._get_ids(classifier.superclasses_)
+        subclasses = self._get_ids(classifier.subclasses_)
+        if subclasses:
+            record["subclasses"] = subclasses
+        if classifier.attributes_:
+            attributes = []
+            for attribute in classifier.attributes_.values():
+                self.max_reference_ = -1
+                default = self._encode_value(attribute.default_)
+                if self.max_reference_ >= first_object_id:
+                    default = None
+                    deferred_defaults.append(attribute)
+                attributes.append([attribute.name_, self._encode_attribute_type(attribute.type_), default])
+            record["attributes"] = attributes
+        if classifier.associations_:
+            record["associations"] = self._get_ids(classifier.associations_)
+        if isinstance(classifier, (CMetaclass, CAssociation)):
+            stereotypes = self._get_ids(classifier.stereotypes_holder.stereotypes_)
+            if stereotypes:
+                record["stereotypes"] = stereotypes
+        if isinstance(classifier, CStereotype) and classifier.extended_:
+            record["extended"] = self._get_ids(classifier.extended_)
+        if isinstance(classifier, CAssociation):
+            if classifier.derived_from_ is not None:
+                record["derived_from"] = self.ids_[classifier.derived_from_]
+            derived_associations = self._get_ids(classifier.derived_associations_)
+            if derived_associations:
+                record["derived_associations"] = derived_associations
+        return record
+
+    def _get_values_record(self, element):
+        record = {"type": "values", "id": self.ids_[element]}
+        if isinstance(element, CStereotype):
+            default_values = self._encode_values(element.default_values_)
+            if default_values:
+                record["default_values"] = default_values
+            extended_instances = self._get_ids(element.extended_instances_)
+            if extended_instances:
+                record["extended_instances"] = extended_instances
+            return record
+        if isinstance(element, CClass):
+            values = self._encode_values(element.class_object_.attribute_values)
+        elif isinstance(element, CAssociation):
+            values = None
+        else:
+            values = self._encode_values(element.attribute_values)
+        if values:
+            record["values"] = values
+        if isinstance(element, (CClass, CAssociation)):
+            stereotype_instances = self._get_ids(element.stereotype_instances_holder.stereotypes_)
+            if stereotype_instances:
+                record["stereotype_instances"] = stereotype_instances
+        if isinstance(element, (CClass, CAssociation, CLink)):
+            tagged_values = self._encode_values(element.tagged_values_)
+            if tagged_values:
+                record["tagged_values"] = tagged_values
+        return record
+
+
+class _ModelReader(object):
+    def __init__(self):
+        self.elements_ = []
+        self.roots_ = None
+        self.classifiers_changed_ = False
+        self.record_readers_ = {
+            "bundle": self._read_bundle,
+            "enum": self._read_enum,
+            "metaclass": self._read_metaclass,
+            "stereotype": self._read_stereotype,
+            "class": self._read_class,
+            "association": self._read_association,
+            "classifier": self._read_classifier,
+            "object": self._read_object,
+            "link": self._read_link,
+            "default": self._read_default,
+            "values": self._read_values,
+            "elements": self._read_elements,
+            "roots": self._read_roots,
+        }
+
+    def read(self, file):
+        header_read = False
+        for line_number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            record = self._parse_record(line_number, line)
+            if not header_read:
+                self._check_header(record)
+                header_read = True
+                continue
+            self._read_record(line_number, line, record)
+        return self._finish()
+
+    @staticmethod
+    def _parse_record(line_number, line):
+        try:
+            return json.loads(line)
+        except ValueError as e:
+            raise CException(f"malformed record in line {line_number!s}: {e!s}")
+
+    def _read_record(self, line_number, line, record):
+        try:
+            record_reader = self.record_readers_[record["type"]]
+        except (KeyError, TypeError):
+            raise CException(f"unknown record in line {line_number!s}: '{line.strip()!s}'")
+        record_reader(record)
+
+    def _finish(self):
+        if self.roots_ is None:
+            raise CException("incomplete serialized model: end of model not found")
+        advance_hierarchy_epoch()
+        advance_attributes_epoch()
+        advance_associations_epoch()
+        advance_values_epoch()
+        return self.roots_
+
+    @staticmethod
+    def _check_header(record):
+        if not isinstance(record, dict) or record.get("format") != FORMAT_NAME:
+            raise CException("not a serialized model: header not found")
+        if record.get("version") != FORMAT_VERSION:
+            raise CException(f"unsupported serialization format version: '{record.get('version')!s}'")
+
+    def _get(self, element_id):
+        if not isinstance(element_id, int) or not 0 <= element_id < len(self.elements_):
+            raise CException(f"unknown element id: '{element_id!s}'")
+        return self.elements_[element_id]
+
+    def _get_all(self, element_ids):
+        return [self._get(element_id) for element_id in element_ids]
+
+    def _add(self, record, element):
+        if record["id"] != len(self.elements_):
+            raise CException(f"unexpected element id: '{record['id']!s}'")
+        self.elements_.append(element)
+        if "bundles" in record:
+            element.bundles_ = self._get_all(record["bundles"])
+        return element
+
+    def _decode_value(self, value):
+        if isinstance(value, list):
+            return [self._decode_value(v) for v in value]
+        if isinstance(value, dict):
+            return self._get(value["ref"])
+        return value
+
+    def _decode_values(self, encoded_values):
+        values = {}
+        for classifier_id, name, value in encoded_values:
+            values.setdefault(self._get(classifier_id), {})[name] = self._decode_value(value)
+        return values
+
+    def _decode_attribute_type(self, attribute_type):
+        if attribute_type is None or isinstance(attribute_type, dict):
+            return self._decode_value(attribute_type)
+        try:
+            return _ATTRIBUTE_TYPES[attribute_type]
+        except KeyError:
+            raise CException(f"unknown attribute type: '{attribute_type!s}'")
+
+    def _set_attribute_values(self, obj, encoded_values):
+        values = self._decode_values(encoded_values)
+        if isinstance(obj.attribute_values, CompactValues):
+            obj.attribute_values = CompactValues.from_dict_(obj, values)
+        else:
+            obj.attribute_values = values
+
+    def _read_bundle(self, record):
+        try:
+            bundle_class = _BUNDLE_KINDS[record["kind"]]
+        except KeyError:
+            raise CException(f"unknown bundle kind: '{record['kind']!s}'")
+        self._add(record, bundle_class(record["name"]))
+
+    def _read_enum(self, record):
+        self._add(record, CEnum(record["name"], values=record["values"]))
+
+    def _read_metaclass(self, record):
+        self._add(record, CMetaclass(record["name"]))
+
+    def _read_stereotype(self, record):
+        self._add(record, CStereotype(record["name"]))
+
+    def _read_class(self, record):
+        cl = self._add(record, CClass(self._get(record["metaclass"]), record["name"],
+                                      compact_values=record.get("compact_values", False)))
+        self.elements_.append(cl.class_object_)
+        if "class_object_bundles" in record:
+            cl.class_object_.bundles_ = self._get_all(record["class_object_bundles"])
+
+    def _read_association(self, record):
+        self._add(record, CAssociation(self._get(record["source"]), self._get(record["target"]),
+                                       name=record["name"], multiplicity=record["multiplicity"],
+                                       role_name=record["role_name"],
+                                       source_multiplicity=record["source_multiplicity"],
+                                       source_role_name=record["source_role_name"],
+                                       aggregation=record["aggregation"], composition=record["composition"]))
+
+    def _read_classifier(self, record):
+        classifier = self._get(record["id"])
+        if "superclasses" in record:
+            classifier.superclasses_ = self._get_all(record["superclasses"])
+        if "subclasses" in record:
+            classifier.subclasses_ = self._get_all(record["subclasses"])
+        if "attributes" in record:
+            attributes = {}
+            for name, attribute_type, default in record["attributes"]:
+                attribute = CAttribute()
+                attribute.name_ = name
+                attribute.classifier_ = classifier
+                attribute.type_ = self._decode_attribute_type(attribute_type)
+                attribute.default_ = self._decode_value(default)
+                attributes[name] = attribute
+            classifier.attributes_ = attributes
+        if "associations" in record:
+            classifier.associations_ = self._get_all(record["associations"])
+        if "stereotypes" in record:
+            classifier.stereotypes_holder.stereotypes_ = self._get_all(record["stereotypes"])
+        if "extended" in record:
+            classifier.extended_ = self._get_all(record["extended"])
+        if "derived_from" in record:
+            classifier.derived_from_ = self._get(record["derived_from"])
+        if "derived_associations" in record:
+            classifier.derived_associations_ = self._get_all(record["derived_associations"])
+        self.classifiers_changed_ = True
+
+    def _check_classifiers_changed(self):
+        # the classifiers are changed without using their setters, so that caches derived from them, such as
+        # class paths and attribute layouts, have to be invalidated before objects of the classifiers are created
+        if self.classifiers_changed_:
+            self.classifiers_changed_ = False
+            advance_hierarchy_epoch()
+            advance_attributes_epoch()
+
+    def _read_object(self, record):
+        self._check_classifiers_changed()
+        obj = self._add(record, CObject(self._get(record["class"]), record["name"]))
+        # replace the default values set by the constructor with the values of the serialized object
+        self._set_attribute_values(obj, record.get("values", []))
+
+    def _read_link(self, record):
+        self._check_classifiers_changed()
+        source = self._get(record["source"])
+        target = self._get(record["target"])
+        link = self._add(record, CLink(self._get(record["association"]), source, target))
+        source.add_link_(link)
+        if target is not source:
+            target.add_link_(link)
+        link.label = record.get("label")
+        link.stereotype_instances_holder.stereotypes_ = self._get_all(record.get("stereotype_instances", []))
+        self._set_attribute_values(link, record.get("values", []))
+        link.tagged_values_ = self._decode_values(record.get("tagged_values", []))
+
+    def _read_default(self, record):
+        attribute = self._get(record["id"]).attributes_[record["name"]]
+        attribute.default_ = self._decode_value(record["value"])
+
+    def _read_values(self, record):
+        element = self._get(record["id"])
+        if "values" in record:
+            obj = element.class_object_ if isinstance(element, CClass) else element
+            self._set_attribute_values(obj, record["values"])
+        if "stereotype_instances" in record:
+            element.stereotype_instances_holder.stereotypes_ = self._get_all(record["stereotype_instances"])
+        if "tagged_values" in record:
+            element.tagged_values_ = self._decode_values(record["tagged_values"])
+        if "default_values" in record:
+            element.default_values_ = self._decode_values(record["default_values"])
+        if "extended_instances" in record:
+            element.extended_instances_ = dict.fromkeys(self._get_all(record["extended_instances"]))
+
+    def _read_elements(self, record):
+        bundle = self._get(record["id"])
+        if "bundles" in record:
+            bundle.bundles_ = self._get_all(record["bundles"])
+        bundle.clear_elements_()
+        bundle.elements_ = {element: next_sequence_number() for element in self._get_all(record["elements"])}
+        if "sub_layer" in record:
+            bundle.sub_layer = self._get(record["sub_layer"])
+
+    def _read_roots(self, record):
+        self.roots_ = self._get_all(record["ids"])
+
+
+class _SnapshotWriter(_ModelWriter):
+    def __init__(self, elements):
+        super().__init__(elements)
+        self.element_count_ = len(self.ids_)
+        self.first_link_id_ = self.element_count_ - len(self.links_)
+        self.first_object_id_ = self.first_link_id_ - len(self.objects_)
+        self.strings_ = {}
+        self.string_data_ = bytearray()
+        self.string_offsets_ = array("q", [0])
+        self.columns_ = {name: array("i", [-1]) * self.element_count_ for name in _SNAPSHOT_COLUMNS}
+        self.sequences_ = {name: (array("i"), array("q", [0])) for name in _SNAPSHOT_RELATIONS}
+        self.sequences_.update({name: (bytearray(), array("q", [0])) for name in _SNAPSHOT_VALUES})
+
+    def sections(self):
+        meta = "".join(_RECORD_ENCODER.encode(record) + "\n" for record in self._meta_records())
+        for element, element_id in self.ids_.items():
+            self._add_element(element, element_id)
+        sections = [meta.encode("utf-8"), self.string_data_, self.string_offsets_]
+        sections.extend(self.columns_[name] for name in _SNAPSHOT_COLUMNS)
+        for name in _SNAPSHOT_RELATIONS + _SNAPSHOT_VALUES:
+            sections.extend(self.sequences_[name])
+        return sections
+
+    def _meta_records(self):
+        # the records of dump() without objects, links, and the elements of bundles; as objects and links can be
+        # referred to as soon as the snapshot is opened, no attribute defaults have to be deferred
+        yield from self._element_records()
+        yield from self._classifier_records(self.element_count_, [])
+        yield from self._values_records(self.stereotypes_ + self.classes_ + self.associations_)
+        for bundle in self.bundles_:
+            record = self._get_elements_record(bundle, False)
+            if len(record) > 2:
+                yield record
+        yield self._get_roots_record()
+
+    def _get_values_record(self, element):
+        record = super()._get_values_record(element)
+        # the extended instances of stereotypes are stored in the binary tables, as they can be links
+        record.pop("extended_instances", None)
+        return record
+
+    def _get_string(self, string):
+        if string is None:
+            return -1
+        try:
+            return self.strings_[string]
+        except KeyError:
+            index = self.strings_[string] = len(self.strings_)
+            self.string_data_ += string.encode("utf-8")
+            self.string_offsets_.append(len(self.string_data_))
+            return index
+
+    def _add_element(self, element, element_id):
+        relations = {}
+        values = {}
+        if isinstance(element, CClass):
+            relations["objects"] = element.objects_
+        elif isinstance(element, CBundle):
+            relations["elements"] = element.elements_
+        elif isinstance(element, CStereotype):
+            relations["extended_instances"] = element.extended_instances_
+        elif isinstance(element, CObject):
+            relations["links"] = element.links_
+            if element.class_object_class_ is None:
+                self.columns_["classifiers"][element_id] = self.ids_[element.classifier_]
+                self.columns_["names"][element_id] = self._get_string(element.name_)
+                relations["bundles"] = element.bundles_
+                values["values"] = element.attribute_values
+                if isinstance(element, CLink):
+                    self.columns_["sources"][element_id] = self.ids_[element.source_]
+                    self.columns_["targets"][element_id] = self.ids_[element.target_]
+                    self.columns_["labels"][element_id] = self._get_string(element.label)
+                    relations["stereotype_instances"] = element.stereotype_instances_holder.stereotypes_
+                    values["tagged_values"] = element.tagged_values_
+        for name in _SNAPSHOT_RELATIONS:
+            data, offsets = self.sequences_[name]
+            if name in relations:
+                data.extend(self._get_ids(relations[name]))
+            offsets.append(len(data))
+        for name in _SNAPSHOT_VALUES:
+            data, offsets = self.sequences_[name]
+            if name in values:
+                self._encode_binary_values(data, values[name])
+            offsets.append(len(data))
+
+    def _encode_binary_values(self, data, values):
+        for classifier, values_of_classifier in _get_values_dict(values).items():
+            if classifier in self.ids_:
+                classifier_id = self.ids_[classifier]
+                for name, value in values_of_classifier.items():
+                    data += _VALUE_ENTRY.pack(classifier_id, self._get_string(name))
+                    self._encode_binary_value(data, value)
+
+    def _encode_binary_value(self, data, value):
+        if value is None:
+            data += _VALUE_TAG.pack(_NONE_TAG)
+        elif isinstance(value, bool):
+            data += _VALUE_TAG.pack(_TRUE_TAG if value else _FALSE_TAG)
+        elif isinstance(value, int):
+            if -2 ** 63 <= value < 2 ** 63:
+                data += _VALUE_INT.pack(_INT_TAG, value)
+            else:
+                data += _VALUE_INDEX.pack(_LONG_INT_TAG, self._get_string(str(value)))
+        elif isinstance(value, float):
+            data += _VALUE_FLOAT.pack(_FLOAT_TAG, value)
+        elif isinstance(value, str):
+            data += _VALUE_INDEX.pack(_STR_TAG, self._get_string(value))
+        elif isinstance(value, list):
+            data += _VALUE_INDEX.pack(_LIST_TAG, len(value))
+            for v in value:
+                self._encode_binary_value(data, v)
+        elif isinstance(value, CNamedElement):
+            data += _VALUE_INDEX.pack(_REF_TAG, self._encode_reference(value)["ref"])
+        else:
+            raise CException(f"can't serialize value '{value!r}'")
+
+
+class _SnapshotReader(_ModelReader):
+    def __init__(self, path):
+        super().__init__()
+        with open(path, "rb") as file:
+            try:
+                self.mmap_ = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # empty files can't be memory-mapped
+                self.mmap_ = None
+        # the views on the snapshot, which are released when the snapshot is closed
+        self.views_ = []
+        try:
+            self._read_sections(self._add_view(memoryview(self.mmap_ if self.mmap_ is not None else b"")))
+        except BaseException:
+            self.release_()
+            raise
+        # the objects and links created so far, by element id
+        self.shells_ = {}
+        # the elements with slots that are not loaded yet (see add_lazy_element), and the classes of those elements
+        self.lazy_elements_ = {}
+        self.lazy_classes_ = {}
+        # the sequence numbers of objects in their classes and of elements in their bundles are reserved now, so
+        # that they are in the same order as in the saved model, regardless of the order in which they are loaded
+        elements_offsets = self.sequences_["elements"][1]
+        self.objects_sequence_start_ = reserve_sequence_numbers(self.element_count_ + elements_offsets[-1])
+        self.elements_sequence_start_ = self.objects_sequence_start_ + self.element_count_
+        self.slot_loaders_ = {
+            "objects_": self._load_objects,
+            "elements_": self._load_elements,
+            "extended_instances_": self._load_extended_instances,
+            "links_": self._load_links,
+            "links_index_": self._load_links,
+            "attribute_values": self._load_attribute_values,
+        }
+
+    def _add_view(self, view):
+        self.views_.append(view)
+        return view
+
+    def _read_sections(self, snapshot):
+        if len(snapshot) < _SNAPSHOT_HEADER.size or bytes(snapshot[:len(_SNAPSHOT_MAGIC)]) != _SNAPSHOT_MAGIC:
+            raise CException("not a snapshot: header not found")
+        _, version, byte_order, self.element_count_, self.first_object_id_, self.first_link_id_ = \
+            _SNAPSHOT_HEADER.unpack_from(snapshot)
+        if version != SNAPSHOT_FORMAT_VERSION:
+            raise CException(f"unsupported snapshot format version: '{version!s}'")
+        if byte_order != _SNAPSHOT_BYTE_ORDER:
+            raise CException("can't load snapshot written on a platform with a different byte order")
+        sections = {}
+        for index, name in enumerate(_SNAPSHOT_SECTIONS):
+            offset, length = _SNAPSHOT_SECTION.unpack_from(snapshot,
+                                                           _SNAPSHOT_HEADER.size + index * _SNAPSHOT_SECTION.size)
+            if offset + length > len(snapshot):
+                raise CException("incomplete snapshot: end of snapshot not found")
+            sections[name] = self._add_view(snapshot[offset:offset + length])
+        self.meta_ = sections["meta"]
+        self.strings_ = sections["strings"]
+        self.string_offsets_ = self._add_view(sections["string_offsets"].cast("q"))
+        self.columns_ = {name: self._add_view(sections[name].cast("i")) for name in _SNAPSHOT_COLUMNS}
+        self.sequences_ = {name: (self._add_view(sections[name].cast("i")),
+                                  self._add_view(sections[name + "_offsets"].cast("q")))
+                           for name in _SNAPSHOT_RELATIONS}
+        self.sequences_.update({name: (sections[name], self._add_view(sections[name + "_offsets"].cast("q")))
+                                for name in _SNAPSHOT_VALUES})
+
+    def close_(self):
+        # reads all elements and slots not read yet, so that the model no longer refers to this reader, and then
+        # releases the snapshot
+        for element_id in range(self.element_count_):
+            load_lazy_slots(self.get_element_(element_id))
+        self.release_()
+
+    def release_(self):
+        self.shells_ = {}
+        self.elements_ = []
+        self.roots_ = None
+        self.lazy_elements_ = {}
+        self.lazy_classes_ = {}
+        self.meta_ = self.strings_ = self.string_offsets_ = self.columns_ = self.sequences_ = None
+        for view in reversed(self.views_):
+            view.release()
+        self.views_ = []
+        if self.mmap_ is not None:
+            self.mmap_.close()
+            self.mmap_ = None
+
+    def read(self):
+        for line_number, line in enumerate(str(self.meta_, "utf-8").splitlines(), 1):
+            self._read_record(line_number, line, self._parse_record(line_number, line))
+        return self._finish()
+
+    def get_element_(self, element_id):
+        return self._get(element_id)
+
+    def _get(self, element_id):
+        if isinstance(element_id, int) and self.first_object_id_ <= element_id < self.element_count_:
+            try:
+                return self.shells_[element_id]
+            except KeyError:
+                return self._create_shell(element_id)
+        return super()._get(element_id)
+
+    def _get_relation(self, name, element_id):
+        data, offsets = self.sequences_[name]
+        return [self._get(i) for i in data[offsets[element_id]:offsets[element_id + 1]]]
+
+    def _get_string(self, index):
+        if index < 0:
+            return None
+        return str(self.strings_[self.string_offsets_[index]:self.string_offsets_[index + 1]], "utf-8")
+
+    def _decode_binary_values(self, name, element_id):
+        data, offsets = self.sequences_[name]
+        position, end = offsets[element_id], offsets[element_id + 1]
+        values = {}
+        while position < end:
+            classifier_id, name_index = _VALUE_ENTRY.unpack_from(data, position)
+            value, position = self._decode_binary_value(data, position + _VALUE_ENTRY.size)
+            values.setdefault(self._get(classifier_id), {})[self._get_string(name_index)] = value
+        return values
+
+    def _decode_binary_value(self, data, position):
+        tag = data[position]
+        if tag == _NONE_TAG:
+            return None, position + _VALUE_TAG.size
+        if tag == _FALSE_TAG or tag == _TRUE_TAG:
+            return tag == _TRUE_TAG, position + _VALUE_TAG.size
+        if tag == _INT_TAG:
+            return _VALUE_INT.unpack_from(data, position)[1], position + _VALUE_INT.size
+        if tag == _FLOAT_TAG:
+            return _VALUE_FLOAT.unpack_from(data, position)[1], position + _VALUE_FLOAT.size
+        index = _VALUE_INDEX.unpack_from(data, position)[1]
+        position += _VALUE_INDEX.size
+        if tag == _STR_TAG:
+            return self._get_string(index), position
+        if tag == _LONG_INT_TAG:
+            return int(self._get_string(index)), position
+        if tag == _REF_TAG:
+            return self._get(index), position
+        if tag == _LIST_TAG:
+            values = []
+            for _ in range(index):
+                value, position = self._decode_binary_value(data, position)
+                values.append(value)
+            return values, position
+        raise CException(f"unknown value in snapshot: '{tag!s}'")
+
+    def _create_shell(self, element_id):
+        # objects and links are created without their constructors, and their attribute values and links are
+        # only set once they are accessed
+        if element_id < self.first_link_id_:
+            element = CObject.__new__(CObject)
+        else:
+            element = CLink.__new__(CLink)
+        self.shells_[element_id] = element
+        element.name_ = self._get_string(self.columns_["names"][element_id])
+        element.is_deleted = False
+        element.bundles_ = self._get_relation("bundles", element_id)
+        element.class_object_class_ = None
+        element.classifier_ = self._get(self.columns_["classifiers"][element_id])
+        if isinstance(element, CLink):
+            element.association = element.classifier_
+            element.source_ = self._get(self.columns_["sources"][element_id])
+            element.target_ = self._get(self.columns_["targets"][element_id])
+            element.label = self._get_string(self.columns_["labels"][element_id])
+            element.stereotype_instances_holder = CStereotypeInstancesHolder(element)
+            element.stereotype_instances_holder.stereotypes_ = self._get_relation("stereotype_instances", element_id)
+            element.tagged_values_ = self._decode_binary_values("tagged_values", element_id)
+        add_lazy_element(element, self, element_id, ("attribute_values", "links_", "links_index_"))
+        return element
+
+    def _set_lazy_slots(self, element_id, slot_names):
+        element = self.elements_[element_id]
+        for name in slot_names:
+            delattr(element, name)
+        add_lazy_element(element, self, element_id, slot_names)
+
+    def _read_bundle(self, record):
+        super()._read_bundle(record)
+        self._set_lazy_slots(record["id"], ("elements_",))
+
+    def _read_stereotype(self, record):
+        super()._read_stereotype(record)
+        self._set_lazy_slots(record["id"], ("extended_instances_",))
+
+    def _read_class(self, record):
+        super()._read_class(record)
+        self._set_lazy_slots(record["id"], ("objects_",))
+        self._set_lazy_slots(record["id"] + 1, ("links_", "links_index_"))
+
+    def _read_elements(self, record):
+        # the elements of the bundle are set lazily
+        bundle = self._get(record["id"])
+        if "bundles" in record:
+            bundle.bundles_ = self._get_all(record["bundles"])
+        if "sub_layer" in record:
+            bundle.sub_layer = self._get(record["sub_layer"])
+
+    def load_slot_(self, element, element_id, name):
+        return self.slot_loaders_[name](element, element_id)
+
+    def _load_objects(self, cl, element_id):
+        data, offsets = self.sequences_["objects"]
+        cl.objects_ = {self._get(object_id): self.objects_sequence_start_ + object_id
+                       for object_id in data[offsets[element_id]:offsets[element_id + 1]]}
+        return ("objects_",)
+
+    def _load_elements(self, bundle, element_id):
+        data, offsets = self.sequences_["elements"]
+        start = offsets[element_id]
+        bundle.elements_ = {self._get(data[position]): self.elements_sequence_start_ + position
+                            for position in range(start, offsets[element_id + 1])}
+        return ("elements_",)
+
+    def _load_extended_instances(self, stereotype, element_id):
+        stereotype.extended_instances_ = dict.fromkeys(self._get_relation("extended_instances", element_id))
+        return ("extended_instances_",)
+
+    def _load_links(self, obj, element_id):
+        obj.links_ = {}
+        obj.links_index_ = None
+        for link in self._get_relation("links", element_id):
+            obj.add_link_(link)
+        return ("links_", "links_index_")
+
+    def _load_attribute_values(self, obj, element_id):
+        values = self._decode_binary_values("values", element_id)
+        if isinstance(obj, CLink) or not obj.classifier_.compact_values_:
+            obj.attribute_values = values
+        else:
+            obj.attribute_values = CompactValues.from_dict_(obj, values)
+        return ("attribute_values",)
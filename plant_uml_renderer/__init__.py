@@ -1,3 +1,4 @@
 from plant_uml_renderer.plant_uml_generator import PlantUMLGenerator
 from plant_uml_renderer.class_model_renderer import ClassModelRenderer
 from plant_uml_renderer.object_model_renderer import ObjectModelRenderer
+from plant_uml_renderer.model_renderer import RenderingFailure
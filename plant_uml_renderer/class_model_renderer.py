@@ -5,8 +5,8 @@ from plant_uml_renderer.model_renderer import RenderingContext, ModelRenderer
 
 
 class ClassifierRenderingContext(RenderingContext):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, output=None):
+        super().__init__(output)
         self.visited_associations = set()
         self.render_associations = True
         self.render_inheritance = True
@@ -50,19 +50,11 @@ class ClassModelRenderer(ModelRenderer):
         if is_cenum(cl):
             if len(cl.values) == 0:
                 return ""
-            value_string = "{\n"
-            for value in cl.values:
-                value_string += value + "\n"
-            value_string += "}\n"
-            return value_string
+            return "{\n" + "".join([value + "\n" for value in cl.values]) + "}\n"
         # this is a classifier
         if len(cl.attributes) == 0:
             return ""
-        attribute_string = "{\n"
-        for attribute in cl.attributes:
-            attribute_string += self.render_attribute(attribute)
-        attribute_string += "}\n"
-        return attribute_string
+        return "{\n" + "".join([self.render_attribute(attribute) for attribute in cl.attributes]) + "}\n"
 
     @staticmethod
     def render_attribute(attribute):
@@ -91,7 +83,7 @@ class ClassModelRenderer(ModelRenderer):
             return
         if is_cenum(cl):
             return
-        for association in cl.associations:
+        for association in cl.associations_:
             if context.included_associations is not None:
                 if association not in context.included_associations:
                     continue
@@ -175,11 +167,12 @@ class ClassModelRenderer(ModelRenderer):
     def render_inheritance_relations(self, context, class_list):
         if not context.render_inheritance:
             return
+        class_set = frozenset(class_list)
         for cl in class_list:
             if is_cenum(cl):
                 continue
-            for sub_class in cl.subclasses:
-                if sub_class in class_list:
+            for sub_class in cl.subclasses_:
+                if sub_class in class_set:
                     context.add_line(self.get_node_id(context, cl) + " <|--- " + self.get_node_id(context, sub_class))
 
     def render_classes(self, context, class_list):
@@ -188,24 +181,34 @@ class ClassModelRenderer(ModelRenderer):
                 raise CException(f"'{cl!s}' handed to class renderer is not a classifier or enum'")
             self.render_classifier_specification(context, cl)
         self.render_inheritance_relations(context, class_list)
+        # the association and extension relations only need to check whether their ends are rendered
+        class_set = frozenset(class_list)
         for cl in class_list:
-            self.render_associations(context, cl, class_list)
+            self.render_associations(context, cl, class_set)
             if is_cstereotype(cl):
-                self.render_extended_relations(context, cl, class_list)
+                self.render_extended_relations(context, cl, class_set)
 
-    def render_class_model(self, class_list, **kwargs):
-        context = ClassifierRenderingContext()
+    def render_class_model(self, class_list, output=None, **kwargs):
+        context = ClassifierRenderingContext(output)
         set_keyword_args(context,
                          ["render_associations", "render_inheritance", "render_attributes", "excluded_associations",
                           "included_associations", "render_extended_relations",
                           "excluded_extended_classes", "included_extended_classes",
                           "render_metaclass_as_stereotype", "render_tagged_values"],
                          **kwargs)
+        context.excluded_associations = frozenset(context.excluded_associations)
+        context.excluded_extended_classes = frozenset(context.excluded_extended_classes)
+        if context.included_associations is not None:
+            context.included_associations = frozenset(context.included_associations)
+        if context.included_extended_classes is not None:
+            context.included_extended_classes = frozenset(context.included_extended_classes)
         self.render_start_graph(context)
         self.render_classes(context, class_list)
         self.render_end_graph(context)
-        return context.result
+        if output is None:
+            return context.result
+        return None
 
     def render_class_model_to_file(self, file_name_base, class_list, **kwargs):
-        source = self.render_class_model(class_list, **kwargs)
-        self.render_to_files(file_name_base, source)
+        return self.render_to_files(file_name_base,
+                                    lambda output: self.render_class_model(class_list, output=output, **kwargs))
@@ -1,9 +1,17 @@
+import hashlib
 import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from subprocess import call
 
 from codeable_models import *
 from codeable_models.internal.commons import set_keyword_args, is_cobject
+from codeable_models.internal.model_epochs import get_hierarchy_epoch, get_attributes_epoch, get_values_epoch
+
+# the maximum length of the command lines used to run PlantUML, below the limit of 32767 characters on Windows
+# (the lowest of the supported platforms); the files of larger batches are converted with several calls
+MAX_COMMAND_LINE_LENGTH = 30000
 
 
 def get_encoded_name(element):
@@ -19,15 +27,33 @@ def get_encoded_name(element):
 
 
 class RenderingContext(object):
-    def __init__(self):
+    def __init__(self, output=None):
         super().__init__()
-        self.result = ""
+        # the rendered source is either collected in a list of chunks that are joined once the result is
+        # requested, or, if an output file handle is given, written directly to that file
+        self.output = output
+        if output is None:
+            self.chunks = []
+            self.write = self.chunks.append
+        else:
+            self.chunks = None
+            self.write = output.write
         self.indent = 0
         self.indent_cache_string = ""
         self.node_ids = {}
         self.current_node_id = 0
         self.render_tagged_values = True
 
+    @property
+    def result(self):
+        if self.chunks is None:
+            raise CException("the rendering result has been written to the output and is not available")
+        if len(self.chunks) != 1:
+            result = "".join(self.chunks)
+            self.chunks.clear()
+            self.chunks.append(result)
+        return self.chunks[0] if self.chunks else ""
+
     def get_node_id(self, element):
         if is_cobject(element) and element.class_object_class is not None:
             # use the class object's class rather than the class object to identify them uniquely
@@ -41,13 +67,13 @@ class RenderingContext(object):
             return name
 
     def add_line(self, string):
-        self.result += self.indent_cache_string + string + "\n"
+        self.write(self.indent_cache_string + string + "\n")
 
     def add_with_indent(self, string):
-        self.result += self.indent_cache_string + string
+        self.write(self.indent_cache_string + string)
 
     def add(self, string):
-        self.result += string
+        self.write(string)
 
     def increase_indent(self):
         self.indent += 2
@@ -58,6 +84,16 @@ class RenderingContext(object):
         self.indent_cache_string = " " * self.indent
 
 
+class RenderingFailure(object):
+    def __init__(self, file_name, image_format, reason):
+        self.file_name = file_name
+        self.image_format = image_format
+        self.reason = reason
+
+    def __str__(self):
+        return f"rendering '{self.file_name!s}' to {self.image_format!s} failed: {self.reason!s}"
+
+
 class ModelStyle(Enum):
     PLAIN = 0
     HANDWRITTEN = 1
@@ -72,6 +108,19 @@ class ModelRenderer(object):
         self.plant_uml_jar_path = "../libs/plantuml.jar"
         self.render_png = True
         self.render_svg = True
+        # command used to invoke PlantUML, per default "java -jar <plant_uml_jar_path>"
+        self.plant_uml_command = None
+        # if set, the sources written by render_to_files are collected and only rendered to images
+        # when render_pending_files is called, using one PlantUML invocation per image format
+        self.batch_rendering = False
+        self.pending_files = []
+        # if set, the PlantUML invocations are distributed over a pool of this number of worker threads
+        self.workers = None
+        # if set, a hash of each source and the render settings is stored in a .hash file next to the images,
+        # and PlantUML is only invoked if the hash has changed or an image is missing
+        self.render_cache = False
+        self.source_hashes = {}
+        self.rendered_file_bases = set()
 
         self.name_break_length = 25
         self.name_padding = ""
@@ -80,12 +129,18 @@ class ModelRenderer(object):
 
         self.ID = 0
 
+        # cache of the rendered attribute and tagged values of elements, valid as long as the model and the
+        # name break length have not changed
+        self.value_rendering_cache = {}
+        self.value_rendering_cache_stamp = None
+
         super().__init__()
         self._init_keyword_args(**kwargs)
 
     def _init_keyword_args(self, legal_keyword_args=None, **kwargs):
         if legal_keyword_args is None:
-            legal_keyword_args = ["directory", "plant_uml_jar_path", "genSVG", "genPNG"]
+            legal_keyword_args = ["directory", "plant_uml_jar_path", "genSVG", "genPNG", "plant_uml_command",
+                                  "batch_rendering", "workers", "render_cache"]
         set_keyword_args(self, legal_keyword_args, **kwargs)
 
     def render_start_graph(self, context):
@@ -125,48 +180,68 @@ class ModelRenderer(object):
     def render_stereotypes(stereotypes, add_line_breaks=False):
         if len(stereotypes) == 0:
             return ""
-        result = ""
-        first_stereotype = True
-        for stereotype in stereotypes:
-            if first_stereotype:
-                first_stereotype = False
-            else:
-                if add_line_breaks:
-                    result += "\\n"
-            result += "<<" + stereotype.name + ">>"
-        return result
+        separator = "\\n" if add_line_breaks else ""
+        return separator.join(["<<" + stereotype.name + ">>" for stereotype in stereotypes])
+
+    def get_value_rendering_cache(self):
+        stamp = (get_hierarchy_epoch(), get_attributes_epoch(), get_values_epoch(), self.name_break_length)
+        if stamp != self.value_rendering_cache_stamp:
+            self.value_rendering_cache = {}
+            self.value_rendering_cache_stamp = stamp
+        return self.value_rendering_cache
 
     def render_tagged_values(self, stereotyped_element_instance, stereotypes):
         if len(stereotypes) == 0:
             return ""
+        cache = self.get_value_rendering_cache()
+        key = ("tagged values", stereotyped_element_instance, tuple(stereotypes))
+        result = cache.get(key)
+        if result is None:
+            result, cacheable = self._render_tagged_values(stereotyped_element_instance, stereotypes)
+            if cacheable:
+                cache[key] = result
+        return result
 
-        tagged_values_string = "{"
+    def _render_tagged_values(self, stereotyped_element_instance, stereotypes):
+        # returns the rendered tagged values, and whether they can be cached, which is not the case for list
+        # values, as lists can be changed without changing the model
+        cacheable = True
         rendered_tagged_values = []
+        visited_tagged_values = set()
 
         for stereotype in stereotypes:
             stereotype_class_path = stereotype.class_path
 
             for stereotypeClass in stereotype_class_path:
                 for taggedValue in stereotypeClass.attributes:
-                    if not [taggedValue.name, stereotypeClass] in rendered_tagged_values:
+                    if (taggedValue.name, stereotypeClass) not in visited_tagged_values:
                         value = stereotyped_element_instance.get_tagged_value(taggedValue.name, stereotypeClass)
                         if value is not None:
-                            if len(rendered_tagged_values) != 0:
-                                tagged_values_string += ", \\n"
-                            tagged_values_string += self.render_attribute_value(taggedValue, taggedValue.name, value)
-                            rendered_tagged_values.append([taggedValue.name, stereotypeClass])
+                            if isinstance(value, list):
+                                cacheable = False
+                            rendered_tagged_values.append(
+                                self.render_attribute_value(taggedValue, taggedValue.name, value))
+                            visited_tagged_values.add((taggedValue.name, stereotypeClass))
 
-        if len(rendered_tagged_values) != 0:
-            tagged_values_string += "}"
-        else:
-            tagged_values_string = ""
-        return tagged_values_string
+        if len(rendered_tagged_values) == 0:
+            return "", cacheable
+        return "{" + ", \\n".join(rendered_tagged_values) + "}", cacheable
 
     def render_attribute_values(self, context, obj):
         if not context.render_attribute_values:
             return ""
-        attribute_value_added = False
-        attribute_value_string = " {\n"
+        cache = self.get_value_rendering_cache()
+        key = ("attribute values", obj, context.render_empty_attributes)
+        result = cache.get(key)
+        if result is None:
+            result, cacheable = self._render_attribute_values(context, obj)
+            if cacheable:
+                cache[key] = result
+        return result
+
+    def _render_attribute_values(self, context, obj):
+        cacheable = True
+        attribute_value_strings = []
         rendered_attributes = set()
         for cl in obj.classifier.class_path:
             attributes = cl.attributes
@@ -183,12 +258,12 @@ class ModelRenderer(object):
                 if not context.render_empty_attributes:
                     if value is None:
                         continue
-                attribute_value_added = True
-                attribute_value_string += self.render_attribute_value(attribute, name, value) + "\n"
-        attribute_value_string += "}\n"
-        if not attribute_value_added:
-            attribute_value_string = ""
-        return attribute_value_string
+                if isinstance(value, list):
+                    cacheable = False
+                attribute_value_strings.append(self.render_attribute_value(attribute, name, value) + "\n")
+        if len(attribute_value_strings) == 0:
+            return "", cacheable
+        return " {\n" + "".join(attribute_value_strings) + "}\n", cacheable
 
     def render_attribute_value(self, attribute, name, value):
         type_ = attribute.type
@@ -218,7 +293,7 @@ class ModelRenderer(object):
                 line = "<b>" + line + "</b>"
             return line
 
-        result = ""
+        lines = []
         count = 0
         current_first_index = 0
         for i, v in enumerate(name):
@@ -234,14 +309,14 @@ class ModelRenderer(object):
                 new_line = name_padding + name[current_first_index:i] + name_padding
                 if make_bold:
                     new_line = "<b>" + new_line + "</b>"
-                result = result + new_line + "\\n"
+                lines.append(new_line)
                 current_first_index = i + 1
             count += 1
         new_line = name_padding + name[current_first_index:len(name)] + name_padding
         if make_bold:
             new_line = "<b>" + new_line + "</b>"
-        result = result + new_line
-        return result
+        lines.append(new_line)
+        return "\\n".join(lines)
 
     def break_name(self, name):
         return self.pad_and_break_name(name, "")
@@ -251,17 +326,185 @@ class ModelRenderer(object):
         return context.get_node_id(element)
 
     def render_to_files(self, file_name_base, source):
+        # source is either the PlantUML source string or a function writing the source to the file handle it
+        # is called with, so that the source can be streamed to the file without holding it in memory
         file_name_base_with_dir = f"{self.directory!s}/{file_name_base!s}"
         file_name_txt = file_name_base_with_dir + ".txt"
         if not os.path.exists(self.directory):
             os.makedirs(self.directory)
-        file = open(file_name_txt, "w")
-        file.write(source)
-        file.close()
+        # the source is written to a new file that then replaces the file with the previous source, so that
+        # the previous source is kept if rendering the source fails
+        temporary_file_name_txt = f"{file_name_txt!s}.{uuid.uuid4().hex!s}.tmp"
+        try:
+            with open(temporary_file_name_txt, "x") as file:
+                if isinstance(source, str):
+                    file.write(source)
+                else:
+                    source(file)
+            os.replace(temporary_file_name_txt, file_name_txt)
+        except BaseException:
+            if os.path.exists(temporary_file_name_txt):
+                os.remove(temporary_file_name_txt)
+            raise
+        if self.render_cache:
+            self.rendered_file_bases.add(os.path.abspath(file_name_base_with_dir))
+            source_hash = self.get_source_hash(file_name_txt)
+            if self._is_rendered(file_name_base_with_dir, source_hash):
+                return []
+            # remove the outdated hash, so that the images are rendered again if rendering them fails
+            if os.path.exists(file_name_base_with_dir + ".hash"):
+                os.remove(file_name_base_with_dir + ".hash")
+            self.source_hashes[file_name_txt] = source_hash
+        if self.batch_rendering:
+            self.pending_files.append(file_name_txt)
+            return []
+        return self.run_plant_uml([file_name_txt])
+
+    def get_render_settings(self):
+        return [self.style.name, self.left_to_right, self.render_png, self.render_svg, self.get_plant_uml_command()]
+
+    def get_source_hash(self, file_name_txt):
+        source_hash = hashlib.sha256(repr(self.get_render_settings()).encode())
+        with open(file_name_txt, "rb") as file:
+            for block in iter(lambda: file.read(65536), b""):
+                source_hash.update(block)
+        return source_hash.hexdigest()
+
+    def _is_rendered(self, file_name_base_with_dir, source_hash):
+        hash_file_name = file_name_base_with_dir + ".hash"
+        if not os.path.exists(hash_file_name):
+            return False
+        with open(hash_file_name) as file:
+            if file.read() != source_hash:
+                return False
+        return all([os.path.exists(f"{file_name_base_with_dir!s}.{image_format!s}")
+                    for image_format, _ in self.get_image_formats()])
+
+    def _store_source_hashes(self, file_names, failures):
+        failed_file_names = {failure.file_name for failure in failures}
+        for file_name in file_names:
+            source_hash = self.source_hashes.pop(file_name, None)
+            if source_hash is not None and file_name not in failed_file_names:
+                with open(file_name[:-len(".txt")] + ".hash", "w") as file:
+                    file.write(source_hash)
+
+    def get_plant_uml_command(self):
+        if self.plant_uml_command is not None:
+            return list(self.plant_uml_command)
+        return ["java", "-jar", f"{self.plant_uml_jar_path!s}"]
+
+    def get_image_formats(self):
+        image_formats = []
         if self.render_png:
-            call(["java", "-jar", f"{self.plant_uml_jar_path!s}", f"{file_name_txt!s}"])
+            image_formats.append(("png", []))
         if self.render_svg:
-            call(["java", "-jar", f"{self.plant_uml_jar_path!s}", f"{file_name_txt!s}", "-tsvg"])
+            image_formats.append(("svg", ["-tsvg"]))
+        return image_formats
+
+    def run_plant_uml(self, file_names):
+        # renders the given source files to images and returns a list of RenderingFailure objects for the files
+        # that could not be rendered
+        if len(file_names) == 0:
+            return []
+        failures = self._run_conversions(file_names)
+        self._store_source_hashes(file_names, failures)
+        return failures
+
+    def _run_conversions(self, file_names):
+        failures = []
+        if self.workers is None:
+            for image_format, arguments in self.get_image_formats():
+                failures.extend(self._convert_files(file_names, image_format, arguments))
+            return failures
+
+        if not isinstance(self.workers, int) or self.workers < 1:
+            raise CException(f"workers must be a positive integer, but got: '{self.workers!s}'")
+        # split the files into one chunk per worker, so that each worker starts PlantUML only once per format
+        number_of_chunks = min(self.workers, len(file_names))
+        chunks = [file_names[i * len(file_names) // number_of_chunks:(i + 1) * len(file_names) // number_of_chunks]
+                  for i in range(number_of_chunks)]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(self._convert_files_reporting_errors, chunk, image_format, arguments)
+                       for image_format, arguments in self.get_image_formats() for chunk in chunks]
+        for future in futures:
+            failures.extend(future.result())
+        return failures
+
+    def _convert_files(self, file_names, image_format, arguments):
+        command = self.get_plant_uml_command()
+        chunks = _split_file_names(file_names, _get_command_line_length(command + arguments))
+        if len(chunks) > 1:
+            failures = []
+            for chunk in chunks:
+                failures.extend(self._convert_files(chunk, image_format, arguments))
+            return failures
+        return_code = call(command + [f"{file_name!s}" for file_name in file_names] + arguments)
+        if return_code == 0:
+            return []
+        if len(file_names) > 1:
+            # render the files one by one to find out which of them have failed
+            failures = []
+            for file_name in file_names:
+                failures.extend(self._convert_files([file_name], image_format, arguments))
+            return failures
+        return [RenderingFailure(file_names[0], image_format, f"PlantUML exited with code {return_code!s}")]
+
+    def _convert_files_reporting_errors(self, file_names, image_format, arguments):
+        # used in the worker threads: errors are reported as failures to not abort the other conversions
+        try:
+            return self._convert_files(file_names, image_format, arguments)
+        except OSError as e:
+            return [RenderingFailure(file_name, image_format, e) for file_name in file_names]
+
+    def render_pending_files(self):
+        file_names = self.pending_files
+        self.pending_files = []
+        return self.run_plant_uml(file_names)
+
+    def prune_stale_outputs(self):
+        return prune_stale_outputs([self])
+
+
+def _get_command_line_length(arguments):
+    # each argument is separated by a space, and might have to be quoted
+    return sum(len(f"{argument!s}") + 3 for argument in arguments)
+
+
+def _split_file_names(file_names, command_length):
+    # splits the file names into chunks that can be passed on command lines of at most MAX_COMMAND_LINE_LENGTH
+    # characters, with command_length characters used by the rest of the command line
+    chunks = [[]]
+    length = command_length
+    for file_name in file_names:
+        file_name_length = _get_command_line_length([file_name])
+        if chunks[-1] and length + file_name_length > MAX_COMMAND_LINE_LENGTH:
+            chunks.append([])
+            length = command_length
+        chunks[-1].append(file_name)
+        length += file_name_length
+    return chunks
+
+
+def prune_stale_outputs(renderers):
+    # removes the files of views rendered with the render cache in an earlier run, i.e., the files having a .hash
+    # file, from the directories the renderers have rendered to with the render cache, if none of the renderers
+    # has rendered the view again; returns the names of the removed files
+    rendered_file_bases = set()
+    for renderer in renderers:
+        rendered_file_bases.update(renderer.rendered_file_bases)
+    removed_files = []
+    for directory in sorted({os.path.dirname(file_base) for file_base in rendered_file_bases}):
+        for file_name in sorted(os.listdir(directory)):
+            if not file_name.endswith(".hash"):
+                continue
+            file_base = os.path.join(directory, file_name[:-len(".hash")])
+            if file_base in rendered_file_bases:
+                continue
+            for extension in [".txt", ".png", ".svg", ".hash"]:
+                if os.path.exists(file_base + extension):
+                    os.remove(file_base + extension)
+                    removed_files.append(file_base + extension)
+    return removed_files
 
 
 def _check_for_illegal_value_characters(value):
@@ -6,8 +6,8 @@ from plant_uml_renderer.model_renderer import RenderingContext, ModelRenderer
 
 
 class ObjectRenderingContext(RenderingContext):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, output=None):
+        super().__init__(output)
         self.visited_links = set()
         self.render_attribute_values = True
         self.render_empty_attributes = False
@@ -78,25 +78,27 @@ class ObjectModelRenderer(ModelRenderer):
         context.add_line(
             self.get_node_id(context, link.source) + arrow + self.get_node_id(context, link.target) + label)
 
-    def render_links(self, context, obj, obj_list):
-        for classifier in obj.classifier.class_path:
-            for association in classifier.associations:
-                links = [l for l in obj.links if l.association == association]
-                for link in links:
-                    if link in context.excluded_links:
-                        continue
-                    source = link.source
-                    if is_cclass(source):
-                        source = source.class_object
-                    target = link.target
-                    if is_cclass(target):
-                        target = target.class_object
-                    if source != obj:
-                        # only render links outgoing from this object
-                        continue
+    def render_links(self, context, obj, obj_set):
+        # walk the links of the object once, grouping them by association, and then render them in the order of
+        # the associations on the class path
+        links_of_associations = {}
+        for link in obj.links_:
+            # only render links outgoing from this object (link ends of classes are their class objects)
+            if link.source_ is not obj or link in context.excluded_links:
+                continue
+            links_of_association = links_of_associations.get(link.association)
+            if links_of_association is None:
+                links_of_associations[link.association] = [link]
+            else:
+                links_of_association.append(link)
+        if len(links_of_associations) == 0:
+            return
+        for classifier in obj.classifier_.get_class_path_():
+            for association in classifier.associations_:
+                for link in links_of_associations.pop(association, ()):
                     if link not in context.visited_links:
                         context.visited_links.add(link)
-                        if target in obj_list:
+                        if link.target_ in obj_set:
                             self.render_link(context, link)
 
     def render_objects(self, context, objects):
@@ -111,20 +113,24 @@ class ObjectModelRenderer(ModelRenderer):
                 raise CException(f"'{obj!s}' handed to object renderer is no an object or class'")
         for obj in obj_list:
             self.render_object_specification(context, obj)
+        obj_set = frozenset(obj_list)
         for obj in obj_list:
-            self.render_links(context, obj, obj_list)
+            self.render_links(context, obj, obj_set)
 
-    def render_object_model(self, object_list, **kwargs):
-        context = ObjectRenderingContext()
+    def render_object_model(self, object_list, output=None, **kwargs):
+        context = ObjectRenderingContext(output)
         set_keyword_args(context,
                          ["render_attribute_values", "render_empty_attributes",
                           "render_association_names_when_no_label_is_given",
                           "excluded_links", "render_tagged_values"], **kwargs)
+        context.excluded_links = frozenset(context.excluded_links)
         self.render_start_graph(context)
         self.render_objects(context, object_list)
         self.render_end_graph(context)
-        return context.result
+        if output is None:
+            return context.result
+        return None
 
     def render_object_model_to_file(self, file_name_base, class_list, **kwargs):
-        source = self.render_object_model(class_list, **kwargs)
-        self.render_to_files(file_name_base, source)
+        return self.render_to_files(file_name_base,
+                                    lambda output: self.render_object_model(class_list, output=output, **kwargs))
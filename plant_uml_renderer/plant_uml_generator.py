@@ -1,7 +1,9 @@
 import os
 import shutil
+from contextlib import contextmanager
 
 from plant_uml_renderer.class_model_renderer import ClassModelRenderer
+from plant_uml_renderer.model_renderer import prune_stale_outputs
 from plant_uml_renderer.object_model_renderer import ObjectModelRenderer
 
 
@@ -9,6 +11,7 @@ class PlantUMLGenerator(object):
     def __init__(self, delete_gen_dir_during_init=False):
         self._directory = "../_generated"
         self._plant_uml_jar_path = "../../libs/plantuml.jar"
+        self._batch_failures = None
         if delete_gen_dir_during_init:
             self.delete_gen_dir()
         self.class_model_renderer = ClassModelRenderer(plant_uml_jar_path=self._plant_uml_jar_path,
@@ -27,25 +30,58 @@ class PlantUMLGenerator(object):
         return name
 
     def generate_class_model(self, bundle, **kwargs):
-        self.class_model_renderer.render_class_model_to_file(self.get_file_name(bundle.name), bundle.elements, **kwargs)
+        return self.class_model_renderer.render_class_model_to_file(self.get_file_name(bundle.name),
+                                                                    bundle.elements, **kwargs)
 
     def generate_object_model(self, bundle, **kwargs):
-        self.object_model_renderer.render_object_model_to_file(self.get_file_name(bundle.name), bundle.elements,
-                                                               **kwargs)
+        return self.object_model_renderer.render_object_model_to_file(self.get_file_name(bundle.name),
+                                                                      bundle.elements, **kwargs)
 
     def generate_class_models(self, dir_name, view_list):
         main_dir = self.directory
         self.directory = f"{main_dir!s}/{self.get_file_name(dir_name)!s}"
-        for bundle, kwargs in zip(view_list[::2], view_list[1::2]):
-            self.generate_class_model(bundle, **kwargs)
+        with self.batch_rendering() as failures:
+            for bundle, kwargs in zip(view_list[::2], view_list[1::2]):
+                self.generate_class_model(bundle, **kwargs)
         self.directory = main_dir
+        return failures
 
     def generate_object_models(self, dir_name, view_list):
         main_dir = self.directory
         self.directory = f"{main_dir!s}/{self.get_file_name(dir_name)!s}"
-        for bundle, kwargs in zip(view_list[::2], view_list[1::2]):
-            self.generate_object_model(bundle, **kwargs)
+        with self.batch_rendering() as failures:
+            for bundle, kwargs in zip(view_list[::2], view_list[1::2]):
+                self.generate_object_model(bundle, **kwargs)
         self.directory = main_dir
+        return failures
+
+    @contextmanager
+    def batch_rendering(self):
+        # all models generated in the with block are written first, and then rendered to images with one
+        # PlantUML invocation per renderer and image format (or per worker, if workers are used) at the end of
+        # the outermost with block; the list yielded is filled with the rendering failures at that point
+        if self._batch_failures is not None:
+            yield self._batch_failures
+            return
+        renderers = [self.class_model_renderer, self.object_model_renderer]
+        failures = self._batch_failures = []
+        for renderer in renderers:
+            renderer.batch_rendering = True
+        try:
+            yield failures
+        except BaseException:
+            for renderer in renderers:
+                renderer.pending_files = []
+            raise
+        finally:
+            self._batch_failures = None
+            for renderer in renderers:
+                renderer.batch_rendering = False
+        for renderer in renderers:
+            failures.extend(renderer.render_pending_files())
+
+    def prune_stale_outputs(self):
+        return prune_stale_outputs([self.class_model_renderer, self.object_model_renderer])
 
     @property
     def plant_uml_jar_path(self):
@@ -57,6 +93,33 @@ class PlantUMLGenerator(object):
         self.class_model_renderer.plant_uml_jar_path = plant_uml_jar_path
         self.object_model_renderer.plant_uml_jar_path = plant_uml_jar_path
 
+    @property
+    def plant_uml_command(self):
+        return self.class_model_renderer.plant_uml_command
+
+    @plant_uml_command.setter
+    def plant_uml_command(self, plant_uml_command):
+        self.class_model_renderer.plant_uml_command = plant_uml_command
+        self.object_model_renderer.plant_uml_command = plant_uml_command
+
+    @property
+    def workers(self):
+        return self.class_model_renderer.workers
+
+    @workers.setter
+    def workers(self, workers):
+        self.class_model_renderer.workers = workers
+        self.object_model_renderer.workers = workers
+
+    @property
+    def render_cache(self):
+        return self.class_model_renderer.render_cache
+
+    @render_cache.setter
+    def render_cache(self, render_cache):
+        self.class_model_renderer.render_cache = render_cache
+        self.object_model_renderer.render_cache = render_cache
+
     @property
     def directory(self):
         return self._directory
@@ -1,7 +1,9 @@
+import gc
+
 import nose
 from nose.tools import ok_, eq_
 
-from codeable_models import CBundle, CMetaclass, CClass, CException, CLayer, CPackage
+from codeable_models import CBundle, CMetaclass, CClass, CException, CLayer, CPackage, CBundlable
 from tests.testing_commons import exception_expected_
 
 
@@ -33,6 +35,162 @@ class TestBundles:
         except CException as e:
             eq_(e.value, "unknown argument to getElements: 'x'")
 
+    def test_elements_setter_replaces_bundles_of_elements(self):
+        c1 = CClass(self.mcl, "C1")
+        c2 = CClass(self.mcl, "C2")
+        self.b1.elements = [c1, c2]
+        self.b1.elements = [c2]
+        eq_(self.b1.elements, [c2])
+        eq_(c1.bundles, [])
+        eq_(c2.bundles, [self.b1])
+
+    def test_bundles_setter_replaces_all_bundles(self):
+        b2 = CBundle("B2")
+        b3 = CBundle("B3")
+        c1 = CClass(self.mcl, "C1", bundles=[self.b1, b2, b3])
+        c1.bundles = b3
+        eq_(c1.bundles, [b3])
+        eq_(self.b1.elements, [])
+        eq_(b2.elements, [])
+        eq_(b3.elements, [c1])
+
+    def test_element_order_after_removal_and_readding(self):
+        classes = [CClass(self.mcl, f"C{i}", bundles=self.b1) for i in range(4)]
+        self.b1.remove(classes[1])
+        classes[3].delete()
+        eq_(self.b1.elements, [classes[0], classes[2]])
+        self.b1.add(classes[1])
+        eq_(self.b1.elements, [classes[0], classes[2], classes[1]])
+        eq_(self.mcl.classes, classes[0:3])
+
+    def test_get_elements_after_changes_of_bundle_and_names(self):
+        c1 = CClass(self.mcl, "C1", bundles=self.b1)
+        c2 = CClass(self.mcl, "C2", bundles=self.b1)
+        p1 = CPackage("C1", elements=c1)
+        self.b1.add(p1)
+        eq_(self.b1.get_elements(name="C1"), [c1, p1])
+        eq_(self.b1.get_element(name="C1", type=CPackage), p1)
+        eq_(self.b1.get_elements(type=CBundle), [p1])
+        # renaming keeps the order in which the elements were added to the bundle
+        c2.name = "C1"
+        eq_(self.b1.get_elements(name="C1"), [c1, c2, p1])
+        eq_(self.b1.get_element(name="C2"), None)
+        c1.name = "C3"
+        eq_(self.b1.get_element(name="C1"), c2)
+        eq_(self.b1.get_element(name="C3"), c1)
+        self.b1.remove(c2)
+        eq_(self.b1.get_elements(name="C1"), [p1])
+        eq_(self.b1.get_element(type=CClass), c1)
+        c2.bundles = [self.b1]
+        eq_(self.b1.get_elements(type=CClass), [c1, c2])
+        eq_(self.b1.get_element(), c1)
+        self.b1.elements = [p1]
+        eq_(self.b1.get_elements(name="C3"), [])
+        eq_(self.b1.get_element(type=CBundlable), p1)
+        c1.name = "C1"
+        eq_(self.b1.get_elements(name="C1"), [p1])
+        p1.delete()
+        eq_(self.b1.get_element(type=CBundlable), None)
+
+    def test_all_elements_and_transitive_contains(self):
+        c1 = CClass(self.mcl, "C1")
+        c2 = CClass(self.mcl, "C2")
+        c3 = CClass(self.mcl, "C3")
+        layer1 = CLayer("L1", elements=[c2])
+        package1 = CPackage("P1", elements=[layer1, c3])
+        self.b1.elements = [c1, package1]
+        eq_(self.b1.all_elements, [c1, package1, layer1, c2, c3])
+        ok_(self.b1.contains(c1))
+        ok_(not self.b1.contains(c2))
+        ok_(self.b1.contains(c2, transitive=True))
+        # changes of nested bundles are reflected in the closure
+        layer1.add(c1)
+        eq_(package1.all_elements, [layer1, c2, c1, c3])
+        ok_(package1.contains(c1, transitive=True))
+        layer1.remove(c2)
+        ok_(not self.b1.contains(c2, transitive=True))
+        eq_(self.b1.all_elements, [c1, package1, layer1, c3])
+        c3.delete()
+        eq_(self.b1.all_elements, [c1, package1, layer1])
+        # cycles of bundles are only traversed once
+        layer1.add(self.b1)
+        eq_(layer1.all_elements, [c1, self.b1, package1, layer1])
+        ok_(layer1.contains(layer1, transitive=True))
+        package1.elements = []
+        eq_(self.b1.all_elements, [c1, package1])
+        ok_(not self.b1.contains(layer1, transitive=True))
+        ok_(layer1.contains(package1, transitive=True))
+
+    def test_all_elements_and_transitive_contains_after_nesting_changes(self):
+        c1 = CClass(self.mcl, "C1")
+        c2 = CClass(self.mcl, "C2")
+        c3 = CClass(self.mcl, "C3")
+        b2 = CBundle("B2", elements=[c1])
+        b3 = CBundle("B3", elements=[b2])
+        self.b1.elements = [b3]
+        ok_(self.b1.contains(c1, transitive=True))
+        ok_(b3.contains(c1, transitive=True))
+        # a bundle with elements that are nested in another bundle is added
+        b4 = CBundle("B4", elements=[CBundle("B5", elements=[c2])])
+        b2.add(b4)
+        ok_(self.b1.contains(c2, transitive=True))
+        eq_(b3.all_elements, [b2, c1, b4, b4.elements[0], c2])
+        # changes of the added bundles are reflected in the closures, too
+        b4.elements[0].add(c3)
+        ok_(self.b1.contains(c3, transitive=True))
+        ok_(b2.contains(c3, transitive=True))
+        b4.elements[0].remove(c3)
+        ok_(not self.b1.contains(c3, transitive=True))
+        # bundles that no longer contain a bundle are not changed by changes of that bundle
+        b3.remove(b2)
+        ok_(not self.b1.contains(c1, transitive=True))
+        b2.add(c3)
+        ok_(not self.b1.contains(c3, transitive=True))
+        ok_(not b3.contains(c3, transitive=True))
+        eq_(self.b1.all_elements, [b3])
+        ok_(b2.contains(c3, transitive=True))
+        # the same bundle is nested via several paths
+        self.b1.add(b4)
+        b3.add(b4)
+        eq_(self.b1.all_elements, [b3, b4, b4.elements[0], c2])
+        b3.remove(b4)
+        ok_(self.b1.contains(c2, transitive=True))
+        self.b1.remove(b4)
+        ok_(not self.b1.contains(c2, transitive=True))
+
+    def test_all_elements_and_transitive_contains_after_bundles_are_freed(self):
+        c1 = CClass(self.mcl, "C1")
+        c2 = CClass(self.mcl, "C2")
+        b2 = CBundle("B2", elements=[self.b1])
+        b3 = CBundle("B3", elements=[b2])
+        ok_(b2.contains(self.b1, transitive=True))
+        ok_(b3.contains(self.b1, transitive=True))
+        b3.remove(b2)
+        del b2
+        gc.collect()
+        self.b1.add(c1)
+        eq_(self.b1.all_elements, [c1])
+        ok_(not b3.contains(c1, transitive=True))
+        b3.add(self.b1)
+        self.b1.add(c2)
+        ok_(b3.contains(c2, transitive=True))
+        eq_(b3.all_elements, [self.b1, c1, c2])
+        del b3
+        gc.collect()
+        self.b1.remove(c1)
+        eq_(self.b1.all_elements, [c2])
+        ok_(not self.b1.contains(c1, transitive=True))
+
+    def test_no_instance_dict_on_model_elements(self):
+        c1 = CClass(self.mcl, "C1", bundles=self.b1)
+        for element in [self.mcl, self.b1, c1, c1.class_object, CLayer("L1"), CPackage("P1")]:
+            ok_(not hasattr(element, "__dict__"))
+        try:
+            c1.unknown_attribute = 1
+            exception_expected_()
+        except AttributeError:
+            pass
+
     def test_package_and_layer_subclasses(self):
         layer1 = CLayer("L1")
         layer2 = CLayer("L2", sub_layer=layer1)
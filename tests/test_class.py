@@ -59,6 +59,29 @@ class TestClass:
         eq_(set(c1.get_objects("o1")), {o1, o2, o3})
         eq_(c1.get_object("o1"), o1)
 
+    def test_get_objects_by_name_after_rename_and_delete(self):
+        c1 = CClass(self.mcl, "C1")
+        c2 = CClass(self.mcl, "C2", superclasses=c1)
+        o1 = CObject(c1, "o1")
+        o2 = CObject(c1, "o2")
+        o3 = CObject(c2, "o1")
+        eq_(c1.get_objects("o1"), [o1])
+        eq_(c1.get_all_objects("o1"), [o1, o3])
+        o2.name = "o1"
+        eq_(c1.get_objects("o1"), [o1, o2])
+        o1.name = "x"
+        eq_(c1.get_object("o1"), o2)
+        eq_(c1.get_object("x"), o1)
+        o1.name = "o1"
+        eq_(c1.get_objects("o1"), [o1, o2])
+        o1.delete()
+        eq_(c1.get_objects("o1"), [o2])
+        o2.classifier = c2
+        eq_(c1.get_objects("o1"), [])
+        eq_(c2.get_objects("o1"), [o3, o2])
+        eq_(c1.get_all_objects("o1"), [o3, o2])
+        eq_(c1.get_all_objects("o2"), [])
+
     def test_delete_class(self):
         cl1 = CClass(self.mcl, "CL1")
         cl1.delete()
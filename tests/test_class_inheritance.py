@@ -297,6 +297,36 @@ class TestClassInheritance:
         eq_(m2.class_path, [m2, t])
         eq_(t.class_path, [t])
 
+    def test_class_path_after_superclass_changes(self):
+        t = CClass(self.mcl, "T")
+        m1 = CClass(self.mcl, "M1", superclasses=[t])
+        m2 = CClass(self.mcl, "M2")
+        b1 = CClass(self.mcl, "B1", superclasses=[m1])
+        b2 = CClass(self.mcl, "B2", superclasses=[b1])
+        eq_(b2.class_path, [b2, b1, m1, t])
+        eq_(t.all_subclasses, {m1, b1, b2})
+        m1.superclasses = [m2]
+        eq_(b2.class_path, [b2, b1, m1, m2])
+        eq_(b2.all_superclasses, {b1, m1, m2})
+        eq_(t.all_subclasses, set())
+        eq_(m2.all_subclasses, {m1, b1, b2})
+        m1.delete()
+        eq_(b2.class_path, [b2, b1])
+        eq_(b1.all_superclasses, set())
+        eq_(m2.all_subclasses, set())
+
+    def test_class_path_and_all_superclasses_are_immutable(self):
+        t = CClass(self.mcl, "T")
+        m1 = CClass(self.mcl, "M1", superclasses=[t])
+        m1.class_path.append(self.mcl)
+        eq_(m1.class_path, [m1, t])
+        try:
+            m1.all_superclasses.add(self.mcl)
+            exception_expected_()
+        except AttributeError:
+            pass
+        eq_(m1.all_superclasses, {t})
+
     def test_class_instance_of(self):
         a = CClass(self.mcl)
         b = CClass(self.mcl, superclasses=[a])
@@ -367,7 +397,8 @@ class TestClassInheritance:
             exception_expected_()
         except CException as e:
             eq_("unknown keyword argument 'superclass', should be one of: " +
-                "['stereotype_instances', 'values', 'tagged_values', 'attributes', 'superclasses', 'bundles']",
+                "['stereotype_instances', 'values', 'tagged_values', 'compact_values', 'attributes', " +
+                "'superclasses', 'bundles']",
                 e.value)
 
     def test_superclasses_that_are_deleted(self):
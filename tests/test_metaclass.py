@@ -69,6 +69,25 @@ class TestMetaclass:
         eq_(set(m1.get_classes("CL1")), {c1, c2, c3})
         eq_(m1.get_class("CL1"), c1)
 
+    def test_get_classes_by_name_after_rename_and_delete(self):
+        m1 = CMetaclass("M1")
+        m2 = CMetaclass("M2", superclasses=m1)
+        c1 = CClass(m1, "CL1")
+        c2 = CClass(m1, "CL2")
+        c3 = CClass(m2, "CL1")
+        eq_(m1.get_classes("CL1"), [c1])
+        eq_(m1.get_all_classes("CL1"), [c1, c3])
+        eq_(m2.get_all_classes("CL1"), [c3])
+        c1.name = "CL2"
+        eq_(m1.get_classes("CL2"), [c1, c2])
+        eq_(m1.get_class("CL1"), None)
+        eq_(m1.get_all_classes("CL1"), [c3])
+        c1.delete()
+        eq_(m1.get_class("CL2"), c2)
+        c3.metaclass = m1
+        eq_(m1.get_classes("CL1"), [c3])
+        eq_(m2.get_classes("CL1"), [])
+
     def test_get_stereotypes_by_name(self):
         m1 = CMetaclass()
         eq_(set(m1.get_stereotypes("S1")), set())
@@ -293,6 +293,23 @@ class TestMetaclassInheritance:
         eq_(m2.class_path, [m2, t])
         eq_(t.class_path, [t])
 
+    def test_metaclass_path_after_change_deep_in_hierarchy(self):
+        t = CMetaclass("T")
+        m = CMetaclass("M", superclasses=[t])
+        b = CMetaclass("B", superclasses=[m])
+        c = CMetaclass("C", superclasses=[b])
+        eq_(c.class_path, [c, b, m, t])
+        eq_(t.all_subclasses, {m, b, c})
+        x = CMetaclass("X")
+        t.superclasses = [x]
+        eq_(c.class_path, [c, b, m, t, x])
+        eq_(c.all_superclasses, {b, m, t, x})
+        eq_(x.all_subclasses, {t, m, b, c})
+        ok_(CClass(c).instance_of(x))
+        t.superclasses = []
+        eq_(c.class_path, [c, b, m, t])
+        eq_(x.all_subclasses, set())
+
     def test_metaclass_instance_of(self):
         a = CMetaclass()
         b = CMetaclass(superclasses=[a])
@@ -2,7 +2,7 @@ import nose
 from nose.tools import ok_, eq_
 from parameterized import parameterized
 
-from codeable_models import CMetaclass, CClass, CObject, CException, CBundle, add_links
+from codeable_models import CMetaclass, CClass, CObject, CException, CBundle, add_links, add_links_bulk
 from tests.testing_commons import exception_expected_
 
 
@@ -247,6 +247,59 @@ class TestObject:
         for elt in test_elements:
             eq_(set(elt.get_connected_elements(**kwargs_dict)), connected_elements_result)
 
+    def test_get_connected_elements_order(self):
+        o1, o2, o3, o4, o5 = [CObject(self.cl, f"o{i}") for i in range(1, 6)]
+        association = self.cl.association(self.cl, "* -> *")
+        add_links({o1: [o2, o4], o2: o3, o4: o5}, association=association)
+        eq_(o1.get_connected_elements(), [o1, o2, o3, o4, o5])
+        eq_(o4.get_connected_elements(), [o4, o1, o2, o3, o5])
+        eq_(o1.get_connected_elements(stop_elements_inclusive=o2, stop_elements_exclusive=[o5]), [o1, o2, o4])
+
+    def test_get_connected_elements_of_deep_chain(self):
+        association = self.cl.association(self.cl, "* -> *")
+        objects = [CObject(self.cl, f"o{i}") for i in range(5000)]
+        add_links_bulk(association, pairs=list(zip(objects, objects[1:])))
+        eq_(objects[0].get_connected_elements(), objects)
+        eq_(objects[-1].get_connected_elements(), objects[::-1])
+
+    def test_iter_connected_elements_stop_early(self):
+        o1, o2, o3 = [CObject(self.cl, f"o{i}") for i in range(1, 4)]
+        add_links({o1: o2, o2: o3}, association=self.cl.association(self.cl, "* -> *"))
+        elements = o1.iter_connected_elements()
+        eq_(next(elements), o1)
+        eq_(next(elements), o2)
+        eq_(list(elements), [o3])
+        eq_(list(o1.iter_connected_elements(stop_elements_exclusive=o1)), [])
+        try:
+            o1.iter_connected_elements(a="o1")
+            exception_expected_()
+        except CException as e:
+            ok_(e.value.startswith("unknown keyword argument 'a'"))
+
+    def test_iter_connected_elements_max_depth_and_predicate(self):
+        o1, o2, o3, o4, o5 = [CObject(self.cl, f"o{i}") for i in range(1, 6)]
+        association = self.cl.association(self.cl, "* -> *")
+        # o1 -> o2 -> o3 -> o4 -> o5 and a shortcut o1 -> o4
+        add_links({o1: [o2, o4], o2: o3, o3: o4, o4: o5}, association=association)
+        eq_(list(o1.iter_connected_elements(max_depth=0)), [o1])
+        eq_(list(o1.iter_connected_elements(max_depth=1)), [o1, o2, o4])
+        eq_(list(o1.iter_connected_elements(max_depth=2)), [o1, o2, o3, o4, o5])
+        # o4 is first found via o3 at depth 3, but o5 is reachable via the shortcut
+        eq_(list(o1.iter_connected_elements(max_depth=3)), [o1, o2, o3, o4, o5])
+        eq_(list(o2.iter_connected_elements(max_depth=1)), [o2, o1, o3])
+        eq_(list(o1.iter_connected_elements(predicate=lambda e: e.name in ["o3", "o5"])), [o3, o5])
+        eq_(list(o1.iter_connected_elements(max_depth=1, predicate=lambda e: e != o1)), [o2, o4])
+        try:
+            o1.iter_connected_elements(max_depth=-1)
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "max depth must be a non-negative integer, but got: '-1'")
+        try:
+            o1.iter_connected_elements(predicate="o1")
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "predicate must be callable, but got: 'o1'")
+
     def test_class_object_class_is_none(self):
         o1 = CObject(self.cl, "o")
         eq_(o1.class_object_class, None)
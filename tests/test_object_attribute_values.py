@@ -582,6 +582,37 @@ class TestObjectAttributeValues:
         eq_(o1.get_value("i", t2), 110)
         eq_(o1.get_value("i", t1), 100)
 
+    def test_attribute_resolution_after_hierarchy_and_attribute_changes(self):
+        t1 = CClass(self.mcl, "T1", attributes={"i": 0})
+        t2 = CClass(self.mcl, "T2", attributes={"i": 1, "j": 2})
+        c = CClass(self.mcl, "C", superclasses=[t1, t2])
+        o = CObject(c)
+        eq_(o.get_value("i"), 0)
+        eq_(o.get_value("j"), 2)
+
+        c.superclasses = [t2, t1]
+        eq_(o.get_value("i"), 1)
+
+        c.attributes = {"i": 3}
+        eq_(o.get_value("i"), 3)
+        eq_(o.get_value("i", t2), 1)
+
+        t2.attributes = {"i": 4}
+        try:
+            o.get_value("j")
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, f"attribute 'j' unknown for '{o!s}'")
+
+        c.superclasses = []
+        eq_(o.get_value("i"), 3)
+        c.attributes = {}
+        try:
+            o.set_value("i", 1)
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, f"attribute 'i' unknown for '{o!s}'")
+
     def test_values_multiple_inheritance(self):
         t1 = CClass(self.mcl, "T1")
         t2 = CClass(self.mcl, "T2")
@@ -725,6 +756,76 @@ class TestObjectAttributeValues:
         except CException as e:
             eq_(e.value, "attribute 'x' unknown for 'o'")
 
+    def test_compact_values(self):
+        scl = CClass(self.mcl, "SCL", attributes={"i": 1, "j": 2})
+        cl = CClass(self.mcl, "C", superclasses=scl, compact_values=True, attributes={"i": 3, "b": bool})
+        eq_(cl.compact_values, True)
+        o = CObject(cl, "o", values={"b": True})
+        eq_(o.values, {"i": 3, "j": 2, "b": True})
+        o.set_value("i", 10)
+        o.set_value("i", 20, scl)
+        eq_(o.get_value("i"), 10)
+        eq_(o.get_value("i", cl), 10)
+        eq_(o.get_value("i", scl), 20)
+        eq_(o.delete_value("i"), 10)
+        eq_(o.values, {"i": 20, "j": 2, "b": True})
+
+        cl.attributes = {"i": int, "k": "x"}
+        eq_(o.values, {"i": 20, "j": 2, "k": "x"})
+        try:
+            o.get_value("b")
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "attribute 'b' unknown for 'o'")
+
+    def test_compact_values_after_superclass_changes(self):
+        scl = CClass(self.mcl, "SCL", attributes={"i": 1})
+        cl = CClass(self.mcl, "C", superclasses=scl, compact_values=True, attributes={"j": 2})
+        o = CObject(cl, "o")
+        o.set_value("i", 5)
+        cl.superclasses = []
+        eq_(o.values, {"j": 2})
+        cl.superclasses = scl
+        eq_(o.values, {"i": 5, "j": 2})
+
+    def test_order_of_compact_values(self):
+        scl = CClass(self.mcl, "SCL", attributes={"x": int})
+        attributes = {"a": int, "b": int, "c": int}
+        dict_cl = CClass(self.mcl, "D", superclasses=scl, attributes=attributes)
+        compact_cl = CClass(self.mcl, "C", superclasses=scl, compact_values=True, attributes=attributes)
+        objects = [CObject(dict_cl, "d"), CObject(compact_cl, "c")]
+        for o in objects:
+            o.set_value("c", 3)
+            o.set_value("b", 2)
+            o.set_value("a", 1)
+            o.set_value("x", 0)
+            o.set_value("c", 4)
+            o.delete_value("b")
+            o.set_value("b", 5)
+        eq_([list(o.values.items()) for o in objects], 2 * [[("c", 4), ("a", 1), ("b", 5), ("x", 0)]])
+        compact_cl.attributes = {"c": int, "b": int, "a": int, "d": int}
+        objects[1].set_value("d", 6)
+        eq_(list(objects[1].values.items()), [("c", 4), ("a", 1), ("b", 5), ("d", 6), ("x", 0)])
+
+    def test_switch_compact_values(self):
+        scl = CClass(self.mcl, "SCL", attributes={"i": 1})
+        cl = CClass(self.mcl, "C", superclasses=scl, attributes={"i": 2, "j": 3})
+        o = CObject(cl, "o", values={"j": 4})
+        o.set_value("i", 5, scl)
+        cl.compact_values = True
+        eq_(o.values, {"i": 2, "j": 4})
+        eq_(o.get_value("i", scl), 5)
+        o.set_value("i", 6)
+        cl.compact_values = False
+        eq_(o.values, {"i": 6, "j": 4})
+        eq_(o.get_value("i", scl), 5)
+
+        compact_cl = CClass(self.mcl, "CC", superclasses=scl, compact_values=True, attributes={"j": 7})
+        o.classifier = compact_cl
+        eq_(o.values, {"i": 5})
+        o.classifier = cl
+        eq_(o.values, {"i": 6, "j": 4})
+
 
 if __name__ == "__main__":
     nose.main()
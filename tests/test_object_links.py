@@ -1,7 +1,8 @@
 import nose
 from nose.tools import eq_
 
-from codeable_models import CMetaclass, CClass, CObject, CException, set_links, add_links, delete_links
+from codeable_models import CMetaclass, CClass, CObject, CException, set_links, add_links, delete_links, \
+    add_links_bulk, delete_elements, CBundle
 from tests.testing_commons import exception_expected_
 
 
@@ -409,6 +410,73 @@ class TestObjectLinks:
         eq_(o1.get_linked(), [o2, o2])
         eq_(o2.get_linked(), [o1, o1])
 
+    def test_links_of_object_with_many_links(self):
+        a = self.c1.association(self.c2, "a: [source_a] * -> [target_a] *")
+        b = self.c1.association(self.c2, "b: [source_b] * -> [target_b] *")
+        r = self.c1.association(self.c1, "r: [prior] * -> [next] *")
+        hub = CObject(self.c1, "hub")
+        objects = [CObject(self.c2, f"o{i}") for i in range(20)]
+        nexts = [CObject(self.c1, f"n{i}") for i in range(10)]
+        for i, o in enumerate(objects):
+            hub.add_links(o, association=a if i % 2 == 0 else b)
+        hub.add_links(nexts, role_name="next")
+        add_links({nexts[0]: hub}, role_name="next")
+        eq_(len(hub.links), 31)
+
+        eq_(hub.get_links_for_association(a), [link for link in hub.links if link.association == a])
+        eq_(hub.get_linked(association=b), objects[1::2])
+        eq_(hub.get_linked(role_name="target_a"), objects[0::2])
+        eq_(hub.get_linked(role_name="next"), nexts)
+        eq_(hub.get_linked(role_name="prior"), [nexts[0]])
+        eq_(hub.get_linked(association=r), nexts + [nexts[0]])
+
+        try:
+            hub.add_links(objects[2], association=a)
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "trying to link the same link twice 'hub -> o2'' twice for the same association")
+        hub.add_links(objects[2], association=b)
+
+        delete_links({hub: objects[0:10:2]}, association=a)
+        eq_(hub.get_linked(association=a), objects[10::2])
+        hub.add_links(objects[0], association=a)
+        eq_(hub.get_linked(association=a), objects[10::2] + [objects[0]])
+        hub.delete_links(nexts[0], role_name="next")
+        eq_(hub.get_linked(role_name="next"), nexts[1:])
+        eq_(hub.get_linked(role_name="prior"), [nexts[0]])
+
+    def test_delete_links_of_object_with_many_links(self):
+        a = self.c1.association(self.c2, "a: * -> *")
+        r = self.c1.association(self.c1, "r: [prior] * -> [next] *")
+        hub = CObject(self.c1, "hub")
+        objects = [CObject(self.c2, f"o{i}") for i in range(30)]
+        hub.add_links(objects, association=a)
+        hub.add_links(hub, association=r)
+        nexts = [CObject(self.c1, f"n{i}") for i in range(5)]
+        add_links({n: hub for n in nexts}, association=r)
+
+        delete_links({hub: objects[0:10]})
+        eq_(hub.get_linked(association=a), objects[10:])
+        delete_links({hub: nexts[1:3]})
+        eq_(hub.get_linked(role_name="prior"), [hub, nexts[0], nexts[3], nexts[4]])
+        eq_(nexts[1].links, [])
+        delete_links({hub: hub}, association=r)
+        eq_(hub.get_linked(association=r), [nexts[0], nexts[3], nexts[4]])
+        for link in hub.get_links_for_association(a)[::2]:
+            link.delete()
+        eq_(hub.linked, objects[11::2] + [nexts[0], nexts[3], nexts[4]])
+        try:
+            delete_links({hub: objects[0]})
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "no link found for 'hub -> o0' in delete links")
+
+        # the links are returned as a list that is not changed when links are deleted
+        links = hub.links
+        links[-1].delete()
+        eq_(hub.links, links[:-1])
+        eq_(len(links), 13)
+
     def test_non_existing_role_name(self):
         self.c1.association(self.c1, role_name="next", source_role_name="prior",
                             source_multiplicity="1", multiplicity="1")
@@ -1244,6 +1312,226 @@ class TestObjectLinks:
         add_links({obj_a: [obj_b1, obj_b2]}, role_name="b")
         eq_(set(obj_a.get_linked(role_name="b")), {obj_b1, obj_b2})
 
+    def test_add_links_bulk(self):
+        a = self.c1.association(self.c2, "a: [source] 1 -> [target] *")
+        o1 = CObject(self.c1, "o1")
+        o2 = CObject(self.c1, "o2")
+        targets = [CObject(self.c2, f"t{i}") for i in range(4)]
+        links = add_links_bulk(a, [(o1, targets[0]), (o1, targets[1]), (targets[2], o2)], label="l")
+        eq_(o1.linked, targets[0:2])
+        eq_(o2.linked, [targets[2]])
+        eq_([(link.source, link.target, link.label) for link in links],
+            [(o1, targets[0], "l"), (o1, targets[1], "l"), (o2, targets[2], "l")])
+
+        links = add_links_bulk(a, sources=[o2], targets=[targets[3]])
+        eq_(o2.linked, [targets[2], targets[3]])
+        eq_(links[0].source, o2)
+
+    def test_add_links_bulk_rollback(self):
+        a = self.c1.association(self.c2, "a: [source] * -> [target] 0..2")
+        o1 = CObject(self.c1, "o1")
+        o2 = CObject(self.c1, "o2")
+        targets = [CObject(self.c2, f"t{i}") for i in range(3)]
+        add_links_bulk(a, [(o1, targets[0])])
+        try:
+            add_links_bulk(a, [(o2, targets[1]), (o1, targets[1]), (o1, targets[2])])
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "links of object 'o1' have wrong multiplicity '3': should be '0..2'")
+        eq_(o1.linked, [targets[0]])
+        eq_(o2.linked, [])
+        eq_(targets[1].linked, [])
+
+        try:
+            add_links_bulk(a, [(o2, targets[1]), (o1, targets[0])])
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "trying to link the same link twice 'o1 -> t0'' twice for the same association")
+        eq_(o2.linked, [])
+
+        try:
+            add_links_bulk(a, [(o2, targets[1]), (o2, self.c1)])
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "association does not match link 'o2 -> C1'")
+        eq_(o2.linked, [])
+
+        try:
+            add_links_bulk(a, [(o2, targets[1]), (o2, targets[2], o1)])
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "malformed link pair: should be of the form (<link source>, <link target>)")
+        eq_(o2.linked, [])
+
+    def test_add_links_bulk_wrong_arguments(self):
+        a = self.c1.association(self.c2, "a: [source] * -> [target] *")
+        o1 = CObject(self.c1, "o1")
+        o2 = CObject(self.c2, "o2")
+        for kwargs, message in [
+            ({"pairs": [(o1, o2)], "role_name": "target"}, "unknown keywords argument"),
+            ({"pairs": [(o1, o2)], "x": 1}, "unknown keywords argument"),
+            ({}, "either pairs or sources and targets are required for adding links in bulk"),
+            ({"sources": [o1]}, "either pairs or sources and targets are required for adding links in bulk"),
+            ({"sources": [o1], "targets": [o2, o2]},
+             "sources and targets for adding links in bulk must have the same length"),
+            ({"pairs": [(o1, o2)], "sources": [o1], "targets": [o2]},
+             "pairs cannot be combined with sources and targets for adding links in bulk"),
+            ({"pairs": [(o1, None)]}, "link target 'None' is not an object, class, or link")]:
+            try:
+                add_links_bulk(a, **kwargs)
+                exception_expected_()
+            except CException as e:
+                eq_(e.value, message)
+        try:
+            add_links_bulk(None, [(o1, o2)])
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "association is required for adding links in bulk")
+        o2.delete()
+        try:
+            add_links_bulk(a, [(o1, o2)])
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "cannot link to deleted target")
+
+    def test_association_matching_after_model_changes(self):
+        a = self.c1.association(self.c2, "a: [source] * -> [target] *")
+        o1 = CObject(self.c1, "o1")
+        o2 = CObject(self.c2, "o2")
+        o3 = CObject(self.c2, "o3")
+        links = add_links({o1: o2})
+        eq_(links[0].association, a)
+
+        b = self.c1.association(self.c2, "b: [source_b] * -> [target_b] *")
+        try:
+            add_links({o1: o3})
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "link specification ambiguous, multiple matching associations found for source 'o1' " +
+                "and targets '['o3']'")
+        links = add_links({o1: o3}, role_name="target_b")
+        eq_(links[0].association, b)
+
+        b.role_name = "other"
+        try:
+            add_links({o1: o2}, role_name="target_b")
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "matching association not found for source 'o1' and targets '['o2']'")
+        links = add_links({o1: o2}, role_name="other")
+        eq_(links[0].association, b)
+
+        b.delete()
+        links = add_links({o1: o3})
+        eq_(links[0].association, a)
+
+        c3 = CClass(self.mcl, "C3")
+        o4 = CObject(c3, "o4")
+        try:
+            add_links({o1: o4})
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "matching association not found for source 'o1' and targets '['o4']'")
+        c3.superclasses = self.c2
+        links = add_links({o1: o4})
+        eq_(links[0].association, a)
+
+    def test_delete_association_keeps_links_of_other_associations(self):
+        a = self.c1.association(self.c2, "a: * -> *")
+        b = self.c1.association(self.c2, "b: * -> *")
+        o1 = CObject(self.c1, "o1")
+        o2 = CObject(self.c2, "o2")
+        add_links({o1: o2}, association=a)
+        b_links = add_links({o1: o2}, association=b)
+        a.delete()
+        eq_(o1.links, b_links)
+        eq_(o2.links, b_links)
+
+    def test_delete_elements(self):
+        a = self.c1.association(self.c2, "a: * -> *")
+        b = self.c1.association(self.c1, "b: * -> *")
+        bundle = CBundle("B")
+        c1_objects = [CObject(self.c1, f"c1_{i}", bundles=bundle) for i in range(30)]
+        c2_objects = [CObject(self.c2, f"c2_{i}") for i in range(30)]
+        add_links({o: c2_objects for o in c1_objects}, association=a)
+        add_links({c1_objects[0]: c1_objects[1:]}, association=b)
+        link_to_delete = c1_objects[1].get_links_for_association(a)[0]
+        delete_elements(c1_objects[2:] + [link_to_delete])
+        eq_(self.c1.objects, c1_objects[0:2])
+        eq_(bundle.elements, c1_objects[0:2])
+        eq_(c1_objects[0].get_linked(association=b), [c1_objects[1]])
+        eq_(c1_objects[0].get_linked(association=a), c2_objects)
+        eq_(c1_objects[1].get_linked(association=a), c2_objects[1:])
+        eq_(c2_objects[5].get_linked(), c1_objects[0:2])
+        eq_(link_to_delete.is_deleted, True)
+        eq_(c1_objects[5].is_deleted, True)
+        eq_(c1_objects[5].links, [])
+
+        delete_elements([self.c1])
+        eq_(self.c1.is_deleted, True)
+        eq_(c1_objects[0].is_deleted, True)
+        eq_(a.is_deleted, True)
+        eq_(self.mcl.classes, [self.c2])
+        for o in c2_objects:
+            eq_(o.links, [])
+
+    def test_delete_elements_same_result_as_delete(self):
+        def build_model():
+            mcl = CMetaclass("MCL")
+            c1 = CClass(mcl, "C1")
+            c2 = CClass(mcl, "C2", superclasses=c1)
+            association = c1.association(c2, "a: * -> *")
+            objects = [CObject(c1 if i % 2 else c2, f"o{i}") for i in range(40)]
+            add_links({o: objects[0:i:2] for i, o in enumerate(objects) if i % 2}, association=association)
+            return c1, c2, objects
+
+        c1, c2, objects = build_model()
+        for o in objects[10:30]:
+            o.delete()
+        c2.delete()
+        expected = [[str(linked) for linked in o.get_linked()] for o in c1.all_objects]
+
+        c1, c2, objects = build_model()
+        delete_elements(objects[10:30] + [c2])
+        eq_([[str(linked) for linked in o.get_linked()] for o in c1.all_objects], expected)
+        eq_([o.is_deleted for o in objects], [i in range(10, 30) or i % 2 == 0 for i in range(40)])
+
+    def test_delete_elements_same_result_as_delete_for_superclass(self):
+        def build_model():
+            mcl = CMetaclass("MCL")
+            c1 = CClass(mcl, "C1")
+            c2 = CClass(mcl, "C2", superclasses=c1)
+            c3 = CClass(mcl, "C3", superclasses=c2)
+            d = CClass(mcl, "D")
+            association = c1.association(d, "a: * -> *")
+            d_objects = [CObject(d, f"d{i}") for i in range(3)]
+            objects = [CObject(c2, "o1"), CObject(c3, "o2"), CObject(c3, "o3")]
+            add_links({o: d_objects for o in objects}, association=association)
+            return c1, association, objects, d_objects
+
+        c1, association, objects, d_objects = build_model()
+        c1.delete()
+        eq_(association.is_deleted, True)
+        for o in objects + d_objects:
+            eq_(o.links, [])
+        expected = [(o.is_deleted, [str(sc) for sc in o.classifier.superclasses]) for o in objects]
+
+        c1, association, objects, d_objects = build_model()
+        delete_elements([c1])
+        eq_(association.is_deleted, True)
+        for o in objects + d_objects:
+            eq_(o.links, [])
+        eq_([(o.is_deleted, [str(sc) for sc in o.classifier.superclasses]) for o in objects], expected)
+
+    def test_delete_elements_wrong_element(self):
+        o1 = CObject(self.c1, "o1")
+        try:
+            delete_elements([o1, "o2"])
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "'o2' is not a named element and cannot be deleted")
+        eq_(o1.is_deleted, False)
+
 
 if __name__ == "__main__":
     nose.main()
@@ -0,0 +1,314 @@
+import io
+import os
+import shutil
+import sys
+import tempfile
+
+import nose
+from nose.tools import eq_, ok_
+
+from codeable_models import CMetaclass, CClass, CObject, CBundle, CException, CStereotype, add_links
+from plant_uml_renderer import PlantUMLGenerator, ClassModelRenderer, ObjectModelRenderer
+from plant_uml_renderer.class_model_renderer import ClassifierRenderingContext
+from plant_uml_renderer.model_renderer import MAX_COMMAND_LINE_LENGTH
+from tests.testing_commons import exception_expected_
+
+# stub for the PlantUML executable that logs the arguments it is called with, creates the image files, and fails
+# for files named Fail*
+STUB_SOURCE = """
+import os
+import sys
+with open(sys.argv[0] + ".log", "a") as log:
+    log.write(" ".join(sys.argv[1:]) + "\\n")
+if any(os.path.basename(argument).startswith("Fail") for argument in sys.argv[1:]):
+    sys.exit(1)
+for argument in sys.argv[1:]:
+    if argument.endswith(".txt"):
+        open(argument[:-4] + (".svg" if "-tsvg" in sys.argv else ".png"), "w").close()
+"""
+
+
+class TestPlantUMLRendering:
+    def setup(self):
+        self.directory = tempfile.mkdtemp()
+        self.stub = os.path.join(self.directory, "plantuml_stub.py")
+        with open(self.stub, "w") as file:
+            file.write(STUB_SOURCE)
+        self.mcl = CMetaclass("MCL")
+        self.c1 = CClass(self.mcl, "C1")
+        self.c2 = CClass(self.mcl, "C2")
+        self.o1 = CObject(self.c1, "o1")
+
+    def teardown(self):
+        shutil.rmtree(self.directory)
+
+    def get_invocations(self):
+        log = self.stub + ".log"
+        if not os.path.exists(log):
+            return []
+        with open(log) as file:
+            return [line.split() for line in file.read().splitlines()]
+
+    def test_render_to_files_invokes_plant_uml_per_file(self):
+        renderer = ClassModelRenderer(directory=self.directory, plant_uml_command=[sys.executable, self.stub])
+        renderer.render_class_model_to_file("m1", [self.c1])
+        renderer.render_svg = False
+        renderer.render_class_model_to_file("m2", [self.c2])
+        m1 = os.path.join(self.directory, "m1.txt")
+        m2 = os.path.join(self.directory, "m2.txt")
+        eq_(self.get_invocations(), [[m1], [m1, "-tsvg"], [m2]])
+        with open(m1) as file:
+            eq_(file.read(), renderer.render_class_model([self.c1]))
+        eq_(renderer.pending_files, [])
+
+    def test_render_to_files_keeps_previous_source_if_source_fails(self):
+        renderer = ClassModelRenderer(directory=self.directory, plant_uml_command=[sys.executable, self.stub])
+        renderer.render_class_model_to_file("m1", [self.c1])
+        files = sorted(os.listdir(self.directory))
+
+        def failing_source(file):
+            file.write("@startuml\n")
+            raise CException("rendering failed")
+
+        try:
+            renderer.render_to_files("m1", failing_source)
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "rendering failed")
+        with open(os.path.join(self.directory, "m1.txt")) as file:
+            eq_(file.read(), renderer.render_class_model([self.c1]))
+        eq_(sorted(os.listdir(self.directory)), files)
+        eq_(len(self.get_invocations()), 2)
+
+    def test_streamed_source_matches_rendered_source(self):
+        stereotype = CStereotype("S", extended=self.mcl, attributes={"t": "v"})
+        self.c1.stereotype_instances = stereotype
+        self.c1.attributes = {"i": 1, "s": "x"}
+        self.c1.association(self.c2, "a: [x] 1 -> [y] *")
+        o2 = CObject(self.c2, "o2")
+        add_links({self.o1: o2}, role_name="y")
+        class_renderer = ClassModelRenderer()
+        object_renderer = ObjectModelRenderer()
+        output = io.StringIO()
+        eq_(class_renderer.render_class_model([self.c1, self.c2], output=output), None)
+        eq_(output.getvalue(), class_renderer.render_class_model([self.c1, self.c2]))
+        output = io.StringIO()
+        eq_(object_renderer.render_object_model([self.o1, o2], output=output), None)
+        eq_(output.getvalue(), object_renderer.render_object_model([self.o1, o2]))
+        ok_("i = 1" in output.getvalue())
+
+        context = ClassifierRenderingContext(io.StringIO())
+        try:
+            context.result
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "the rendering result has been written to the output and is not available")
+
+    def test_generate_models_with_one_plant_uml_invocation_per_format(self):
+        generator = PlantUMLGenerator()
+        generator.directory = self.directory
+        generator.plant_uml_command = [sys.executable, self.stub]
+        generator.generate_class_models("classes", [CBundle("B1", elements=[self.c1]), {},
+                                                    CBundle("B2", elements=[self.c2]), {}])
+        b1 = os.path.join(self.directory, "classes", "B1.txt")
+        b2 = os.path.join(self.directory, "classes", "B2.txt")
+        eq_(self.get_invocations(), [[b1, b2], [b1, b2, "-tsvg"]])
+        eq_(generator.directory, self.directory)
+
+        with generator.batch_rendering():
+            generator.generate_object_models("objects", [CBundle("B3", elements=[self.o1]), {}])
+            generator.generate_class_model(CBundle("B4", elements=[self.c2]))
+            eq_(len(self.get_invocations()), 2)
+        b3 = os.path.join(self.directory, "objects", "B3.txt")
+        b4 = os.path.join(self.directory, "B4.txt")
+        eq_(self.get_invocations()[2:], [[b4], [b4, "-tsvg"], [b3], [b3, "-tsvg"]])
+        ok_(not generator.class_model_renderer.batch_rendering)
+        ok_(not generator.object_model_renderer.batch_rendering)
+
+    def test_large_batches_are_split_into_several_plant_uml_invocations(self):
+        renderer = ClassModelRenderer(directory=self.directory, plant_uml_command=[sys.executable, self.stub],
+                                      batch_rendering=True)
+        renderer.render_svg = False
+        file_names = []
+        for i in range(150):
+            name = f"m{i}_" + "x" * 200
+            renderer.render_class_model_to_file(name, [self.c1])
+            file_names.append(os.path.join(self.directory, f"{name}.txt"))
+        eq_(renderer.render_pending_files(), [])
+        invocations = self.get_invocations()
+        eq_(len(invocations), 2)
+        eq_(invocations[0] + invocations[1], file_names)
+        for invocation in invocations:
+            ok_(len(" ".join([sys.executable, self.stub] + invocation)) <= MAX_COMMAND_LINE_LENGTH)
+
+    def test_batch_rendering_discards_pending_files_on_error(self):
+        generator = PlantUMLGenerator()
+        generator.directory = self.directory
+        generator.plant_uml_command = [sys.executable, self.stub]
+        try:
+            with generator.batch_rendering():
+                generator.generate_class_model(CBundle("B1", elements=[self.c1]))
+                generator.generate_class_model(CBundle("B2", elements=[self.o1]))
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "'o1' handed to class renderer is not a classifier or enum'")
+        eq_(self.get_invocations(), [])
+        eq_(generator.class_model_renderer.pending_files, [])
+        ok_(not generator.class_model_renderer.batch_rendering)
+
+    def test_generate_models_with_workers(self):
+        generator = PlantUMLGenerator()
+        generator.directory = self.directory
+        generator.plant_uml_command = [sys.executable, self.stub]
+        generator.workers = 2
+        views = []
+        for name in ["B1", "B2", "B3"]:
+            views.extend([CBundle(name, elements=[self.c1]), {}])
+        failures = generator.generate_class_models("classes", views)
+        eq_(failures, [])
+        b1, b2, b3 = [os.path.join(self.directory, "classes", f"{name}.txt") for name in ["B1", "B2", "B3"]]
+        eq_(sorted(self.get_invocations()), [[b1], [b1, "-tsvg"], [b2, b3], [b2, b3, "-tsvg"]])
+
+    def test_rendering_failures_are_reported_per_file(self):
+        generator = PlantUMLGenerator()
+        generator.directory = self.directory
+        generator.plant_uml_command = [sys.executable, self.stub]
+        generator.object_model_renderer.render_svg = False
+        for workers in [None, 4]:
+            generator.workers = workers
+            failures = generator.generate_object_models("objects", [CBundle("B1", elements=[self.o1]), {},
+                                                                    CBundle("Fail1", elements=[self.o1]), {},
+                                                                    CBundle("B2", elements=[self.o1]), {}])
+            eq_([str(failure) for failure in failures],
+                [f"rendering '{self.directory}/objects/Fail1.txt' to png failed: PlantUML exited with code 1"])
+            eq_(failures[0].image_format, "png")
+
+    def test_rendering_errors_of_workers_do_not_abort_the_batch(self):
+        renderer = ObjectModelRenderer(directory=self.directory, plant_uml_command=[self.stub + ".missing"],
+                                       batch_rendering=True, workers=2)
+        renderer.render_object_model_to_file("o1", [self.o1])
+        renderer.render_object_model_to_file("o2", [self.o1])
+        failures = renderer.render_pending_files()
+        eq_(len(failures), 4)
+        eq_(set((failure.file_name, failure.image_format) for failure in failures),
+            {(os.path.join(self.directory, f"{name}.txt"), image_format)
+             for name in ["o1", "o2"] for image_format in ["png", "svg"]})
+        ok_(all(isinstance(failure.reason, OSError) for failure in failures))
+
+    def test_workers_must_be_positive_integer(self):
+        renderer = ClassModelRenderer(directory=self.directory, plant_uml_command=[sys.executable, self.stub],
+                                      workers=0)
+        try:
+            renderer.render_class_model_to_file("m1", [self.c1])
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "workers must be a positive integer, but got: '0'")
+
+    def test_render_cache(self):
+        def generate(*names):
+            generator = PlantUMLGenerator()
+            generator.directory = self.directory
+            generator.plant_uml_command = [sys.executable, self.stub]
+            generator.render_cache = True
+            views = []
+            for name in names:
+                views.extend([CBundle(name, elements=[self.c1] if name != "B2" else [self.c2]), {}])
+            failures = generator.generate_class_models("classes", views)
+            return generator, failures
+
+        b1, b2, fail1 = [os.path.join(self.directory, "classes", name) for name in ["B1", "B2", "Fail1"]]
+        generate("B1", "B2")
+        eq_(self.get_invocations(), [[b1 + ".txt", b2 + ".txt"], [b1 + ".txt", b2 + ".txt", "-tsvg"]])
+        ok_(os.path.exists(b1 + ".hash") and os.path.exists(b2 + ".hash"))
+        # unchanged sources are not rendered again
+        generate("B1", "B2")
+        eq_(len(self.get_invocations()), 2)
+        # changed sources and missing images are rendered again
+        self.c1.name = "C3"
+        os.remove(b2 + ".svg")
+        generate("B1", "B2")
+        eq_(self.get_invocations()[2:], [[b1 + ".txt", b2 + ".txt"], [b1 + ".txt", b2 + ".txt", "-tsvg"]])
+        # the render settings are part of the hash
+        renderer = ClassModelRenderer(directory=os.path.join(self.directory, "classes"), render_cache=True,
+                                      plant_uml_command=[sys.executable, self.stub])
+        renderer.render_png = False
+        renderer.render_class_model_to_file("B2", [self.c2])
+        renderer.render_class_model_to_file("B2", [self.c2])
+        eq_(self.get_invocations()[4:], [[b2 + ".txt", "-tsvg"]])
+        # failed views have no hash and are rendered again
+        _, failures = generate("B1", "Fail1")
+        eq_([failure.file_name for failure in failures], [fail1 + ".txt"] * 2)
+        ok_(not os.path.exists(fail1 + ".hash"))
+        generate("B1", "Fail1")
+        eq_(self.get_invocations()[-2:], [[fail1 + ".txt"], [fail1 + ".txt", "-tsvg"]])
+
+        generator, _ = generate("B1")
+        eq_(generator.prune_stale_outputs(), [b2 + ".txt", b2 + ".png", b2 + ".svg", b2 + ".hash"])
+        eq_(sorted(os.listdir(os.path.join(self.directory, "classes"))),
+            ["B1.hash", "B1.png", "B1.svg", "B1.txt", "Fail1.txt"])
+        eq_(generator.prune_stale_outputs(), [])
+
+    def test_class_model_relation_filters(self):
+        def render_relations(class_list, **kwargs):
+            source = ClassModelRenderer().render_class_model(class_list, **kwargs)
+            return [line for line in source.splitlines() if "--" in line]
+
+        c3 = CClass(self.mcl, "C3", superclasses=self.c1)
+        self.c1.association(self.c2, "a1: [x] * -> [y] *")
+        a2 = self.c1.association(c3, "a2: [x] * -> [y] *")
+        a3 = self.c2.association(c3, "a3: [x] * -> [y] *")
+        eq_(render_relations([self.c1, self.c2, c3]),
+            ['__1_C1 <|--- __3_C3', '__1_C1 " * "  -->  " * " __2_C2: "a1"',
+             '__1_C1 " * "  -->  " * " __3_C3: "a2"', '__2_C2 " * "  -->  " * " __3_C3: "a3"'])
+        eq_(render_relations([self.c1, self.c2, c3], excluded_associations=[a2], included_associations=[a2, a3]),
+            ['__1_C1 <|--- __3_C3', '__2_C2 " * "  -->  " * " __3_C3: "a3"'])
+        eq_(render_relations([self.c1, c3], render_inheritance=False), ['__1_C1 " * "  -->  " * " __2_C3: "a2"'])
+
+    def test_object_model_link_order_and_filters(self):
+        def render_links(object_list, **kwargs):
+            source = ObjectModelRenderer().render_object_model(
+                object_list, render_association_names_when_no_label_is_given=True, **kwargs)
+            return [line for line in source.splitlines() if "-->" in line]
+
+        c3 = CClass(self.mcl, "C3", superclasses=self.c1)
+        a1 = self.c1.association(self.c2, "a1: [x] * -> [y] *")
+        a2 = c3.association(self.c2, "a2: [x] * -> [y] *")
+        o2, o3, o4 = CObject(self.c2, "o2"), CObject(self.c2, "o3"), CObject(c3, "o4")
+        add_links({o4: [o2, o3]}, association=a1)
+        link = add_links({o4: o2}, association=a2)[0]
+        add_links({o4: o3}, association=a2)
+        # links are rendered in the order of the associations on the class path of the object
+        eq_(render_links([o4, o2, o3]), ['__1_o4 --> __2_o2: a2', '__1_o4 --> __3_o3: a2',
+                                         '__1_o4 --> __2_o2: a1', '__1_o4 --> __3_o3: a1'])
+        eq_(render_links([o4, o2, o3], excluded_links=[link]), ['__1_o4 --> __3_o3: a2',
+                                                                '__1_o4 --> __2_o2: a1', '__1_o4 --> __3_o3: a1'])
+        eq_(render_links([o3, o4]), ['__2_o4 --> __1_o3: a2', '__2_o4 --> __1_o3: a1'])
+
+    def test_value_rendering_cache(self):
+        stereotype = CStereotype("S", extended=self.mcl, attributes={"t": "a"})
+        self.c1.attributes = {"x": int, "l": list}
+        self.c1.stereotype_instances = stereotype
+        self.o1.set_value("x", 1)
+        renderer = ObjectModelRenderer()
+        source = renderer.render_object_model([self.o1, self.c1])
+        ok_('x = 1' in source and '{t = "a"}' in source)
+        eq_(renderer.render_object_model([self.o1, self.c1]), source)
+        ok_(len(renderer.value_rendering_cache) > 0)
+        # changes of the model invalidate the cache
+        self.o1.set_value("x", 2)
+        self.c1.set_tagged_value("t", "b")
+        source = renderer.render_object_model([self.o1, self.c1])
+        ok_('x = 2' in source and '{t = "b"}' in source)
+        self.c1.get_attribute("x").type = str
+        ok_('x = "2"' in renderer.render_object_model([self.o1]))
+        # list values can change without changing the model, so they are not cached
+        self.o1.set_value("l", ["a"])
+        ok_('l = ["a"]' in renderer.render_object_model([self.o1]))
+        self.o1.get_value("l").append("b")
+        ok_('l = ["a", "b"]' in renderer.render_object_model([self.o1]))
+        self.c1.stereotype_instances = []
+        ok_('{t = "b"}' not in renderer.render_object_model([self.o1, self.c1]))
+
+
+if __name__ == "__main__":
+    nose.main()
@@ -0,0 +1,391 @@
+import gc
+import io
+import os
+import shutil
+import tempfile
+import weakref
+
+import nose
+from nose.tools import eq_, ok_
+
+from codeable_models import CMetaclass, CClass, CObject, CBundle, CPackage, CLayer, CException, CStereotype, \
+    CEnum, CAttribute, CLink, add_links
+from codeable_models.internal.lazy_slots import get_lazy_slots
+from codeable_models.serialization import dump, dumps, load, loads, save_snapshot, load_snapshot, open_snapshot
+from tests.testing_commons import exception_expected_
+
+
+class TestSerialization:
+    def setup(self):
+        self.mcl = CMetaclass("MCL", attributes={"kind": str, "weight": 1.5})
+        self.stereotype = CStereotype("S", extended=self.mcl, attributes={"tag": "t"},
+                                      default_values={"kind": "default kind"})
+
+    def test_round_trip_of_class_model(self):
+        color = CEnum("Color", values=["red", "green"])
+        sub_mcl = CMetaclass("SubMCL", superclasses=self.mcl, attributes={"color": color, "classes": list})
+        sub_stereotype = CStereotype("SubS", superclasses=self.stereotype)
+        mcl_association = self.mcl.association(sub_mcl, "uses: [user] 1 -> [used] *")
+        association_stereotype = CStereotype("AS", extended=mcl_association, attributes={"protocol": str})
+        c1 = CClass(sub_mcl, "C1", stereotype_instances=sub_stereotype, tagged_values={"tag": "c1"},
+                    values={"color": "green"}, attributes={"name": str, "count": 0})
+        c2 = CClass(sub_mcl, "C2", superclasses=c1, values={"classes": ["C1"]})
+        c1.set_value("classes", [c2, "C2"])
+        c1.add_links(c2, association=mcl_association)
+        association = c1.association(c2, "has: [owner] 1 -> [owned] *", derived_from=mcl_association,
+                                     stereotype_instances=association_stereotype,
+                                     tagged_values={"protocol": "http"})
+        layer1 = CLayer("L1", elements=[c1, c2, association])
+        layer2 = CLayer("L2", sub_layer=layer1)
+        package = CPackage("P", elements=[layer2, layer1, sub_mcl, self.mcl])
+
+        new_package, new_c2 = loads(dumps([package, c2]))
+        eq_(type(new_package), CPackage)
+        eq_([e.name for e in new_package.elements], ["L2", "L1", "SubMCL", "MCL"])
+        new_layer2, new_layer1, new_sub_mcl, new_mcl = new_package.elements
+        eq_(new_layer2.sub_layer, new_layer1)
+        new_c1 = new_layer1.get_element(name="C1")
+        eq_(new_layer1.elements, [new_c1, new_c2, new_c1.associations[0]])
+        eq_(new_c1.bundles, [new_layer1])
+        eq_(new_sub_mcl.bundles, [new_package])
+
+        eq_(new_sub_mcl.superclasses, [new_mcl])
+        eq_(new_mcl.subclasses, [new_sub_mcl])
+        eq_(new_sub_mcl.classes, [new_c1, new_c2])
+        eq_(new_c2.superclasses, [new_c1])
+        eq_(new_c2.metaclass, new_sub_mcl)
+        new_color = new_sub_mcl.get_attribute("color").type
+        eq_(new_color.values, ["red", "green"])
+        ok_(new_color is not color)
+        eq_(new_mcl.get_attribute("weight").default, 1.5)
+
+        eq_(new_c1.values, {"color": "green", "classes": [new_c2, "C2"], "kind": "default kind", "weight": 1.5})
+        eq_(new_c2.values, {"classes": ["C1"], "weight": 1.5})
+        eq_(new_c1.attribute_names, ["name", "count"])
+        eq_(new_c1.get_attribute("count").default, 0)
+        new_sub_stereotype = new_c1.stereotype_instances[0]
+        eq_(new_sub_stereotype.name, "SubS")
+        eq_(new_sub_stereotype.superclasses[0].extended, [new_mcl])
+        eq_(new_sub_stereotype.superclasses[0].default_values, {"kind": "default kind"})
+        eq_(new_c1.tagged_values, {"tag": "c1"})
+        eq_(new_sub_stereotype.extended_instances, [new_c1])
+
+        eq_(new_c1.linked, [new_c2])
+        new_mcl_association = new_mcl.associations[0]
+        eq_(new_c1.get_links_for_association(new_mcl_association)[0].association, new_mcl_association)
+        new_association = new_c1.associations[0]
+        eq_(new_association.name, "has")
+        eq_(new_association.role_name, "owned")
+        eq_(new_association.source_multiplicity, "1")
+        eq_(new_association.derived_from, new_mcl_association)
+        eq_(new_mcl_association.derived_associations, [new_association])
+        eq_(new_association.stereotype_instances, new_mcl_association.stereotypes)
+        eq_(new_association.tagged_values, {"protocol": "http"})
+
+        # the loaded model is independent of the original model, and written in the same way
+        c1.name = "C3"
+        eq_(new_c1.name, "C1")
+        c1.name = "C1"
+        eq_(dumps(new_package), dumps(package))
+
+    def test_round_trip_of_object_model(self):
+        cl = CClass(self.mcl, "CL", compact_values=True, attributes={"x": int, "ref": CClass(self.mcl, "Ref")})
+        ref_class = cl.get_attribute("ref").type
+        ref1 = CObject(ref_class, "ref1")
+        ref_default = CObject(ref_class, "ref_default")
+        cl.get_attribute("ref").default = ref_default
+        cl2 = CClass(self.mcl, "CL2", superclasses=cl)
+        link_stereotype = CStereotype("LS", attributes={"weight": 1})
+        linkable = CClass(self.mcl, "Linkable")
+        association = cl.association(ref_class, "refs: [cl] * -> [ref] *", superclasses=linkable)
+        link_stereotype.extended = association
+        link_association = cl.association(linkable, "link_refs: [cl] * -> [link] *")
+        objects = [CObject(cl2 if i % 2 else cl, f"o{i}", values={"x": i}) for i in range(4)]
+        # a value referring to an object created later on
+        late_ref = CObject(ref_class, "late_ref")
+        objects[0].set_value("ref", late_ref)
+        links = add_links({objects[0]: [ref1, ref_default], objects[1]: ref1}, association=association,
+                          stereotype_instances=link_stereotype)
+        links[1].label = "label"
+        links[1].set_tagged_value("weight", 2)
+        add_links({objects[2]: [links[0], links[1]]}, association=link_association)
+        bundle = CBundle("B", elements=objects)
+
+        new_bundle = load(io.StringIO(dumps(bundle)))[0]
+        new_objects = new_bundle.elements
+        eq_([o.name for o in new_objects], ["o0", "o1", "o2", "o3"])
+        new_cl = new_objects[0].classifier
+        ok_(new_cl.compact_values)
+        eq_([o.name for o in new_cl.objects], ["o0", "o2"])
+        new_ref_default = new_cl.get_attribute("ref").default
+        eq_(new_ref_default.name, "ref_default")
+        eq_(new_objects[0].get_value("ref").name, "late_ref")
+        eq_(new_objects[3].values, {"x": 3, "ref": new_ref_default})
+        eq_([o.name for o in new_objects[0].linked], ["ref1", "ref_default"])
+
+        new_links = new_objects[0].links
+        eq_(new_links[1].label, "label")
+        eq_(new_links[1].tagged_values, {"weight": 2})
+        eq_(new_links[0].tagged_values, {"weight": 1})
+        eq_(new_links[0].stereotype_instances[0].name, "LS")
+        eq_(new_links[0].target.links, new_links[0:1] + new_objects[1].links)
+        eq_(new_objects[2].linked, new_links)
+        eq_(new_links[0].linked, [new_objects[2]])
+        eq_(new_links[0].get_linked(role_name="cl"), [new_objects[2]])
+        eq_(dumps(new_bundle), dumps(bundle))
+
+    def test_dump_to_file(self):
+        c1 = CClass(self.mcl, "C1", values={"kind": "k"})
+        file = io.StringIO()
+        dump(c1.class_object, file)
+        eq_(file.getvalue().splitlines(), [
+            '{"format":"codeable_models","version":1}',
+            '{"type":"metaclass","id":0,"name":"MCL"}',
+            '{"type":"class","id":1,"name":"C1","metaclass":0}',
+            '{"type":"classifier","id":0,"attributes":[["kind","str",null],["weight","float",1.5]]}',
+            '{"type":"values","id":1,"values":[[0,"kind","k"],[0,"weight",1.5]]}',
+            '{"type":"roots","ids":[2]}'])
+        new_class_object = loads(file.getvalue())[0]
+        eq_(new_class_object.class_object_class.values, {"kind": "k", "weight": 1.5})
+
+    def test_attribute_without_type(self):
+        cl = CClass(self.mcl, "CL", attributes={"untyped": CAttribute()})
+        new_cl = loads(dumps(cl))[0]
+        eq_(new_cl.get_attribute("untyped").type, None)
+
+    def test_dump_fails(self):
+        c1 = CClass(self.mcl, "C1")
+        c1.delete()
+        try:
+            dumps([c1])
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "can't serialize deleted element")
+        try:
+            dumps([1])
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "'1' is not a model element and cannot be serialized")
+        c2 = CClass(self.mcl, "C2", attributes={"list": [(1, 2)]})
+        try:
+            dumps(c2)
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "can't serialize value '(1, 2)'")
+
+    def test_load_fails(self):
+        try:
+            loads('{"type":"bundle","id":0,"kind":"CBundle","name":"B"}\n')
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "not a serialized model: header not found")
+        try:
+            loads('{"format":"codeable_models","version":2}\n')
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "unsupported serialization format version: '2'")
+        lines = dumps(CBundle("B")).splitlines()
+        try:
+            loads("\n".join(lines[:-1]))
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "incomplete serialized model: end of model not found")
+        try:
+            loads("\n".join([lines[0], '{"type":"unknown"}']))
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "unknown record in line 2: '{\"type\":\"unknown\"}'")
+        try:
+            loads("\n".join([lines[0], '{"type":"roots","ids":[1]}']))
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "unknown element id: '1'")
+        try:
+            loads("\n".join([lines[0], '{"type":']))
+            exception_expected_()
+        except CException as e:
+            ok_(e.value.startswith("malformed record in line 2: "))
+
+
+class TestSnapshots:
+    def setup(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "model.snapshot")
+        self.mcl = CMetaclass("MCL")
+        self.cl = CClass(self.mcl, "CL", compact_values=True, attributes={"x": int, "values": list})
+        self.association = self.cl.association(self.cl, "refs: [source] * -> [target] *")
+        self.stereotype = CStereotype("S", extended=self.association, attributes={"weight": 1.5})
+        self.objects = [CObject(self.cl, f"o{i}", values={"x": i}) for i in range(4)]
+        self.objects[0].values = {"values": [2 ** 70, 0.5, None, True, "v", self.objects[3]]}
+        self.links = add_links({self.objects[0]: self.objects[1:], self.objects[1]: self.objects[1]},
+                               association=self.association, stereotype_instances=self.stereotype)
+        self.links[1].label = "label"
+        self.links[1].set_tagged_value("weight", 2.5)
+        self.bundle = CBundle("B", elements=self.objects[:3])
+
+    def teardown(self):
+        shutil.rmtree(self.directory)
+
+    def test_lazy_loading_of_snapshot(self):
+        save_snapshot([self.bundle, self.mcl], self.path)
+        new_bundle, new_mcl = load_snapshot(self.path)
+        new_cl = new_mcl.classes[0]
+        eq_(get_lazy_slots(new_bundle), {"elements_"})
+        eq_(get_lazy_slots(new_cl), {"objects_"})
+
+        new_o0, new_o1, new_o2 = new_bundle.elements
+        eq_(get_lazy_slots(new_bundle), set())
+        eq_(get_lazy_slots(new_o0), {"attribute_values", "links_", "links_index_"})
+        eq_(new_o0.get_value("x"), 0)
+        eq_(get_lazy_slots(new_o0), {"links_", "links_index_"})
+        eq_(get_lazy_slots(new_cl), {"objects_"})
+        new_o3 = new_o0.get_value("values")[5]
+        eq_(new_o0.values, {"x": 0, "values": [2 ** 70, 0.5, None, True, "v", new_o3]})
+        eq_(new_o0.linked, [new_o1, new_o2, new_o3])
+        eq_(get_lazy_slots(new_o3), {"attribute_values", "links_", "links_index_"})
+        new_links = new_o0.links
+        eq_(new_links[1].label, "label")
+        eq_(new_links[1].tagged_values, {"weight": 2.5})
+        eq_(new_links[0].stereotype_instances, new_cl.associations[0].stereotypes)
+        eq_(new_o1.get_linked(role_name="target"), [new_o1])
+
+        eq_(new_cl.objects, [new_o0, new_o1, new_o2, new_o3])
+        eq_(get_lazy_slots(new_cl), set())
+        eq_(new_cl.get_object("o3"), new_o3)
+        eq_(dumps([new_bundle, new_mcl]), dumps([self.bundle, self.mcl]))
+
+    def test_eager_loading_of_snapshot(self):
+        save_snapshot(self.bundle, self.path)
+        new_bundle = load_snapshot(self.path, lazy=False)[0]
+        new_cl = new_bundle.elements[0].classifier
+        for element in [new_bundle, new_cl, new_cl.class_object] + new_cl.objects + new_bundle.elements[0].links:
+            eq_(get_lazy_slots(element), set())
+        eq_(dumps(new_bundle), dumps(self.bundle))
+
+    def test_close_snapshot(self):
+        save_snapshot([self.bundle, self.mcl], self.path)
+        with open_snapshot(self.path) as snapshot:
+            new_bundle, new_mcl = snapshot.elements
+            new_o0 = new_bundle.elements[0]
+            eq_(new_o0.get_value("x"), 0)
+            ok_(not snapshot.closed)
+        ok_(snapshot.closed)
+        new_cl = new_mcl.classes[0]
+        for element in [new_bundle, new_cl, new_cl.class_object] + new_cl.objects + new_o0.links:
+            eq_(get_lazy_slots(element), set())
+        eq_([type(element) for element in [new_bundle, new_cl, new_cl.class_object, new_o0, new_o0.links[0]]],
+            [CBundle, CClass, CObject, CObject, CLink])
+        eq_(dumps([new_bundle, new_mcl]), dumps([self.bundle, self.mcl]))
+        snapshot.close()
+        ok_(snapshot.closed)
+        os.remove(self.path)
+        CObject(new_cl, "o4", bundles=new_bundle)
+        eq_(new_bundle.get_element(name="o4").linked, [])
+
+    def test_lazy_loading_only_changes_elements_of_snapshot(self):
+        ok_(not hasattr(CObject, "__getattr__"))
+        try:
+            getattr(self.objects[0], "unknown_attribute")
+            exception_expected_()
+        except AttributeError:
+            pass
+        save_snapshot(self.bundle, self.path)
+        new_bundle = load_snapshot(self.path)[0]
+        new_o0 = new_bundle.get_element(type=CObject)
+        ok_(isinstance(new_o0, CObject))
+        eq_(type(new_o0).__name__, "CObject")
+        eq_(new_o0.linked[0].name, "o1")
+        eq_(new_o0.get_value("x"), 0)
+        # the bundle finds and removes the elements by type, also once their slots are loaded
+        eq_(type(new_o0), CObject)
+        eq_(new_bundle.get_elements(type=CObject), new_bundle.elements)
+        new_bundle.remove(new_o0)
+        eq_(new_bundle.get_element(type=CObject).name, "o1")
+
+    def test_changes_of_lazily_loaded_classes_and_stereotypes(self):
+        save_snapshot([self.bundle, self.mcl], self.path)
+        new_bundle, new_mcl = load_snapshot(self.path)
+        new_cl = new_mcl.classes[0]
+        new_stereotype = new_cl.associations[0].stereotypes[0]
+        eq_(get_lazy_slots(new_cl), {"objects_"})
+        eq_(get_lazy_slots(new_stereotype), {"extended_instances_"})
+        d = CClass(new_mcl, "D")
+        new_cl.superclasses = [d]
+        t = CStereotype("T")
+        new_stereotype.superclasses = [t]
+        eq_(new_cl.superclasses, [d])
+        eq_(d.subclasses, [new_cl])
+        eq_(new_stereotype.superclasses, [t])
+        eq_(t.subclasses, [new_stereotype])
+        try:
+            new_cl.superclasses = [t]
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "cannot add superclass 'T' to 'CL': not of type <class 'codeable_models.cclass.CClass'>")
+        o5 = CObject(new_cl, "o5")
+        eq_([o.name for o in new_cl.objects], ["o0", "o1", "o2", "o3", "o5"])
+        eq_(new_cl.objects[-1], o5)
+        eq_(CClass(new_mcl, "E", superclasses=new_cl).superclasses, [new_cl])
+
+    def test_changes_of_lazily_loaded_model(self):
+        save_snapshot(self.bundle, self.path)
+        new_bundles = [load_snapshot(self.path), load_snapshot(self.path, lazy=False)]
+        for new_bundle in new_bundles:
+            new_o0, new_o1, new_o2 = new_bundle[0].elements
+            new_o1.delete()
+            new_o2.add_links(new_o0, association=new_o0.classifier.associations[0])
+            new_o2.set_value("x", 5)
+            CObject(new_o0.classifier, "o4", bundles=new_bundle)
+        eq_(dumps(new_bundles[0]), dumps(new_bundles[1]))
+        new_o0, new_o2, new_o4 = new_bundles[0][0].elements
+        eq_(new_o0.classifier.objects, [new_o0, new_o2, new_o0.linked[1], new_o4])
+        eq_(new_o2.linked, [new_o0, new_o0])
+
+    def test_lazily_loaded_model_is_freed(self):
+        save_snapshot(self.bundle, self.path)
+        new_bundle = load_snapshot(self.path)[0]
+        new_o0 = new_bundle.elements[0]
+        eq_(new_o0.get_value("x"), 0)
+        references = [weakref.ref(new_bundle), weakref.ref(new_o0), weakref.ref(new_o0.classifier)]
+        del new_bundle, new_o0
+        gc.collect()
+        eq_([reference() for reference in references], [None, None, None])
+
+    def test_save_snapshot_to_file_of_lazily_loaded_model(self):
+        save_snapshot(self.bundle, self.path)
+        new_bundle = load_snapshot(self.path)[0]
+        new_o0, new_o1, new_o2 = new_bundle.elements
+        save_snapshot(new_o0, self.path)
+        # the model loaded before is still read from the replaced snapshot file
+        eq_(new_o2.get_value("x"), 2)
+        eq_(new_o1.linked, [new_o0, new_o1])
+        eq_(os.listdir(self.directory), ["model.snapshot"])
+        eq_(dumps(load_snapshot(self.path)), dumps(new_o0))
+
+    def test_load_snapshot_fails(self):
+        with open(self.path, "w") as file:
+            file.write(dumps(self.bundle))
+        try:
+            load_snapshot(self.path)
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "not a snapshot: header not found")
+        open(self.path, "w").close()
+        try:
+            load_snapshot(self.path)
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "not a snapshot: header not found")
+        save_snapshot(self.bundle, self.path)
+        with open(self.path, "r+b") as file:
+            file.seek(8)
+            file.write(bytes([2]))
+        try:
+            load_snapshot(self.path)
+            exception_expected_()
+        except CException as e:
+            eq_(e.value, "unsupported snapshot format version: '2'")
+
+
+if __name__ == "__main__":
+    nose.main()